@@ -0,0 +1,80 @@
+"""Payload key translation: ocpp's regex conversion vs. precomputed CaseTable.
+
+Run with:
+    poetry run python -m benchmarks.casing
+"""
+import timeit
+
+from ocpp.charge_point import camel_to_snake_case, snake_to_camel_case
+
+from ocpp_asgi.casing import case_table
+
+NUMBER = 2_000
+
+meter_values = {
+    "connectorId": 1,
+    "transactionId": 1,
+    "meterValue": [
+        {
+            "timestamp": "2022-01-01T00:00:00Z",
+            "sampledValue": [
+                {
+                    "value": str(i),
+                    "context": "Sample.Periodic",
+                    "format": "Raw",
+                    "measurand": "Energy.Active.Import.Register",
+                    "phase": "L1",
+                    "location": "Outlet",
+                    "unit": "Wh",
+                }
+                for i in range(20)
+            ],
+        }
+        for _ in range(5)
+    ],
+}
+
+set_charging_profile = {
+    "connectorId": 1,
+    "csChargingProfiles": {
+        "chargingProfileId": 1,
+        "transactionId": 1,
+        "stackLevel": 0,
+        "chargingProfilePurpose": "TxProfile",
+        "chargingProfileKind": "Absolute",
+        "validFrom": "2022-01-01T00:00:00Z",
+        "validTo": "2022-01-02T00:00:00Z",
+        "chargingSchedule": {
+            "duration": 86400,
+            "startSchedule": "2022-01-01T00:00:00Z",
+            "chargingRateUnit": "W",
+            "minChargingRate": 1.0,
+            "chargingSchedulePeriod": [
+                {"startPeriod": i * 900, "limit": 11000.0, "numberPhases": 3}
+                for i in range(96)
+            ],
+        },
+    },
+}
+
+
+def run(name: str, payload: dict):
+    table = case_table("1.6")
+    snake_case_payload = camel_to_snake_case(payload)
+    for label, func, data in [
+        ("camel_to_snake_case", camel_to_snake_case, payload),
+        ("CaseTable.to_snake", table.to_snake, payload),
+        ("snake_to_camel_case", snake_to_camel_case, snake_case_payload),
+        ("CaseTable.to_camel", table.to_camel, snake_case_payload),
+    ]:
+        seconds = timeit.timeit(lambda: func(data), number=NUMBER)
+        print(f"{name:<20} {label:<20} {seconds / NUMBER * 1e6:8.2f} us/payload")
+
+
+def main():
+    run("MeterValues", meter_values)
+    run("SetChargingProfile", set_charging_profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""JSON codecs on a realistic mix of OCPP-J frames (decode and encode).
+
+Run with:
+    poetry run python -m benchmarks.codec
+"""
+import timeit
+
+from ocpp_asgi.codec import codecs, get_codec
+
+NUMBER = 20_000
+
+sampled_values = ",".join(
+    f'{{"value":"{i}.5","measurand":"Energy.Active.Import.Register","unit":"Wh"}}'
+    for i in range(10)
+)
+frames = [
+    '[2,"1","Heartbeat",{}]',
+    '[3,"1",{"currentTime":"2022-01-01T00:00:00Z"}]',
+    '[2,"2","StatusNotification",{"connectorId":1,"errorCode":"NoError",'
+    '"status":"Available","timestamp":"2022-01-01T00:00:00Z"}]',
+    '[2,"3","MeterValues",{"connectorId":1,"transactionId":1,"meterValue":'
+    f'[{{"timestamp":"2022-01-01T00:00:00Z","sampledValue":[{sampled_values}]}}]}}]',
+    '[2,"4","TransactionEvent",{"eventType":"Updated","timestamp":'
+    '"2022-01-01T00:00:00Z","triggerReason":"MeterValuePeriodic","seqNo":1,'
+    '"transactionInfo":{"transactionId":"1"},"meterValue":[{"timestamp":'
+    '"2022-01-01T00:00:00Z","sampledValue":[{"value":1.5}]}]}]',
+]
+
+
+def main():
+    frames_bytes = [frame.encode() for frame in frames]
+    decoded = [get_codec().loads(frame) for frame in frames]
+    for name in codecs.keys():
+        try:
+            codec = get_codec(name)
+        except ImportError:
+            print(f"{name} not installed, skipping")
+            continue
+        for label, data, func in [
+            ("loads(str)", frames, codec.loads),
+            ("loads(bytes)", frames_bytes, codec.loads),
+            ("dumps", decoded, codec.dumps),
+        ]:
+            seconds = timeit.timeit(
+                lambda: [func(item) for item in data], number=NUMBER
+            )
+            per_frame = seconds / (NUMBER * len(frames)) * 1e6
+            print(f"{name:<8} {label:<14} {per_frame:8.2f} us/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Memory per idle websocket connection.
+
+Connections are opened in memory and left idle after a single Heartbeat. Memory
+allocated by ocpp_asgi (connection context, handler context and the coroutine
+frames of the connection) is reported separately from the total, which also
+includes the in-memory stand-in of the ASGI server.
+
+Run with:
+    poetry run python -m benchmarks.connection_memory
+"""
+import asyncio
+import gc
+import os
+import tracemalloc
+
+from ocpp.v16 import call
+
+import ocpp_asgi
+from benchmarks.harness import Station, v16_router
+from ocpp_asgi.app import ASGIApplication
+from ocpp_asgi.utils import payload_to_message
+
+CONNECTIONS = 10_000
+
+
+async def main():
+    app = ASGIApplication()
+    app.include_router(v16_router)
+    message = payload_to_message(payload=call.HeartbeatPayload())
+
+    # Warm up caches so that they don't count as per connection memory
+    warm_up = Station(app, "warm-up", "ocpp1.6")
+    await warm_up.connect()
+    await warm_up.run([message], [])
+    await warm_up.disconnect()
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    stations = [Station(app, f"cs-{i}", "ocpp1.6") for i in range(CONNECTIONS)]
+    for station in stations:
+        await station.connect()
+        await station.run([message], [])
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    package = tracemalloc.Filter(True, os.path.join(ocpp_asgi.__path__[0], "*"))
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    own = sum(
+        stat.size_diff
+        for stat in after.filter_traces([package]).compare_to(
+            before.filter_traces([package]), "filename"
+        )
+    )
+    print(f"Idle connections: {CONNECTIONS}")
+    print(f"Bytes per idle connection allocated by ocpp_asgi: {own // CONNECTIONS}")
+    print(f"Bytes per idle connection in total: {total // CONNECTIONS}")
+
+    for station in stations:
+        await station.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""Sending the same command to 10k Charging Stations: Router.call vs. fan_out.
+
+Run with:
+    poetry run python -m benchmarks.fan_out
+"""
+import asyncio
+import json
+import time
+
+from ocpp.messages import CallResult
+from ocpp.v16 import call
+
+from ocpp_asgi.router import Router, RouterContext, Subprotocol
+
+CONNECTIONS = 10_000
+CONCURRENCY = 1_000
+
+router = Router(subprotocol=Subprotocol.ocpp16)
+message = call.ChangeConfigurationPayload(key="HeartbeatInterval", value="300")
+
+
+def create_context(charging_station_id: str) -> RouterContext:
+    """Simulated connection: Charging Station accepts every call."""
+
+    async def send(*, message: str, is_response: bool, context: RouterContext):
+        unique_id = json.loads(message)[1]
+        asyncio.get_running_loop().call_soon(
+            router.pending_calls.resolve,
+            charging_station_id,
+            CallResult(unique_id, {"status": "Accepted"}),
+        )
+
+    return RouterContext(
+        scope={},
+        body=None,
+        subprotocol=router.subprotocol,
+        ocpp_adapter=None,
+        send=send,
+        charging_station_id=charging_station_id,
+    )
+
+
+async def individual_calls(contexts):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def send(context):
+        async with semaphore:
+            return await router.enqueue_call(message=message, context=context)
+
+    return await asyncio.gather(*[send(context) for context in contexts])
+
+
+async def fan_out(contexts):
+    return [
+        result
+        async for result in router.fan_out(
+            message=message, contexts=contexts, concurrency=CONCURRENCY
+        )
+    ]
+
+
+async def main():
+    contexts = [create_context(f"cs{i}") for i in range(CONNECTIONS)]
+    for name, func in [("Router.call", individual_calls), ("Router.fan_out", fan_out)]:
+        start = time.perf_counter()
+        results = await func(contexts)
+        seconds = time.perf_counter() - start
+        assert len(results) == CONNECTIONS
+        print(
+            f"{name:<16} {CONNECTIONS} stations {seconds * 1000:8.1f} ms "
+            f"{CONNECTIONS / seconds:10.0f} calls/s"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,366 @@
+"""End-to-end benchmark of ASGIApplication with many simulated Charging Stations.
+
+Stations are driven in memory through ASGI receive/send callables, so neither
+network nor Redis is needed. Every station connects, sends BootNotification and
+then a realistic mix of Heartbeat, StatusNotification, MeterValues and
+(ocpp2.0.1) TransactionEvent messages, waiting for each response before sending
+the next one. Reports messages per second, p50/p99 latency and memory per
+connection for ocpp1.6 and ocpp2.0.1.
+
+Run with:
+    poetry run python -m benchmarks.harness
+
+Catch regressions by storing the results of a known good revision and comparing
+against them later:
+    poetry run python -m benchmarks.harness --output baseline.json
+    poetry run python -m benchmarks.harness --baseline baseline.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+from ocpp.v16 import call as v16_call
+from ocpp.v16 import call_result as v16_call_result
+from ocpp.v16.enums import Action as v16_Action
+from ocpp.v201 import call as v201_call
+from ocpp.v201 import call_result as v201_call_result
+from ocpp.v201.enums import Action as v201_Action
+
+from ocpp_asgi.app import ASGIApplication
+from ocpp_asgi.router import HandlerContext, Router, Subprotocol
+from ocpp_asgi.utils import payload_to_message
+
+TIMESTAMP = "2022-01-01T00:00:00Z"
+
+v16_router = Router(subprotocol=Subprotocol.ocpp16)
+
+
+@v16_router.on(v16_Action.BootNotification)
+async def on_v16_boot_notification(*, payload, context: HandlerContext):
+    return v16_call_result.BootNotificationPayload(
+        current_time=TIMESTAMP, interval=300, status="Accepted"
+    )
+
+
+@v16_router.on(v16_Action.Heartbeat)
+async def on_v16_heartbeat(*, payload, context: HandlerContext):
+    return v16_call_result.HeartbeatPayload(current_time=TIMESTAMP)
+
+
+@v16_router.on(v16_Action.StatusNotification)
+async def on_v16_status_notification(*, payload, context: HandlerContext):
+    return v16_call_result.StatusNotificationPayload()
+
+
+@v16_router.on(v16_Action.MeterValues)
+async def on_v16_meter_values(*, payload, context: HandlerContext):
+    return v16_call_result.MeterValuesPayload()
+
+
+v201_router = Router(subprotocol=Subprotocol.ocpp201)
+
+
+@v201_router.on(v201_Action.BootNotification)
+async def on_v201_boot_notification(*, payload, context: HandlerContext):
+    return v201_call_result.BootNotificationPayload(
+        current_time=TIMESTAMP, interval=300, status="Accepted"
+    )
+
+
+@v201_router.on(v201_Action.Heartbeat)
+async def on_v201_heartbeat(*, payload, context: HandlerContext):
+    return v201_call_result.HeartbeatPayload(current_time=TIMESTAMP)
+
+
+@v201_router.on(v201_Action.StatusNotification)
+async def on_v201_status_notification(*, payload, context: HandlerContext):
+    return v201_call_result.StatusNotificationPayload()
+
+
+@v201_router.on(v201_Action.MeterValues)
+async def on_v201_meter_values(*, payload, context: HandlerContext):
+    return v201_call_result.MeterValuesPayload()
+
+
+@v201_router.on(v201_Action.TransactionEvent)
+async def on_v201_transaction_event(*, payload, context: HandlerContext):
+    return v201_call_result.TransactionEventPayload()
+
+
+# Message factories with relative weights of the mix, first one is sent on connect
+Mix = List[tuple]
+
+v16_mix: Mix = [
+    (
+        0,
+        lambda i: v16_call.BootNotificationPayload(
+            charge_point_model="Model", charge_point_vendor="Vendor"
+        ),
+    ),
+    (40, lambda i: v16_call.HeartbeatPayload()),
+    (
+        20,
+        lambda i: v16_call.StatusNotificationPayload(
+            connector_id=1, error_code="NoError", status="Charging"
+        ),
+    ),
+    (
+        40,
+        lambda i: v16_call.MeterValuesPayload(
+            connector_id=1,
+            transaction_id=1,
+            meter_value=[
+                {
+                    "timestamp": TIMESTAMP,
+                    "sampled_value": [
+                        {"value": str(i), "measurand": "Energy.Active.Import.Register"},
+                        {"value": "16.0", "measurand": "Current.Import", "unit": "A"},
+                    ],
+                }
+            ],
+        ),
+    ),
+]
+
+v201_mix: Mix = [
+    (
+        0,
+        lambda i: v201_call.BootNotificationPayload(
+            charging_station={"model": "Model", "vendor_name": "Vendor"},
+            reason="PowerUp",
+        ),
+    ),
+    (40, lambda i: v201_call.HeartbeatPayload()),
+    (
+        20,
+        lambda i: v201_call.StatusNotificationPayload(
+            timestamp=TIMESTAMP, connector_status="Occupied", evse_id=1, connector_id=1
+        ),
+    ),
+    (
+        20,
+        lambda i: v201_call.MeterValuesPayload(
+            evse_id=1,
+            meter_value=[
+                {
+                    "timestamp": TIMESTAMP,
+                    "sampled_value": [
+                        {"value": i, "measurand": "Energy.Active.Import.Register"}
+                    ],
+                }
+            ],
+        ),
+    ),
+    (
+        20,
+        lambda i: v201_call.TransactionEventPayload(
+            event_type="Updated",
+            timestamp=TIMESTAMP,
+            trigger_reason="MeterValuePeriodic",
+            seq_no=i,
+            transaction_info={"transaction_id": "tx-1"},
+            meter_value=[{"timestamp": TIMESTAMP, "sampled_value": [{"value": i}]}],
+        ),
+    ),
+]
+
+
+def build_messages(mix: Mix, count: int, seed: int) -> List[str]:
+    """Return serialized BootNotification followed by count messages of the mix."""
+    rng = random.Random(seed)
+    weights = [weight for weight, _ in mix]
+    factories: List[Callable] = [factory for _, factory in mix]
+    messages = [payload_to_message(payload=factories[0](0))]
+    for i in range(count):
+        (factory,) = rng.choices(factories, weights)
+        messages.append(payload_to_message(payload=factory(i)))
+    return messages
+
+
+class Station:
+    """Charging Station connected to ASGIApplication through in-memory ASGI."""
+
+    def __init__(self, app: ASGIApplication, charging_station_id: str, subprotocol):
+        self.scope = {
+            "type": "websocket",
+            "path": f"/{charging_station_id}",
+            "subprotocols": [subprotocol],
+            "headers": [],
+        }
+        self.app = app
+        self.inbound = asyncio.Queue()
+        self.outbound = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        self.task = asyncio.ensure_future(
+            self.app(self.scope, self.inbound.get, self.outbound.put)
+        )
+        self.inbound.put_nowait({"type": "websocket.connect"})
+        event = await self.outbound.get()
+        assert event["type"] == "websocket.accept", event
+
+    async def disconnect(self):
+        self.inbound.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        await self.task
+
+    async def run(self, messages: List[str], latencies: List[float]):
+        """Send messages one by one and record response latency of each."""
+        for message in messages:
+            start = time.perf_counter()
+            self.inbound.put_nowait({"type": "websocket.receive", "text": message})
+            event = await self.outbound.get()
+            latencies.append(time.perf_counter() - start)
+            assert event["text"][1] == "3", event
+
+
+@dataclass
+class Result:
+    name: str
+    stations: int
+    messages: int
+    seconds: float
+    messages_per_second: float
+    latency_p50_ms: float
+    latency_p99_ms: float
+    memory_per_connection_bytes: int
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run_scenario(
+    *, name: str, subprotocol: str, mix: Mix, stations: int, messages: int
+) -> Result:
+    app = ASGIApplication()
+    app.include_router(v16_router)
+    app.include_router(v201_router)
+    station_messages = [build_messages(mix, messages, seed) for seed in range(stations)]
+
+    # Warm up caches so that they don't count as per connection memory
+    warm_up = Station(app, "warm-up", subprotocol)
+    await warm_up.connect()
+    await warm_up.run(station_messages[0], [])
+    await warm_up.disconnect()
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    connected = [Station(app, f"cs-{i}", subprotocol) for i in range(stations)]
+    for station in connected:
+        await station.connect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies: List[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[
+            station.run(messages, latencies)
+            for station, messages in zip(connected, station_messages)
+        ]
+    )
+    seconds = time.perf_counter() - start
+    for station in connected:
+        await station.disconnect()
+
+    return Result(
+        name=name,
+        stations=stations,
+        messages=len(latencies),
+        seconds=round(seconds, 3),
+        messages_per_second=round(len(latencies) / seconds, 1),
+        latency_p50_ms=round(percentile(latencies, 0.50) * 1000, 3),
+        latency_p99_ms=round(percentile(latencies, 0.99) * 1000, 3),
+        memory_per_connection_bytes=(after - before) // stations,
+    )
+
+
+def compare(
+    results: List[Result], baseline: Dict[str, dict], tolerance: float
+) -> List[str]:
+    """Return regressions of results compared to baseline results."""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        for metric, higher_is_better in [
+            ("messages_per_second", True),
+            ("latency_p99_ms", False),
+            ("memory_per_connection_bytes", False),
+        ]:
+            old, new = previous[metric], getattr(result, metric)
+            change = (new - old) / old if old else 0.0
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(
+                    f"{result.name} {metric}: {old} -> {new} ({change:+.0%})"
+                )
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    results = [
+        await run_scenario(
+            name=f"{subprotocol}-{args.stations}",
+            subprotocol=subprotocol,
+            mix=mix,
+            stations=args.stations,
+            messages=args.messages,
+        )
+        for subprotocol, mix in [
+            (Subprotocol.ocpp16.value, v16_mix),
+            (Subprotocol.ocpp201.value, v201_mix),
+        ]
+    ]
+    for result in results:
+        print(
+            f"{result.name:>16}: {result.messages_per_second:>10,.0f} messages/s "
+            f"p50 {result.latency_p50_ms:.3f} ms p99 {result.latency_p99_ms:.3f} ms "
+            f"{result.memory_per_connection_bytes:,} bytes/connection"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "results": {result.name: asdict(result) for result in results},
+                },
+                f,
+                indent=2,
+            )
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stations", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=20, help="per station")
+    parser.add_argument("--output", help="store results as JSON")
+    parser.add_argument("--baseline", help="compare with results stored earlier")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="allowed relative change before reporting a regression",
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
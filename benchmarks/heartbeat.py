@@ -0,0 +1,47 @@
+"""Heartbeat throughput through the router vs. HeartbeatResponder.
+
+Charging Stations are driven in memory through ASGI receive/send callables and
+send Heartbeats one at a time, waiting for each response.
+
+Run with:
+    poetry run python -m benchmarks.heartbeat
+"""
+import asyncio
+import time
+
+from ocpp.v16 import call
+
+from benchmarks.harness import Station, v16_router
+from ocpp_asgi.app import ASGIApplication
+from ocpp_asgi.heartbeat import HeartbeatResponder
+from ocpp_asgi.utils import payload_to_message
+
+STATIONS = 100
+MESSAGES = 200  # per station
+
+
+async def run(name: str, heartbeat):
+    central_system = ASGIApplication(heartbeat=heartbeat)
+    central_system.include_router(v16_router)
+    message = payload_to_message(payload=call.HeartbeatPayload())
+    stations = [Station(central_system, f"cs-{i}", "ocpp1.6") for i in range(STATIONS)]
+    for station in stations:
+        await station.connect()
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[station.run([message] * MESSAGES, latencies) for station in stations]
+    )
+    seconds = time.perf_counter() - start
+    for station in stations:
+        await station.disconnect()
+    print(f"{name:<20} {len(latencies) / seconds:>10,.0f} messages/s")
+
+
+async def main():
+    await run("router", None)
+    await run("HeartbeatResponder", HeartbeatResponder())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""HTTP mode throughput: a request per OCPP-J frame vs batched http events.
+
+Heartbeats of many Charging Stations are posted with HTTPTransport to an
+HTTP-mode ASGIApplication served by uvicorn on the loopback interface, as
+WebSocket proxy does in the serverless architecture. Frames are sent either one
+per request or coalesced into batched http events with post_batched.
+Requires aiohttp and uvicorn.
+
+Run with:
+    poetry run python -m benchmarks.http_batch
+"""
+import asyncio
+import json
+import socket
+import time
+
+import uvicorn
+from ocpp.v16 import call
+
+from benchmarks.harness import v16_router
+from ocpp_asgi.app import ASGIApplication, HTTPEventContext
+from ocpp_asgi.transport import HTTPTransport
+from ocpp_asgi.utils import payload_to_message
+
+MESSAGES = 5000
+STATIONS = 100
+CONCURRENCY = 100
+
+
+class CentralSystemHTTP(ASGIApplication):
+    def http_parse_event(self, http_event: dict) -> HTTPEventContext:
+        return HTTPEventContext(
+            charging_station_id=http_event["connection_id"],
+            subprotocols=["ocpp1.6"],
+            body=http_event["body"],
+        )
+
+
+async def run(post, documents) -> float:
+    """Post documents with CONCURRENCY workers, return messages/s."""
+    remaining = iter(documents)
+
+    async def worker():
+        for document in remaining:
+            response = await post(document)
+            assert response and response[1] == "3", response
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(CONCURRENCY)])
+    return len(documents) / (time.perf_counter() - start)
+
+
+async def main():
+    app = CentralSystemHTTP()
+    app.include_router(v16_router)
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(
+            app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"
+        )
+    )
+    serving = asyncio.ensure_future(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    url = f"http://127.0.0.1:{port}/"
+
+    message = payload_to_message(payload=call.HeartbeatPayload())
+    documents = [
+        json.dumps({"connection_id": f"cs-{i % STATIONS}", "body": message})
+        for i in range(MESSAGES)
+    ]
+    single = HTTPTransport(limit=CONCURRENCY)
+    rate = await run(lambda document: single.post(url, document), documents)
+    print(f"{'frame per request':>24}: {rate:>10,.0f} messages/s")
+    for batch_size in [10, 100]:
+        batched = HTTPTransport(limit=CONCURRENCY, batch_size=batch_size)
+        rate = await run(
+            lambda document: batched.post_batched(url, document), documents
+        )
+        print(f"{f'{batch_size} frames per request':>24}: {rate:>10,.0f} messages/s")
+        await batched.stop()
+
+    await single.stop()
+    server.should_exit = True
+    await serving
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
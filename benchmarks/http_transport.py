@@ -0,0 +1,79 @@
+"""HTTP back-channel throughput: session per message vs pooled HTTPTransport.
+
+Messages are posted to a local stub server on the loopback interface with
+limited concurrency, as CentralSystemHTTP does when sending Calls to
+WebSocket proxy. Compares opening a new ClientSession for every message with a
+pooled keep-alive HTTPTransport, with and without batching. Requires aiohttp.
+
+Run with:
+    poetry run python -m benchmarks.http_transport
+"""
+import asyncio
+import time
+
+from aiohttp import ClientSession, web
+
+from ocpp_asgi.transport import HTTPTransport
+
+MESSAGES = 2000
+CONCURRENCY = 50
+MESSAGE = '[2,"1","Reset",{"type":"Soft"}]'
+
+
+async def run(post) -> float:
+    """Post MESSAGES messages with CONCURRENCY workers, return messages/s."""
+    remaining = iter(range(MESSAGES))
+
+    async def worker():
+        for _ in remaining:
+            await post()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(CONCURRENCY)])
+    return MESSAGES / (time.perf_counter() - start)
+
+
+async def main():
+    received = 0
+
+    async def handler(request):
+        nonlocal received
+        await request.read()
+        received += 1
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post("/connections", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/connections"
+
+    async def session_per_message():
+        async with ClientSession() as session:
+            async with session.post(url, data=MESSAGE) as response:
+                assert response.status == 200
+
+    pooled = HTTPTransport(limit=CONCURRENCY)
+    batched = HTTPTransport(limit=CONCURRENCY, batch_size=CONCURRENCY)
+    for name, post in [
+        ("session per message", session_per_message),
+        ("pooled", lambda: pooled.post(url, MESSAGE)),
+        (
+            f"pooled, batches of {CONCURRENCY}",
+            lambda: batched.post_batched(url, MESSAGE),
+        ),
+    ]:
+        received = 0
+        rate = await run(post)
+        print(f"{name:>24}: {rate:>10,.0f} messages/s ({received} requests)")
+
+    await pooled.stop()
+    await batched.stop()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""Throughput of message processing with debug logging disabled and enabled.
+
+Run with:
+    poetry run python -m benchmarks.log_level
+"""
+import asyncio
+import io
+import logging
+import time
+
+from ocpp.v16 import call, call_result
+from ocpp.v16.enums import Action
+
+from ocpp_asgi.app import ASGIApplication
+from ocpp_asgi.logging import log, set_trace_sampling
+from ocpp_asgi.router import HandlerContext, Router, Subprotocol
+from ocpp_asgi.utils import payload_to_message
+
+MESSAGES = 20_000
+
+router = Router(subprotocol=Subprotocol.ocpp16)
+
+
+@router.on(Action.Heartbeat)
+async def on_heartbeat(*, payload: call.HeartbeatPayload, context: HandlerContext):
+    return call_result.HeartbeatPayload(current_time="2022-01-01T00:00:00Z")
+
+
+async def throughput(app: ASGIApplication, message: str) -> float:
+    """Return processed messages per second over a single connection."""
+    scope = {"type": "websocket", "path": "/cs", "subprotocols": ["ocpp1.6"]}
+    inbound = asyncio.Queue()
+    done = asyncio.Event()
+    responses = 0
+
+    async def send(event):
+        nonlocal responses
+        if event["type"] == "websocket.send":
+            responses += 1
+            if responses == MESSAGES:
+                done.set()
+
+    await inbound.put({"type": "websocket.connect"})
+    for _ in range(MESSAGES):
+        inbound.put_nowait({"type": "websocket.receive", "text": message})
+    start = time.perf_counter()
+    task = asyncio.create_task(app(scope, inbound.get, send))
+    await done.wait()
+    elapsed = time.perf_counter() - start
+    await inbound.put({"type": "websocket.disconnect", "code": 1000})
+    await task
+    return MESSAGES / elapsed
+
+
+async def main():
+    app = ASGIApplication()
+    app.include_router(router)
+    message = payload_to_message(payload=call.HeartbeatPayload())
+
+    # Records are formatted into memory to leave terminal I/O out of numbers
+    handler = logging.StreamHandler(io.StringIO())
+    log.addHandler(handler)
+    log.propagate = False
+    level = log.level
+    try:
+        for name, log_level, sampling in [
+            ("debug off", logging.INFO, 1.0),
+            ("debug on", logging.DEBUG, 1.0),
+            ("debug on, 1% sampled", logging.DEBUG, 0.01),
+        ]:
+            log.setLevel(log_level)
+            set_trace_sampling(sampling)
+            rate = await throughput(app, message)
+            print(f"{name:>22}: {rate:,.0f} messages/s")
+    finally:
+        log.setLevel(level)
+        log.removeHandler(handler)
+        log.propagate = True
+        set_trace_sampling(1.0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+"""Outstanding outbound calls: asyncio.wait_for per call vs. PendingCalls.
+
+Run with:
+    poetry run python -m benchmarks.pending
+"""
+import asyncio
+import time
+
+from ocpp.messages import CallResult
+
+from ocpp_asgi.pending import PendingCalls
+
+CALLS = 20_000
+
+
+async def wait_for_queues():
+    queues = [asyncio.Queue() for _ in range(CALLS)]
+    tasks = [asyncio.ensure_future(asyncio.wait_for(q.get(), 30)) for q in queues]
+    await asyncio.sleep(0)
+    for i, queue in enumerate(queues):
+        queue.put_nowait(CallResult(str(i), {}))
+    await asyncio.gather(*tasks)
+
+
+async def pending_calls():
+    pending = PendingCalls()
+    futures = [pending.register(f"cs{i}", str(i), 30) for i in range(CALLS)]
+    await asyncio.sleep(0)
+    for i in range(CALLS):
+        pending.resolve(f"cs{i}", CallResult(str(i), {}))
+    await asyncio.gather(*futures)
+
+
+async def main():
+    for name, func in [
+        ("asyncio.wait_for(queue.get())", wait_for_queues),
+        ("PendingCalls", pending_calls),
+    ]:
+        start = time.perf_counter()
+        await func()
+        seconds = time.perf_counter() - start
+        print(f"{name:<32} {CALLS} calls {seconds / CALLS * 1e6:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
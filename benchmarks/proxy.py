@@ -0,0 +1,102 @@
+"""Throughput of WebSocketProxy forwarding to an HTTP Central System.
+
+Everything runs in memory: Charging Stations drive the proxy through ASGI
+receive/send callables and HTTPTransport posts http events directly to an
+HTTP-mode ASGIApplication after a simulated network round trip. Every station
+sends Heartbeats one at a time, waiting for each response. Reports messages per
+second and number of HTTP requests with and without batching.
+
+Run with:
+    poetry run python -m benchmarks.proxy
+"""
+import asyncio
+import time
+
+from ocpp.v16 import call
+
+from benchmarks.harness import Station, v16_router
+from ocpp_asgi.app import ASGIApplication, HTTPEventContext
+from ocpp_asgi.proxy import WebSocketProxy
+from ocpp_asgi.transport import HTTPTransport
+from ocpp_asgi.utils import payload_to_message
+
+STATIONS = 1000
+MESSAGES = 10  # per station
+ROUND_TRIP = 0.002  # simulated network round trip of an HTTP request, seconds
+
+
+class CentralSystemHTTP(ASGIApplication):
+    def http_parse_event(self, http_event: dict) -> HTTPEventContext:
+        return HTTPEventContext(
+            charging_station_id=http_event["requestContext"]["connection_id"],
+            subprotocols=http_event["requestContext"]["subprotocols"],
+            body=http_event["body"],
+        )
+
+
+class InMemoryTransport(HTTPTransport):
+    """HTTPTransport posting to an ASGI application in memory."""
+
+    def __init__(self, app: ASGIApplication, **kwargs):
+        super().__init__(**kwargs)
+        self.app = app
+        self.requests = 0
+
+    async def start(self):
+        pass
+
+    async def post(self, url: str, data: str) -> str:
+        self.requests += 1
+        await asyncio.sleep(ROUND_TRIP)
+        events = iter(
+            [
+                {"type": "http.request", "body": data.encode("utf-8")},
+                {"type": "http.disconnect"},
+            ]
+        )
+        body = []
+
+        async def receive():
+            return next(events)
+
+        async def send(event):
+            if event["type"] == "http.response.body":
+                body.append(event.get("body", b""))
+
+        await self.app({"type": "http", "path": "/"}, receive, send)
+        return b"".join(body).decode("utf-8")
+
+
+async def run(batch_size: int):
+    central_system = CentralSystemHTTP()
+    central_system.include_router(v16_router)
+    transport = InMemoryTransport(central_system, batch_size=batch_size)
+    proxy = WebSocketProxy(url="http://central-system", transport=transport)
+    message = payload_to_message(payload=call.HeartbeatPayload())
+
+    stations = [Station(proxy, f"cs-{i}", "ocpp1.6") for i in range(STATIONS)]
+    for station in stations:
+        await station.connect()
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[station.run([message] * MESSAGES, latencies) for station in stations]
+    )
+    seconds = time.perf_counter() - start
+    for station in stations:
+        await station.disconnect()
+    await proxy.stop()
+    print(
+        f"batch_size {batch_size:>3}: {len(latencies) / seconds:>10,.0f} messages/s "
+        f"{transport.requests:>6} HTTP requests"
+    )
+
+
+async def main():
+    print(f"{STATIONS} stations, {ROUND_TRIP * 1000:.0f} ms simulated round trip")
+    for batch_size in [1, 10, 100]:
+        await run(batch_size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""Routing a StatusNotification Call with and without ResponseCache.
+
+Run with:
+    poetry run python -m benchmarks.response_cache
+"""
+import asyncio
+import time
+
+from ocpp.v16 import call_result
+
+from ocpp_asgi.cache import ResponseCache
+from ocpp_asgi.messages import parse_message
+from ocpp_asgi.router import Router, RouterContext, Subprotocol
+
+NUMBER = 50_000
+
+FRAME = (
+    '[2,"1","StatusNotification",{"connectorId":1,"errorCode":"NoError",'
+    '"status":"Available","timestamp":"2022-01-01T00:00:00Z"}]'
+)
+
+
+def create_router(cache):
+    router = Router(subprotocol=Subprotocol.ocpp16)
+
+    @router.on("StatusNotification", cache=cache)
+    async def on_status_notification(*, payload, context):
+        return call_result.StatusNotificationPayload()
+
+    return router
+
+
+async def send(*, message: str, is_response: bool, context: RouterContext):
+    pass
+
+
+async def run(name: str, cache):
+    router = create_router(cache)
+    context = RouterContext(
+        scope={},
+        body=None,
+        subprotocol=router.subprotocol,
+        ocpp_adapter=None,
+        send=send,
+        charging_station_id="cs",
+    )
+    message = parse_message(FRAME)
+    start = time.perf_counter()
+    for _ in range(NUMBER):
+        await router.route_message(message=message, context=context)
+    seconds = time.perf_counter() - start
+    print(f"{name:<40} {seconds / NUMBER * 1e6:8.2f} us/message")
+
+
+async def main():
+    await run("no cache", None)
+    await run("ResponseCache", ResponseCache())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
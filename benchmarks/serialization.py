@@ -0,0 +1,65 @@
+"""Payload serialization: asdict/remove_nones/to_json vs. generated serializers.
+
+Covers every v1.6 and v2.0.1 payload class.
+
+Run with:
+    poetry run python -m benchmarks.serialization
+"""
+import timeit
+from dataclasses import asdict, fields
+
+from ocpp.charge_point import remove_nones, snake_to_camel_case
+from ocpp.messages import CallResult
+
+from ocpp_asgi.dispatch import payload_classes
+from ocpp_asgi.serialization import encode_call_result, payload_to_wire
+
+NUMBER = 200
+
+
+def sample(cls: type):
+    """Instantiate payload class with a value for every field."""
+    values = {}
+    for field in fields(cls):
+        if "Dict" in str(field.type):
+            values[field.name] = {"id_token": "value", "type": "Central"}
+        elif "List" in str(field.type):
+            values[field.name] = [{"start_period": i, "limit": 1.0} for i in range(5)]
+        else:
+            values[field.name] = "value"
+    return cls(**values)
+
+
+def current(payload) -> str:
+    camel_case_payload = snake_to_camel_case(remove_nones(asdict(payload)))
+    return CallResult("1", camel_case_payload).to_json()
+
+
+def generated(payload) -> str:
+    return encode_call_result("1", payload_to_wire(payload))
+
+
+def main():
+    for ocpp_version in ["1.6", "2.0.1"]:
+        payloads = [
+            sample(cls)
+            for classes in payload_classes(ocpp_version).values()
+            for cls in classes
+            if cls is not None
+        ]
+        for name, func in [
+            ("asdict/remove_nones/to_json", current),
+            ("serializer", generated),
+        ]:
+            seconds = timeit.timeit(
+                lambda: [func(payload) for payload in payloads], number=NUMBER
+            )
+            per_payload = seconds / (NUMBER * len(payloads)) * 1e6
+            print(
+                f"{ocpp_version:<6} {len(payloads):>4} classes {name:<28} "
+                f"{per_payload:8.2f} us/payload"
+            )
+
+
+if __name__ == "__main__":
+    main()
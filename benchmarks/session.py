@@ -0,0 +1,87 @@
+"""Allocations per received message with a long-lived connection session.
+
+Run with:
+    poetry run python -m benchmarks.session
+"""
+import asyncio
+import tracemalloc
+
+from ocpp.v16 import call, call_result
+from ocpp.v16.enums import Action
+
+from ocpp_asgi.app import ASGIApplication
+from ocpp_asgi.router import HandlerContext, Router, Subprotocol
+from ocpp_asgi.utils import payload_to_message
+
+MESSAGES = 10_000
+
+router = Router(subprotocol=Subprotocol.ocpp16)
+
+
+@router.on(Action.Heartbeat)
+async def on_heartbeat(*, payload: call.HeartbeatPayload, context: HandlerContext):
+    return call_result.HeartbeatPayload(current_time="2022-01-01T00:00:00Z")
+
+
+def allocations(func, count: int) -> float:
+    """Return average number of allocated memory blocks per invocation."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    retained = [func() for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del retained
+    return blocks / count
+
+
+async def main():
+    app = ASGIApplication()
+    app.include_router(router)
+    scope = {"type": "websocket", "path": "/cs", "subprotocols": ["ocpp1.6"]}
+    message = payload_to_message(payload=call.HeartbeatPayload())
+
+    # Cost of building a connection context, which used to happen on every event
+    per_context = allocations(
+        lambda: app._create_context(
+            scope=scope,
+            send=None,
+            charging_station_id="cs",
+            subprotocols=scope["subprotocols"],
+        ),
+        MESSAGES,
+    )
+    print(
+        f"Allocated blocks per context creation (removed per message): "
+        f"{per_context:.1f}"
+    )
+
+    inbound = asyncio.Queue()
+    done = asyncio.Event()
+    responses = 0
+
+    async def send(event):
+        nonlocal responses
+        if event["type"] == "websocket.send":
+            responses += 1
+            if responses == MESSAGES:
+                done.set()
+
+    await inbound.put({"type": "websocket.connect"})
+    for _ in range(MESSAGES):
+        inbound.put_nowait({"type": "websocket.receive", "text": message})
+    tracemalloc.start()
+    task = asyncio.create_task(app(scope, inbound.get, send))
+    await done.wait()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await inbound.put({"type": "websocket.disconnect", "code": 1000})
+    await task
+    print(
+        f"Processed {MESSAGES} messages, retained memory {current} bytes, "
+        f"peak {peak} bytes"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""Schema validation: ocpp.messages.validate_payload vs. compiled validators.
+
+Run with:
+    poetry run python -m benchmarks.validation
+"""
+import timeit
+
+from ocpp.messages import Call, CallResult, validate_payload
+
+from ocpp_asgi.validation import (
+    ValidatorCache,
+    fastjsonschema_backend,
+    jsonschema_backend,
+)
+
+NUMBER = 10_000
+
+messages = [
+    (
+        "1.6",
+        Call(
+            "1",
+            "BootNotification",
+            {"chargePointModel": "model", "chargePointVendor": "vendor"},
+        ),
+    ),
+    ("1.6", CallResult("1", {"currentTime": "2022-01-01T00:00:00Z"}, "Heartbeat")),
+    (
+        "1.6",
+        Call(
+            "1",
+            "MeterValues",
+            {
+                "connectorId": 1,
+                "transactionId": 1,
+                "meterValue": [
+                    {
+                        "timestamp": "2022-01-01T00:00:00Z",
+                        "sampledValue": [
+                            {"value": str(i), "measurand": "Voltage", "phase": "L1"}
+                            for i in range(10)
+                        ],
+                    }
+                ],
+            },
+        ),
+    ),
+    (
+        "2.0.1",
+        Call(
+            "1",
+            "TransactionEvent",
+            {
+                "eventType": "Updated",
+                "timestamp": "2022-01-01T00:00:00Z",
+                "triggerReason": "MeterValuePeriodic",
+                "seqNo": 1,
+                "transactionInfo": {"transactionId": "1"},
+                "meterValue": [
+                    {
+                        "timestamp": "2022-01-01T00:00:00Z",
+                        "sampledValue": [{"value": 1.0}],
+                    }
+                ],
+            },
+        ),
+    ),
+]
+
+
+def run(name: str, validate):
+    seconds = timeit.timeit(
+        lambda: [validate(message, version) for version, message in messages],
+        number=NUMBER,
+    )
+    per_message = seconds / (NUMBER * len(messages)) * 1e6
+    print(f"{name:<40} {per_message:8.2f} us/message")
+
+
+def main():
+    run("ocpp.messages.validate_payload", validate_payload)
+    run(
+        "ValidatorCache(jsonschema_backend)",
+        ValidatorCache(jsonschema_backend).validate,
+    )
+    try:
+        import fastjsonschema  # noqa: F401
+    except ImportError:
+        print("fastjsonschema not installed, skipping fastjsonschema_backend")
+        return
+    run(
+        "ValidatorCache(fastjsonschema_backend)",
+        ValidatorCache(fastjsonschema_backend).validate,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,8 @@ from dotenv import load_dotenv
 from fastapi import Body, Depends, FastAPI, status
 from loguru import logger
 
-from examples.central_system.misc.channel import Envelope, PubSub
+from examples.central_system.misc.channel import Envelope, redis_channel
+from ocpp_asgi.channel import Channel
 
 load_dotenv()
 app = FastAPI(
@@ -13,11 +14,11 @@ app = FastAPI(
 )
 
 PUBSUB_ID = os.getenv("CENTRAL_SYSTEM_PUPSUB_ID")
-__pubsub = PubSub()
+__channel = redis_channel()
 
 
-def pubsub_instance() -> PubSub:
-    return __pubsub
+def channel_instance() -> Channel:
+    return __channel
 
 
 @app.post(
@@ -25,11 +26,13 @@ def pubsub_instance() -> PubSub:
     status_code=status.HTTP_200_OK,
 )
 async def post_connections(
-    connection_id: str, payload: str = Body(), pubsub: PubSub = Depends(pubsub_instance)
+    connection_id: str,
+    payload: str = Body(),
+    channel: Channel = Depends(channel_instance),
 ):
     logger.debug(f"{payload=}")
     envelope: Envelope = Envelope(charging_station_id=connection_id, message=payload)
-    await pubsub.publish(PUBSUB_ID, envelope.json())
+    await channel.publish(PUBSUB_ID, envelope.json())
     return None
 
 
@@ -4,8 +4,9 @@ from typing import Any
 import aiohttp
 from dotenv import load_dotenv
 
-from examples.central_system.misc.channel import Pipe
+from examples.central_system.misc.channel import redis_channel
 from ocpp_asgi.app import OCPPVersion
+from ocpp_asgi.channel import Channel
 from ocpp_asgi.utils import message_to_payload, payload_to_message
 
 load_dotenv()
@@ -14,7 +15,7 @@ callback_api = os.getenv("CENTRAL_SYSTEM_CALLBACK_API_ENDPOINT_URL")
 port = os.getenv("CENTRAL_SYSTEM_CALLBACK_API_ENDPOINT_PORT")
 base_url = f"{callback_api}:{port}/connections"
 
-pipe: Pipe = Pipe()
+channel: Channel = redis_channel()
 
 
 async def post_to_connection(
@@ -30,8 +31,8 @@ async def post_to_connection(
             if resp.status != 200:
                 raise Exception("Non-200 response")
 
-    # 2) Wait for response via Pipe (redis)
-    response_body = await pipe.listen(charging_station_id)
+    # 2) Wait for response via channel (redis)
+    response_body = await channel.wait(charging_station_id)
 
     # 3) Construct response payload, in this case just to OCPP response payload as JSON
     response = message_to_payload(
@@ -1,11 +1,10 @@
 import os
 
 import uvicorn
-from aiohttp import ClientSession
 from dotenv import load_dotenv
 from loguru import logger
 
-from examples.central_system.misc.channel import Pipe
+from examples.central_system.misc.channel import redis_channel
 from examples.central_system.routers.v16.provisioning_router import (
     router as v16_provisioning_router,
 )
@@ -13,6 +12,9 @@ from examples.central_system.routers.v201.provisioning_router import (
     router as v201_provisioning_router,
 )
 from ocpp_asgi.app import ASGIApplication, HTTPEventContext, RouterContext
+from ocpp_asgi.channel import Channel
+from ocpp_asgi.messages import Message
+from ocpp_asgi.transport import HTTPTransport
 
 load_dotenv()
 
@@ -27,9 +29,11 @@ class CentralSystemHTTP(ASGIApplication):
     Note that we don't handle on_connect, and on_disconnect events here at all
     """
 
-    def __init__(self, pipe: Pipe):
-        super().__init__()
-        self.pipe: Pipe = pipe
+    def __init__(self, channel: Channel):
+        # Connections to callback api are pooled and reused between messages
+        super().__init__(http_transport=HTTPTransport())
+        # For sending Charging Stations responses to client api
+        self.channel: Channel = channel
 
     def http_parse_event(self, http_event: dict) -> HTTPEventContext:
         return HTTPEventContext(
@@ -43,16 +47,14 @@ class CentralSystemHTTP(ASGIApplication):
         # send the response payload back to client.
 
         url = f"{base_url}/{context.charging_station_id}"
-        async with ClientSession() as session:
-            async with session.post(url, data=message) as resp:
-                if resp.status != 200:
-                    raise ValueError("Failure sending message from server to client.")
+        await self.http_transport.post(url, message)
 
-    async def consume_event(self, *, connection_id: str, message: str) -> str or None:
+    async def consume_event(
+        self, *, connection_id: str, message: Message
+    ) -> Message or None:
         try:
-            value = await self.pipe.get(f"listen:{connection_id}")
-            if value is not None:
-                await self.pipe.send(connection_id, message)
+            if await self.channel.is_waiting(connection_id):
+                await self.channel.publish(connection_id, message.to_json())
                 return None
         except Exception as e:
             logger.exception(e)
@@ -60,8 +62,7 @@ class CentralSystemHTTP(ASGIApplication):
 
 
 if __name__ == "__main__":
-    pipe = Pipe()  # for sending Charging Stations responses to client api
-    central_system = CentralSystemHTTP(pipe)
+    central_system = CentralSystemHTTP(redis_channel())
     central_system.include_router(v16_provisioning_router)
     central_system.include_router(v201_provisioning_router)
     port = int(os.getenv("CENTRAL_SYSTEM_HTTP_ENDPOINT_PORT"))
@@ -1,12 +1,11 @@
 import asyncio
 import os
-from typing import TypedDict
 
 import uvicorn
 from dotenv import load_dotenv
 from loguru import logger
 
-from examples.central_system.misc.channel import Envelope, Pipe, PubSub
+from examples.central_system.misc.channel import Envelope, redis_channel
 from examples.central_system.routers.v16.provisioning_router import (
     router as v16_provisioning_router,
 )
@@ -14,23 +13,20 @@ from examples.central_system.routers.v201.provisioning_router import (
     router as v201_provisioning_router,
 )
 from ocpp_asgi.app import ASGIApplication, RouterContext, Subprotocol
+from ocpp_asgi.channel import Channel
+from ocpp_asgi.messages import Message
 
 load_dotenv()
 
 
-class ContextDict(TypedDict):
-    charging_station_id: str
-    routerContext: RouterContext
-
-
 class CentralSystem(ASGIApplication):
     """Central System is collection of routers."""
 
-    def __init__(self, pubsub: PubSub, pipe: Pipe):
+    def __init__(self, channel: Channel):
         super().__init__()
-        self.contexts: ContextDict = {}
-        self.pubsub: PubSub = pubsub
-        self.pipe: Pipe = pipe
+        # For receiving requests from client api to Charging Stations and for
+        # sending Charging Stations responses to client api
+        self.channel: Channel = channel
 
     async def on_startup(self):
         logger.debug("(CentralSystem) Startup.")
@@ -38,6 +34,7 @@ class CentralSystem(ASGIApplication):
 
     async def on_shutdown(self):
         logger.debug("(CentralSystem) Shutdown.")
+        await self.channel.close()
 
     async def on_connect(self, context: RouterContext) -> bool:
         charging_station_id = context.charging_station_id
@@ -45,11 +42,11 @@ class CentralSystem(ASGIApplication):
         logger.debug(
             f"(CentralSystem) {charging_station_id=} {subprotocol=} connected."  # noqa: E501
         )
-        # You can inspect context.scope["headers"] and perform e.g. basic authentication
+        # You can inspect context.headers and perform e.g. basic authentication
         allow_connection = True
 
         if allow_connection:
-            self.contexts[charging_station_id] = context
+            # Accepted connection is added to self.connections registry
             # Create task for running any logic that happens during connection set up
             # The reasoning is that response from on_connect is quick and then allows
             # processing to continue in central system
@@ -62,7 +59,6 @@ class CentralSystem(ASGIApplication):
         logger.debug(
             f"(CentralSystem) {charging_station_id=} {subprotocol=} disconnected. Reason code: {code}"  # noqa: E501
         )
-        del self.contexts[charging_station_id]
 
     async def after_on_connect(self, context: RouterContext):
         # Put any connection set up related logic here
@@ -71,12 +67,12 @@ class CentralSystem(ASGIApplication):
     # Functions for handling client api originated requests
 
     async def receive_post_connections(self):
-        while True:
+        pubsub_id = os.getenv("CENTRAL_SYSTEM_PUPSUB_ID")
+        async for value in self.channel.subscribe(pubsub_id):
             try:
-                value = await pubsub.subscribe(os.getenv("CENTRAL_SYSTEM_PUPSUB_ID"))
                 envelope: Envelope = Envelope.parse_raw(value)
-                if envelope.charging_station_id in self.contexts:
-                    context: RouterContext = self.contexts[envelope.charging_station_id]
+                context = self.connections.get(envelope.charging_station_id)
+                if context is not None:
                     logger.debug(
                         f"(Central System) API Request {envelope.charging_station_id=} {envelope.message=}"  # noqa:E501
                     )
@@ -86,11 +82,12 @@ class CentralSystem(ASGIApplication):
             except Exception as e:
                 logger.error(e)
 
-    async def consume_event(self, *, connection_id: str, message: str) -> str or None:
+    async def consume_event(
+        self, *, connection_id: str, message: Message
+    ) -> Message or None:
         try:
-            value = await self.pipe.get(f"listen:{connection_id}")
-            if value is not None:
-                await self.pipe.send(connection_id, message)
+            if await self.channel.is_waiting(connection_id):
+                await self.channel.publish(connection_id, message.to_json())
                 return None
         except Exception as e:
             logger.exception(e)
@@ -98,9 +95,7 @@ class CentralSystem(ASGIApplication):
 
 
 if __name__ == "__main__":
-    pubsub = PubSub()  # for receiving requests from client api to Charging Stations
-    pipe = Pipe()  # for sending Charging Stations responses to client api
-    central_system = CentralSystem(pubsub=pubsub, pipe=pipe)
+    central_system = CentralSystem(channel=redis_channel())
     central_system.include_router(v16_provisioning_router)
     central_system.include_router(v201_provisioning_router)
     port = int(os.getenv("CENTRAL_SYSTEM_ENDPOINT_PORT"))
@@ -1,9 +1,22 @@
 import asyncio
-import json
+import functools
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Awaitable, Callable, List, TypedDict
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    TypedDict,
+    Union,
+)
 
+from ocpp.exceptions import NotImplementedError as OCPPNotImplementedError
+from ocpp.exceptions import OCPPError
 from ocpp.messages import MessageType
 from ocpp.v16 import call as v16_call
 from ocpp.v16 import call_result as v16_call_result
@@ -23,8 +36,30 @@ from ocpp_asgi.asgi import (
     Scope,
     Send,
 )
-from ocpp_asgi.logging import log
-from ocpp_asgi.router import OCPPAdapter, Router, RouterContext, Subprotocol
+from ocpp_asgi.bus import MessageBus
+from ocpp_asgi.codec import JSONCodec, get_codec
+from ocpp_asgi.connections import ConnectionRegistry
+from ocpp_asgi.executor import ConnectionDispatcher, DispatchPolicy
+from ocpp_asgi.heartbeat import HeartbeatResponder
+from ocpp_asgi.instrumentation import (
+    Counter,
+    Instrumentation,
+    Instruments,
+    MetricsRegistry,
+    Stage,
+    null_timer,
+)
+from ocpp_asgi.logging import log, trace, trace_message
+from ocpp_asgi.messages import Message, parse_message
+from ocpp_asgi.outbound import Priority
+from ocpp_asgi.router import (
+    FanOutResult,
+    OCPPAdapter,
+    Router,
+    RouterContext,
+    Subprotocol,
+)
+from ocpp_asgi.transport import HTTPTransport
 
 
 class OCPPVersion(str, Enum):
@@ -50,21 +85,30 @@ ocpp_adapters = {
 
 @dataclass
 class HTTPEventContext:
+    """OCPP-J frame of a single Charging Station parsed from http event.
+
+    HTTP request body carries either a single http event or a JSON array of
+    http events, see ASGIApplication.http_parse_event and http_parse_events.
+    """
+
     charging_station_id: str
     subprotocols: List[str]
-    body: dict
+    body: Union[str, List]  # OCPP-J frame either serialized or as decoded JSON array
 
 
 @dataclass
 class SendAdapter:
+    """Sends messages of a connection through ASGI send or HTTP back-channel."""
+
+    __slots__ = ("send", "http_from_server_to_client", "websocket")
+
     send: Awaitable[Any]
-    on_receive: Callable[[str, RouterContext], Awaitable[None]]
     http_from_server_to_client: Callable[[str, RouterContext], Awaitable[str]]
-    scope: dict
+    websocket: bool  # True for websocket and False for http ASGI scope
 
     async def __call__(self, message: str, is_response: bool, context: RouterContext):
         if is_response:
-            if self.scope["type"] == ASGIScope.websocket:
+            if self.websocket:
                 await self.send(
                     {"type": ASGIWebSocketEvent.send.value, "text": message}
                 )
@@ -79,24 +123,123 @@ class SendAdapter:
                     }
                 )
         else:
-            if self.scope["type"] == ASGIScope.websocket:
+            if self.websocket:
                 await self.send(
                     {"type": ASGIWebSocketEvent.send.value, "text": message}
                 )
             else:
-                log.debug(f"<- HTTP: {context.charging_station_id=} {message=}")
+                trace_message(
+                    "<- HTTP",
+                    charging_station_id=context.charging_station_id,
+                    message=message,
+                )
                 await self.http_from_server_to_client(message=message, context=context)
 
 
+class HTTPBatchResponse:
+    """Collects responses to a batch of http events in order of the events."""
+
+    __slots__ = ("bodies",)
+
+    def __init__(self, size: int):
+        self.bodies: List[Optional[bytes]] = [None] * size
+
+    def sender(self, index: int) -> Send:
+        """Return ASGI send which records the response body of event at index."""
+
+        async def send(event: dict):
+            if event["type"] == ASGIHTTPEvent.response_body.value:
+                self.bodies[index] = event.get("body")
+
+        return send
+
+    def render(self, codec: JSONCodec) -> bytes:
+        return codec.dumps(
+            [body.decode("utf-8") if body else None for body in self.bodies]
+        ).encode("utf-8")
+
+
 class ASGIApplication:
     """ASGI Application to handle event based message routing."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        *,
+        codec: Optional[Union[str, JSONCodec]] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        metrics_path: str = "/metrics",
+        bus: Optional[MessageBus] = None,
+        http_transport: Optional[HTTPTransport] = None,
+        dispatch_policy: DispatchPolicy = DispatchPolicy.inline,
+        max_in_flight_calls: int = 8,
+        heartbeat: Optional[HeartbeatResponder] = None,
+    ):
+        """Initialize ASGIApplication instance.
+
+        Args:
+            codec (JSONCodec): JSON codec or its name, see get_codec. Defaults to
+                standard library json. Use "auto" for the fastest installed codec.
+            metrics (MetricsRegistry): Registry collecting timings and counters of
+                the application and all its routers. Served in Prometheus text
+                format by HTTP GET to metrics_path.
+            metrics_path (str): Path of the metrics endpoint.
+            bus (MessageBus): Routes calls to Charging Stations connected to
+                other workers in a multi-process deployment.
+            http_transport (HTTPTransport): Pooled HTTP client for sending
+                messages to WebSocket proxy in http_from_server_to_client.
+                Started on lifespan startup and stopped on lifespan shutdown.
+            dispatch_policy (DispatchPolicy): How Calls received from a websocket
+                connection are handled. With inline (default) the next frame is
+                received only after the Call has been handled. With fifo and
+                per_action Calls are handled in the background, see
+                ConnectionDispatcher. CallResults and CallErrors are always
+                delivered immediately.
+            max_in_flight_calls (int): Maximum number of Calls of a connection
+                queued or being handled, unless dispatch_policy is inline.
+            heartbeat (HeartbeatResponder): Respond to Heartbeat Calls of all
+                subprotocols without routing them. Heartbeat handlers of routers
+                are not invoked.
+        """
         self.routers: TypedDict[Subprotocol, Router] = {}
+        self.codec: JSONCodec = get_codec(codec)
+        # Instrumentation hooks shared with all routers
+        self.instrumentation: Optional[Instruments] = None
+        self.metrics = metrics
+        self.metrics_path = metrics_path
+        # Live websocket connections, maintained on connect and disconnect
+        self.connections = ConnectionRegistry()
+        self.bus = bus
+        self.http_transport = http_transport
+        self.dispatch_policy = DispatchPolicy(dispatch_policy)
+        self.max_in_flight_calls = max_in_flight_calls
+        self.heartbeat = heartbeat
+        if metrics is not None:
+            self.add_instrumentation(metrics)
+            metrics.add_gauge(
+                "outbound_queued_calls",
+                "Calls waiting in outbound queues of Charging Stations.",
+                self.outbound_queue_depth,
+            )
 
     def include_router(self, router: Router):
+        if router.inherit_codec:
+            router.codec = self.codec
+        if self.instrumentation is not None:
+            for hook in self.instrumentation.hooks:
+                router.add_instrumentation(hook)
+        # Resolve handlers, payload classes and validators upfront
+        router.build_dispatch_table()
         self.routers[router.subprotocol] = router
 
+    def add_instrumentation(self, hook: Instrumentation):
+        """Register hook receiving timings and counts of the application and
+        all its routers, see Instrumentation."""
+        if self.instrumentation is None:
+            self.instrumentation = Instruments()
+        self.instrumentation.add(hook)
+        for router in self.routers.values():
+            router.add_instrumentation(hook)
+
     async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """ASGI signature handler.
 
@@ -116,91 +259,311 @@ class ASGIApplication:
     async def lifespan_handler(
         self, scope: Scope, receive: Receive, send: Send
     ) -> None:
-        event = await receive()
-        if event["type"] == ASGILifeSpanEvent.startup.value:
-            try:
-                await self.on_startup()
-                await send({"type": ASGILifeSpanStartup.complete.value})
-            except Exception:
-                await send({"type", ASGILifeSpanStartup.failed.value})
-        elif event["type"] == ASGILifeSpanEvent.shutdown.value:
-            try:
-                await self.on_shutdown()
-                await send({"type": ASGILifeSpanShutDown.complete.value})
-            except Exception:
-                await send({"type", ASGILifeSpanShutDown.failed.value})
-
-    async def handler(self, scope: Scope, receive: Receive, send: Send):
-        log.debug(f"{scope=}")
+        # Lifespan scope receives both startup and shutdown events
         while True:
             event = await receive()
-            log.debug(f"{event=}")
-            context: RouterContext = self._create_context(
-                scope=scope, event=event, send=send
-            )
-            # WebSocket
-            if event["type"] == ASGIWebSocketEvent.receive:
-                # Offer "CallResult" and "CallError" to client api handler
-                message_type = int(context.body[1])
-                if message_type != MessageType.Call:
-                    event = await self.consume_event(
-                        connection_id=context.charging_station_id, message=context.body
-                    )
-                    if event is None:
+            if event["type"] == ASGILifeSpanEvent.startup.value:
+                try:
+                    if self.bus is not None:
+                        await self.bus.start(self)
+                    if self.http_transport is not None:
+                        await self.http_transport.start()
+                    await self.on_startup()
+                    await send({"type": ASGILifeSpanStartup.complete.value})
+                except Exception:
+                    await send({"type": ASGILifeSpanStartup.failed.value})
+            elif event["type"] == ASGILifeSpanEvent.shutdown.value:
+                try:
+                    await self.on_shutdown()
+                    await self.drain()
+                    if self.bus is not None:
+                        await self.bus.stop()
+                    if self.http_transport is not None:
+                        await self.http_transport.stop()
+                    await send({"type": ASGILifeSpanShutDown.complete.value})
+                except Exception:
+                    await send({"type": ASGILifeSpanShutDown.failed.value})
+                return
+
+    async def handler(self, scope: Scope, receive: Receive, send: Send):
+        trace("scope", scope=scope)
+        if scope["type"] == ASGIScope.websocket:
+            await self.websocket_handler(scope, receive, send)
+        elif self.metrics is not None and scope.get("path") == self.metrics_path:
+            await self.metrics_handler(scope, receive, send)
+        else:
+            await self.http_handler(scope, receive, send)
+
+    async def websocket_handler(self, scope: Scope, receive: Receive, send: Send):
+        # Context is created once per connection on "websocket.connect" and reused
+        # for every "websocket.receive". Only the message body changes per event.
+        context: RouterContext = None
+        dispatcher: Optional[ConnectionDispatcher] = None
+        try:
+            while True:
+                event = await receive()
+                trace_message("event", event=event)
+                if event["type"] == ASGIWebSocketEvent.receive:
+                    text = event.get("text")
+                    context.body = text if text is not None else event.get("bytes")
+                    message = self._parse_message(context)
+                    if message is None:
                         continue
-                await self.on_receive(message=context.body, context=context)
-            elif event["type"] == ASGIWebSocketEvent.connect:
-                response = await self.on_connect(context)
-                if response:
-                    await send(
-                        {"type": "websocket.accept", "subprotocol": context.subprotocol}
+                    if await self._respond_heartbeat(message, context):
+                        context.body = event = text = message = None
+                        continue
+                    # Offer "CallResult" and "CallError" to client api handler
+                    if message.message_type_id != MessageType.Call:
+                        message = await self.consume_event(
+                            connection_id=context.charging_station_id, message=message
+                        )
+                        if message is None:
+                            continue
+                    if (
+                        dispatcher is None
+                        or message.message_type_id != MessageType.Call
+                    ):
+                        await self.on_receive(message=message, context=context)
+                    else:
+                        await dispatcher.submit(
+                            message.action,
+                            functools.partial(
+                                self.on_receive, message=message, context=context
+                            ),
+                        )
+                    # Don't retain the last message while connection is idle
+                    context.body = event = text = message = None
+                elif event["type"] == ASGIWebSocketEvent.connect:
+                    context = self._create_context(
+                        scope=scope,
+                        send=send,
+                        charging_station_id=scope["path"].strip("/"),
+                        subprotocols=scope.get("subprotocols", []),
                     )
-                else:
-                    await send({"type": "websocket.reject"})
-            elif event["type"] == ASGIWebSocketEvent.disconnect:
-                await self.on_disconnect(
-                    charging_station_id=context.charging_station_id,
-                    subprotocol=context.subprotocol,
-                    code=event["code"],
-                )
-                # break
-
-            # HTTP
-            elif event["type"] == ASGIHTTPEvent.request:
-                if context is None:
-                    await send(
-                        {"type": ASGIHTTPEvent.response_start.value, "status": 400}
+                    response = context is not None and await self.on_connect(context)
+                    if response:
+                        if self.dispatch_policy != DispatchPolicy.inline:
+                            dispatcher = ConnectionDispatcher(
+                                self.dispatch_policy, self.max_in_flight_calls
+                            )
+                        self.connections.add(context)
+                        if self.bus is not None:
+                            await self.bus.claim(context)
+                        await send(
+                            {
+                                "type": ASGIWebSocketEvent.accept.value,
+                                "subprotocol": context.subprotocol,
+                            }
+                        )
+                    else:
+                        await send({"type": ASGIWebSocketEvent.close.value})
+                        break
+                elif event["type"] == ASGIWebSocketEvent.disconnect:
+                    if context is None:
+                        break
+                    # Fail calls which would never receive response unless the
+                    # Charging Station has already reconnected
+                    router = self.routers.get(context.subprotocol)
+                    if context._outbound is not None:
+                        context._outbound.close()
+                    if self.connections.remove(context):
+                        if router is not None:
+                            router.pending_calls.cancel_connection(
+                                context.charging_station_id
+                            )
+                        if self.bus is not None:
+                            await self.bus.release(context)
+                    await self.on_disconnect(
+                        charging_station_id=context.charging_station_id,
+                        subprotocol=context.subprotocol,
+                        code=event["code"],
                     )
-                    await send({"type": ASGIHTTPEvent.response_body.value})
                     break
-                # TODO: handle more_body case
-                message_type = int(context.body[1])
-                if message_type != MessageType.Call:
-                    # Offer "CallResult" and "CallError" to client api handler
-                    event = await self.consume_event(
-                        connection_id=context.charging_station_id, message=context.body
-                    )
-                    # For "CallResult" and "CallError" send empty response back
-                    # as ocpp protocol doesn't mandate response for these message types
-                    # For "Call" response will be sent by router
+        finally:
+            if dispatcher is not None:
+                await dispatcher.close()
+            if context is not None and context._outbound is not None:
+                context._outbound.close()
+            if context is not None and self.connections.remove(context):
+                if self.bus is not None:
+                    await self.bus.release(context)
+
+    async def http_handler(self, scope: Scope, receive: Receive, send: Send):
+        while True:
+            event = await receive()
+            trace_message("event", event=event)
+            if event["type"] == ASGIHTTPEvent.request:
+                body = await self._read_body(event, receive)
+                if body is None:
+                    break
+                http_event = self.codec.loads(body) if len(body) > 0 else None
+                if isinstance(http_event, list):
+                    await self.http_batch_handler(scope, http_event, send)
+                    continue
+                # Every HTTP request may originate from a different connection
+                # so context is created per request.
+                http_event_context: HTTPEventContext = None
+                if http_event is not None:
+                    http_event_context = self.http_parse_event(http_event)
+                if not await self._http_process(scope, http_event_context, send):
                     await send(
-                        {"type": ASGIHTTPEvent.response_start.value, "status": 200}
+                        {"type": ASGIHTTPEvent.response_start.value, "status": 400}
                     )
                     await send({"type": ASGIHTTPEvent.response_body.value})
-                    if event is None:
-                        continue
-                await self.on_receive(message=context.body, context=context)
+                    break
             elif event["type"] == ASGIHTTPEvent.disconnect.value:
                 break
 
-    async def on_receive(self, *, message: str, context: RouterContext):
+    async def http_batch_handler(self, scope: Scope, http_events: list, send: Send):
+        """Handle batch of http events received in a single HTTP request.
+
+        Events of the same Charging Station are processed in order and events of
+        different Charging Stations concurrently. Response body is a JSON array
+        with an element per event: the response frame as string or null when
+        the event has no response or couldn't be processed.
+        """
+        contexts = self.http_parse_events(http_events)
+        response = HTTPBatchResponse(len(contexts))
+        indexes: Dict[str, List[int]] = {}
+        for index, http_event_context in enumerate(contexts):
+            indexes.setdefault(http_event_context.charging_station_id, []).append(index)
+
+        async def process(station_indexes: List[int]):
+            for index in station_indexes:
+                if not await self._http_process(
+                    scope, contexts[index], response.sender(index)
+                ):
+                    log.error("Unable to process batched http event #%d", index)
+
+        await asyncio.gather(*[process(i) for i in indexes.values()])
+        await send(
+            {
+                "type": ASGIHTTPEvent.response_start.value,
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send(
+            {
+                "type": ASGIHTTPEvent.response_body.value,
+                "body": response.render(self.codec),
+            }
+        )
+
+    async def metrics_handler(self, scope: Scope, receive: Receive, send: Send):
+        """Respond with metrics registry in Prometheus text exposition format."""
+        event = await receive()
+        while event["type"] == ASGIHTTPEvent.request and event.get("more_body"):
+            event = await receive()
+        await send(
+            {
+                "type": ASGIHTTPEvent.response_start.value,
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; version=0.0.4; charset=utf-8")
+                ],
+            }
+        )
+        await send(
+            {
+                "type": ASGIHTTPEvent.response_body.value,
+                "body": self.metrics.render().encode("utf-8"),
+            }
+        )
+
+    async def call(
+        self,
+        *,
+        charging_station_id: str,
+        message: Any,
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Send message to a connected Charging Station and return its response.
+
+        Message goes through outbound queue of the Charging Station with given
+        priority and queue timeout, see Router.enqueue_call. With a message bus
+        the Charging Station may be connected to any worker. Raises
+        ConnectionError if the Charging Station isn't connected.
+        """
+        context = self.connections.get(charging_station_id)
+        if context is None and self.bus is not None:
+            return await self.bus.call(
+                charging_station_id=charging_station_id,
+                message=message,
+                priority=priority,
+                timeout=timeout,
+            )
+        if context is None:
+            raise ConnectionError(f"{charging_station_id=} is not connected")
+        router: Router = self.routers[context.subprotocol]
+        return await router.enqueue_call(
+            message=message, context=context, priority=priority, timeout=timeout
+        )
+
+    def outbound_queue_depth(self) -> int:
+        """Return number of calls waiting in outbound queues of connections."""
+        return sum(
+            len(context._outbound)
+            for context in self.connections.snapshot()
+            if context._outbound is not None
+        )
+
+    async def fan_out(
+        self,
+        *,
+        message: Any,
+        contexts: Optional[Iterable[RouterContext]] = None,
+        concurrency: int = 100,
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[FanOutResult]:
+        """Send the same message to many Charging Stations.
+
+        Contexts are grouped by subprotocol and each group is sent by its router,
+        see Router.fan_out. Results are yielded in order of completion. Charging
+        Stations whose ocpp version doesn't match message get an error result.
+        By default message is sent to all connected Charging Stations.
+        """
+        if contexts is None:
+            contexts = self.connections.snapshot()
+        groups: Dict[str, List[RouterContext]] = {}
+        for context in contexts:
+            groups.setdefault(context.subprotocol, []).append(context)
+        for subprotocol, group in groups.items():
+            try:
+                router: Router = self.routers[subprotocol]
+                async for result in router.fan_out(
+                    message=message,
+                    contexts=group,
+                    concurrency=concurrency,
+                    priority=priority,
+                    timeout=timeout,
+                ):
+                    yield result
+            except (KeyError, OCPPNotImplementedError) as e:
+                for context in group:
+                    yield FanOutResult(
+                        charging_station_id=context.charging_station_id, error=e
+                    )
+
+    async def on_receive(self, *, message: Message, context: RouterContext):
         router: Router = self.routers[context.subprotocol]
         try:
             await router.route_message(message=message, context=context)
         except Exception as e:
-            log.error(f"Failure when processing message on_receive: {e=}")
+            log.error("Failure when processing message on_receive: %r", e)
             pass
 
+    async def drain(self, timeout: Optional[float] = 30):
+        """Wait for queued "after"-handlers of all routers to finish.
+
+        Invoked on ASGI lifespan shutdown after on_shutdown.
+        """
+        await asyncio.gather(
+            *[router.after_handlers.drain(timeout) for router in self.routers.values()]
+        )
+
     # Handlers to override in subclass
 
     async def on_startup(self):
@@ -234,50 +597,150 @@ class ASGIApplication:
         """
         raise NotImplementedError
 
+    def http_parse_events(self, http_events: list) -> List[HTTPEventContext]:
+        """Parse contexts and contents of a batch of http events.
+
+        Relevant only for HTTP central system.
+
+        Body of a batched HTTP request is a JSON array of http events, which may
+        carry frames of many Charging Stations. By default every element is
+        parsed with http_parse_event.
+        """
+        return [self.http_parse_event(http_event) for http_event in http_events]
+
     async def http_from_server_to_client(self, message: str, context: RouterContext):
         """Handle sending message from http backend towards WebSocket proxy.
 
         Relevant only for HTTP central system.
 
         HTTP backend needs to send Call type messages to WebSocket proxy.
-        This is application specific adaptation how this sending is done.
+        This is application specific adaptation how this sending is done,
+        typically a POST with self.http_transport.
         """
         raise NotImplementedError
 
-    async def consume_event(self, *, connection_id: str, message: str) -> str or None:
+    async def consume_event(
+        self, *, connection_id: str, message: Message
+    ) -> Message or None:
         """Consume event and short-circuit asgi application event handling.
 
-        Relevant only for HTTP central system.
-
         HTTP backend may consume event in case of it's a response sent from client api.
         In this case event is not delivered to router handler.
-        @return None is event was consumed, original event otherwise.
+        Only "CallResult" and "CallError" messages are offered for consuming.
+        @return None is event was consumed, original message otherwise.
         """
         return message
 
     # Private
 
-    def _create_context(
-        self, *, scope: Scope, event: dict, send: Send
-    ) -> RouterContext or None:
-        queue = asyncio.Queue()
-        call_lock = asyncio.Lock()
-        subprotocols: list[str] = []
-        if scope["type"] == ASGIScope.websocket:
-            charging_station_id = scope["path"].strip("/")
-            subprotocols = scope["subprotocols"]
-            body = event["text"] if "text" in event else None
-        else:  # scope["type"] == ASGIScope.http:
-            if event["type"] == ASGIHTTPEvent.disconnect:
-                # Don't bother creating context for disconnect as it's not used
+    async def _read_body(self, event: dict, receive: Receive) -> Optional[bytes]:
+        """Return complete body of HTTP request sent in one or many chunks.
+
+        @return None if client disconnected before the body was complete.
+        """
+        body = event.get("body", b"")
+        if not event.get("more_body", False):
+            return body
+        chunks = [body]
+        while event.get("more_body", False):
+            event = await receive()
+            if event["type"] != ASGIHTTPEvent.request:
                 return None
-            if len(event["body"]) > 0:
-                http_event = json.loads(event["body"])
-                http_event_context: HTTPEventContext = self.http_parse_event(http_event)
-                charging_station_id = http_event_context.charging_station_id
-                subprotocols = http_event_context.subprotocols
-                body = http_event_context.body
+            chunks.append(event.get("body", b""))
+        return b"".join(chunks)
+
+    async def _http_process(
+        self,
+        scope: Scope,
+        http_event_context: Optional[HTTPEventContext],
+        send: Send,
+    ) -> bool:
+        """Route OCPP-J frame of http event, response is sent with send.
+
+        @return bool: False if context couldn't be created or frame is invalid.
+        """
+        if http_event_context is None:
+            return False
+        context = self._create_context(
+            scope=scope,
+            send=send,
+            charging_station_id=http_event_context.charging_station_id,
+            subprotocols=http_event_context.subprotocols,
+            body=http_event_context.body,
+        )
+        if context is None:
+            return False
+        message = self._parse_message(context)
+        if message is None:
+            return False
+        if await self._respond_heartbeat(message, context):
+            return True
+        if message.message_type_id != MessageType.Call:
+            # Offer "CallResult" and "CallError" to client api handler
+            message = await self.consume_event(
+                connection_id=context.charging_station_id, message=message
+            )
+            # For "CallResult" and "CallError" send empty response back
+            # as ocpp protocol doesn't mandate response for these message types
+            # For "Call" response will be sent by router
+            await send({"type": ASGIHTTPEvent.response_start.value, "status": 200})
+            await send({"type": ASGIHTTPEvent.response_body.value})
+            if message is None:
+                return True
+        await self.on_receive(message=message, context=context)
+        return True
+
+    async def _respond_heartbeat(
+        self, message: Message, context: RouterContext
+    ) -> bool:
+        """Respond to Heartbeat Call if heartbeat responder is enabled.
 
+        @return bool: True if message was responded.
+        """
+        if (
+            self.heartbeat is None
+            or message.message_type_id != MessageType.Call
+            or message.action != "Heartbeat"
+        ):
+            return False
+        if self.instrumentation is not None:
+            self.instrumentation.on_count(
+                Counter.call_received,
+                subprotocol=context.subprotocol,
+                action=message.action,
+            )
+        await context.send(
+            message=self.heartbeat.response(message.unique_id, self.codec),
+            is_response=True,
+            context=context,
+        )
+        self.heartbeat.seen(context.charging_station_id)
+        return True
+
+    def _parse_message(self, context: RouterContext) -> Optional[Message]:
+        instrumentation = self.instrumentation
+        subprotocol = context.subprotocol
+        timer = null_timer
+        if instrumentation is not None:
+            timer = instrumentation.timer(
+                Stage.parse, subprotocol=subprotocol, action=""
+            )
+        try:
+            with timer:
+                return parse_message(context.body, self.codec)
+        except OCPPError as e:
+            log.error("Unable to parse message: %r %r", context.body, e)
+            return None
+
+    def _create_context(
+        self,
+        *,
+        scope: Scope,
+        send: Send,
+        charging_station_id: str,
+        subprotocols: List[str],
+        body: str = None,
+    ) -> RouterContext or None:
         if len(subprotocols) == 0:
             return None
 
@@ -289,23 +752,19 @@ class ASGIApplication:
         elif Subprotocol.ocpp16 in subprotocols:
             subprotocol = Subprotocol.ocpp16.value
         else:
-            raise ValueError
+            return None
 
         send_adapter = SendAdapter(
-            scope=scope,
             send=send,
-            on_receive=self.on_receive,
             http_from_server_to_client=self.http_from_server_to_client,
+            websocket=scope["type"] == ASGIScope.websocket,
         )
         context = RouterContext(
             scope=scope,
-            # store parsed body to avoid parsing twice for on_action and after_action
             body=body,
             subprotocol=subprotocol,
             ocpp_adapter=ocpp_adapters[subprotocol],
             send=send_adapter,
             charging_station_id=charging_station_id,
-            queue=queue,
-            call_lock=call_lock,
         )
         return context
@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    MutableMapping,
+    NamedTuple,
+    Optional,
+    Set,
+)
+
+from ocpp.exceptions import OCPPError
+
+from ocpp_asgi.logging import log
+from ocpp_asgi.messages import parse_message
+from ocpp_asgi.outbound import CallExpiredError, Priority
+from ocpp_asgi.router import Router, RouterContext
+
+if TYPE_CHECKING:
+    from ocpp_asgi.app import ASGIApplication
+
+# Envelope is a JSON compatible dictionary exchanged between workers:
+# {"type": "call", "origin": <worker_id>, "charging_station_id": .., "frame": ..,
+#  "priority": .., "timeout": .., "deadline": <epoch seconds or None>}
+# {"type": "result", "charging_station_id": .., "frame": ..}
+# {"type": "error", "charging_station_id": .., "unique_id": .., "error": ..,
+#  "error_type": <exception class name>}
+Envelope = Dict[str, Any]
+
+# Failures of the owning worker re-raised as is by the caller, others are
+# raised as ConnectionError
+forwarded_errors = {
+    CallExpiredError.__name__: CallExpiredError,
+    asyncio.TimeoutError.__name__: asyncio.TimeoutError,
+}
+
+
+class Owner(NamedTuple):
+    """Worker which has the websocket connection of a Charging Station."""
+
+    worker_id: str
+    subprotocol: str
+
+
+class BusBackend:
+    """Transport and connection ownership directory shared by all workers."""
+
+    async def claim(self, charging_station_id: str, owner: Owner):
+        """Record worker as the owner of Charging Station's connection."""
+        raise NotImplementedError
+
+    async def release(self, charging_station_id: str, worker_id: str) -> bool:
+        """Remove ownership unless Charging Station has moved to another worker.
+
+        @return bool: True if ownership was removed.
+        """
+        raise NotImplementedError
+
+    async def owner(self, charging_station_id: str) -> Optional[Owner]:
+        """Return owner of Charging Station's connection or None."""
+        raise NotImplementedError
+
+    async def publish(self, worker_id: str, envelope: Envelope):
+        """Deliver envelope to the inbox of worker."""
+        raise NotImplementedError
+
+    async def receive(self, worker_id: str) -> Optional[Envelope]:
+        """Wait for the next envelope in inbox of worker. None when closed."""
+        raise NotImplementedError
+
+    async def close(self, worker_id: str):
+        """Make pending and future receive of worker return None."""
+        raise NotImplementedError
+
+
+class QueueBusBackend(BusBackend):
+    """Bus backend built on queues and a shared dictionary.
+
+    Works within a single process with queue.Queue and a dict and across
+    processes with multiprocessing queues and a multiprocessing.Manager dict
+    and lock, see QueueBusBackend.multiprocessing. Queues and directory must be
+    created before worker processes are started and handed over to them.
+
+    Lock, directory and queue operations may block, e.g. on IPC with the
+    Manager process, so they are run in the default executor of the loop.
+    """
+
+    def __init__(
+        self,
+        *,
+        inboxes: Dict[str, Any],
+        directory: Optional[MutableMapping[str, tuple]] = None,
+        lock: Any = None,
+    ):
+        """Initialize QueueBusBackend instance.
+
+        Args:
+            inboxes (dict): Queue per worker id.
+            directory (MutableMapping): charging_station_id -> Owner directory.
+            lock: Lock guarding the directory.
+        """
+        self.inboxes = inboxes
+        self.directory = directory if directory is not None else {}
+        self.lock = lock if lock is not None else threading.Lock()
+        # Blocking queue reads are done in a dedicated thread per worker
+        self._readers: Dict[str, ThreadPoolExecutor] = {}
+
+    @classmethod
+    def in_process(cls, worker_ids) -> QueueBusBackend:
+        return cls(inboxes={worker_id: queue.Queue() for worker_id in worker_ids})
+
+    @classmethod
+    def multiprocessing(cls, worker_ids, manager) -> QueueBusBackend:
+        """Create backend shared by processes using multiprocessing.Manager."""
+        return cls(
+            inboxes={worker_id: manager.Queue() for worker_id in worker_ids},
+            directory=manager.dict(),
+            lock=manager.Lock(),
+        )
+
+    def __getstate__(self):
+        # Reader threads are per process
+        state = self.__dict__.copy()
+        state["_readers"] = {}
+        return state
+
+    async def claim(self, charging_station_id: str, owner: Owner):
+        await self._run(self._claim, charging_station_id, owner)
+
+    async def release(self, charging_station_id: str, worker_id: str) -> bool:
+        return await self._run(self._release, charging_station_id, worker_id)
+
+    async def owner(self, charging_station_id: str) -> Optional[Owner]:
+        owner = await self._run(self.directory.get, charging_station_id)
+        return Owner(*owner) if owner is not None else None
+
+    async def publish(self, worker_id: str, envelope: Envelope):
+        await self._run(self.inboxes[worker_id].put, envelope)
+
+    async def receive(self, worker_id: str) -> Optional[Envelope]:
+        reader = self._readers.get(worker_id)
+        if reader is None:
+            reader = self._readers[worker_id] = ThreadPoolExecutor(max_workers=1)
+        return await asyncio.get_running_loop().run_in_executor(
+            reader, self.inboxes[worker_id].get
+        )
+
+    async def close(self, worker_id: str):
+        await self._run(self.inboxes[worker_id].put, None)
+        reader = self._readers.pop(worker_id, None)
+        if reader is not None:
+            reader.shutdown(wait=False)
+
+    async def _run(self, func: Callable[..., Any], *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _claim(self, charging_station_id: str, owner: Owner):
+        with self.lock:
+            self.directory[charging_station_id] = tuple(owner)
+
+    def _release(self, charging_station_id: str, worker_id: str) -> bool:
+        with self.lock:
+            owner = self.directory.get(charging_station_id)
+            if owner is None or owner[0] != worker_id:
+                return False
+            del self.directory[charging_station_id]
+            return True
+
+
+class RemoteSend:
+    """RouterContext send which forwards Calls to the owning worker."""
+
+    __slots__ = ("bus", "worker_id", "priority", "timeout", "response_timeout")
+
+    def __init__(
+        self,
+        bus: MessageBus,
+        worker_id: str,
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None,
+        response_timeout: Optional[float] = None,
+    ):
+        self.bus = bus
+        self.worker_id = worker_id
+        # Applied on the outbound queue of the owning worker
+        self.priority = priority
+        self.timeout = timeout
+        # How long the caller waits for the response
+        self.response_timeout = response_timeout
+
+    async def __call__(self, message: str, is_response: bool, context: RouterContext):
+        deadline = None
+        if self.response_timeout is not None:
+            # Wall clock as workers may run on different hosts
+            deadline = time.time() + self.response_timeout
+        await self.bus.backend.publish(
+            self.worker_id,
+            {
+                "type": "call",
+                "origin": self.bus.worker_id,
+                "charging_station_id": context.charging_station_id,
+                "frame": message,
+                "priority": self.priority,
+                "timeout": self.timeout,
+                "deadline": deadline,
+            },
+        )
+
+
+class MessageBus:
+    """Routes outbound Calls between workers of a multi-process deployment.
+
+    Each worker owns the websocket connections it has accepted. A call to a
+    Charging Station connected to another worker is forwarded to the owner
+    which sends it through the outbound queue of the Charging Station, see
+    Router.forward_call, and routes the CallResult or CallError back. The
+    caller validates and converts the response as for a local call.
+    """
+
+    def __init__(
+        self,
+        backend: BusBackend,
+        *,
+        worker_id: Optional[str] = None,
+        forward_timeout: float = 60,
+    ):
+        """Initialize MessageBus instance.
+
+        Args:
+            backend (BusBackend): Transport and ownership directory.
+            worker_id (str): Unique id of this worker. Defaults to host and pid.
+            forward_timeout (float): How long the owner waits for a response to
+                a forwarded call including its wait in the outbound queue, in
+                seconds.
+        """
+        self.backend = backend
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.forward_timeout = forward_timeout
+        self.app: Optional[ASGIApplication] = None
+        self._listener: Optional[asyncio.Task] = None
+        # Forwarded calls being delivered by this worker
+        self._deliveries: Set[asyncio.Task] = set()
+
+    async def start(self, app: ASGIApplication):
+        """Start receiving envelopes of this worker. Invoked on lifespan startup."""
+        self.app = app
+        if self._listener is None:
+            self._listener = asyncio.ensure_future(self._listen())
+
+    async def stop(self):
+        """Stop receiving envelopes. Invoked on lifespan shutdown."""
+        if self._listener is not None:
+            await self.backend.close(self.worker_id)
+            await self._listener
+            self._listener = None
+        for task in self._deliveries:
+            task.cancel()
+        await asyncio.gather(*self._deliveries, return_exceptions=True)
+
+    async def claim(self, context: RouterContext):
+        await self.backend.claim(
+            context.charging_station_id, Owner(self.worker_id, context.subprotocol)
+        )
+
+    async def release(self, context: RouterContext):
+        await self.backend.release(context.charging_station_id, self.worker_id)
+
+    async def call(
+        self,
+        *,
+        charging_station_id: str,
+        message: Any,
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Send message to Charging Station connected to another worker.
+
+        Priority and timeout apply to the outbound queue of the Charging Station
+        on the owning worker, see Router.enqueue_call. The owner doesn't send
+        the call after the caller has stopped waiting for the response. Raises
+        ConnectionError if the Charging Station isn't connected.
+        """
+        owner = await self.backend.owner(charging_station_id)
+        if owner is None:
+            raise ConnectionError(f"{charging_station_id=} is not connected")
+        router = self.app.routers[owner.subprotocol]
+        context = RouterContext(
+            scope={},
+            body=None,
+            subprotocol=owner.subprotocol,
+            ocpp_adapter=None,
+            send=RemoteSend(
+                self, owner.worker_id, priority, timeout, router.response_timeout
+            ),
+            charging_station_id=charging_station_id,
+        )
+        return await router.enqueue_call(message=message, context=context)
+
+    async def _listen(self):
+        while True:
+            envelope = await self.backend.receive(self.worker_id)
+            if envelope is None:
+                return
+            try:
+                if envelope["type"] == "call":
+                    # Delivery waits for the turn in the outbound queue and for
+                    # the response, so it must not hold up other envelopes
+                    task = asyncio.ensure_future(self._deliver_call(envelope))
+                    self._deliveries.add(task)
+                    task.add_done_callback(self._deliveries.discard)
+                elif envelope["type"] == "result":
+                    self._resolve(envelope)
+                elif envelope["type"] == "error":
+                    self._fail(envelope)
+            except Exception:
+                log.exception("Failure when processing envelope %r", envelope)
+
+    async def _deliver_call(self, envelope: Envelope):
+        charging_station_id = envelope["charging_station_id"]
+        frame = envelope["frame"]
+        unique_id = self.app.codec.loads(frame)[1]
+        priority = envelope.get("priority")
+        timeout = envelope.get("timeout")
+        wait = self.forward_timeout
+        deadline = envelope.get("deadline")
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                log.warning(
+                    "Dropping forwarded call to %r, caller stopped waiting: %r",
+                    charging_station_id,
+                    frame,
+                )
+                return
+            # Neither queue nor response is waited for longer than the caller
+            timeout = min(timeout, remaining) if timeout is not None else remaining
+            wait = min(wait, remaining)
+        context = self.app.connections.get(charging_station_id)
+        try:
+            if context is None:
+                raise ConnectionError(f"{charging_station_id=} is not connected")
+            router: Router = self.app.routers[context.subprotocol]
+            response = await asyncio.wait_for(
+                router.forward_call(
+                    frame=frame,
+                    context=context,
+                    priority=Priority(priority) if priority is not None else None,
+                    timeout=timeout,
+                ),
+                wait,
+            )
+            await self.backend.publish(
+                envelope["origin"],
+                {
+                    "type": "result",
+                    "charging_station_id": charging_station_id,
+                    "frame": response.to_json(),
+                },
+            )
+        except Exception as e:
+            await self.backend.publish(
+                envelope["origin"],
+                {
+                    "type": "error",
+                    "charging_station_id": charging_station_id,
+                    "unique_id": unique_id,
+                    "error": f"{type(e).__name__}: {e}",
+                    "error_type": type(e).__name__,
+                },
+            )
+
+    def _resolve(self, envelope: Envelope):
+        try:
+            message = parse_message(envelope["frame"], self.app.codec)
+        except OCPPError as e:
+            log.error("Unable to parse forwarded response: %r %r", envelope, e)
+            return
+        for router in self.app.routers.values():
+            if router.pending_calls.resolve(envelope["charging_station_id"], message):
+                return
+
+    def _fail(self, envelope: Envelope):
+        error_class = forwarded_errors.get(envelope.get("error_type"), ConnectionError)
+        error = error_class(envelope["error"])
+        for router in self.app.routers.values():
+            if router.pending_calls.fail(
+                envelope["charging_station_id"], envelope["unique_id"], error
+            ):
+                return
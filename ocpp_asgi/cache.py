@@ -0,0 +1,151 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+def normalize_payload(payload: Any) -> str:
+    """Return canonical JSON of payload, equal for payloads differing in key order."""
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+
+class ResponseCache:
+    """Cache of serialized CallResults of an action with TTL and LRU eviction.
+
+    Entries are keyed by (action, normalized payload of the Call) and hold the
+    serialized CallResult frame without its unique id. See Router.on.
+
+    Only use for actions whose handler returns the same response for the same
+    payload, regardless of the Charging Station, and has no side effects.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float = 60.0,
+        maxsize: int = 1024,
+        key: Optional[Callable[[Any], Hashable]] = None,
+    ):
+        """Initialize ResponseCache instance.
+
+        Args:
+            ttl (float): Time in seconds a response is cached.
+            maxsize (int): Maximum number of cached responses, least recently
+                used response is evicted first.
+            key (Callable): Function returning cache key of a Call payload.
+                Defaults to normalize_payload. Override to ignore fields which
+                don't affect the response e.g. timestamps.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.key = key if key is not None else normalize_payload
+        # (action, key) -> (expiry time, serialized CallResult without unique id)
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, str]]" = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple[str, Hashable]) -> Optional[str]:
+        """Return cached response of key or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Tuple[str, Hashable], response: str):
+        """Cache response of key, evicting the least recently used response."""
+        self._entries[key] = (time.monotonic() + self.ttl, response)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+def call_fingerprint(action: str, payload: Any) -> Tuple[str, int]:
+    """Return fingerprint telling apart Calls which reuse a unique id."""
+    return action, hash(normalize_payload(payload))
+
+
+class ReplayWindow:
+    """Responses of recent Calls per Charging Station for replaying duplicates.
+
+    Charging Stations retransmit a Call with the same unique id when they don't
+    receive its response, e.g. after reconnecting. The response of a duplicate
+    is replayed from the window instead of handling the Call again. See Router.
+
+    A Call is a duplicate only if also its fingerprint, see call_fingerprint,
+    matches. Charging Stations may reuse unique ids e.g. after a reboot resets
+    their counter, such Calls are handled and their responses replace the old.
+
+    Memory is bounded: the window holds the last size responses of a Charging
+    Station and at most max_stations Charging Stations, least recently active
+    Charging Station is evicted first. Windows are not shared between processes.
+    """
+
+    def __init__(self, *, size: int = 16, max_stations: int = 100_000):
+        """Initialize ReplayWindow instance.
+
+        Args:
+            size (int): Number of responses kept per Charging Station.
+            max_stations (int): Maximum number of Charging Stations tracked.
+        """
+        self.size = size
+        self.max_stations = max_stations
+        self.hits = 0
+        self.misses = 0
+        # charging_station_id -> unique_id -> (fingerprint, serialized response)
+        self._stations: "OrderedDict[str, OrderedDict[str, Tuple[Hashable, str]]]" = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        """Number of Charging Stations tracked."""
+        return len(self._stations)
+
+    def get(
+        self, charging_station_id: str, unique_id: str, fingerprint: Hashable
+    ) -> Optional[str]:
+        """Return response of a duplicate Call or None if Call is not seen."""
+        responses = self._stations.get(charging_station_id)
+        entry = responses.get(unique_id) if responses is not None else None
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] != fingerprint:
+            # Unique id is reused by another Call
+            del responses[unique_id]
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(
+        self,
+        charging_station_id: str,
+        unique_id: str,
+        fingerprint: Hashable,
+        response: str,
+    ):
+        """Record response sent to Call of a Charging Station."""
+        responses = self._stations.get(charging_station_id)
+        if responses is None:
+            responses = self._stations[charging_station_id] = OrderedDict()
+            if len(self._stations) > self.max_stations:
+                self._stations.popitem(last=False)
+        else:
+            self._stations.move_to_end(charging_station_id)
+        responses[unique_id] = (fingerprint, response)
+        if len(responses) > self.size:
+            responses.popitem(last=False)
+
+    def discard(self, charging_station_id: str):
+        """Forget responses of a Charging Station."""
+        self._stations.pop(charging_station_id, None)
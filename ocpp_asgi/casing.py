@@ -0,0 +1,104 @@
+import functools
+from dataclasses import fields, is_dataclass
+from typing import Any, Dict, Iterable, Optional
+
+from ocpp.charge_point import camel_to_snake_case, snake_to_camel_case
+
+from ocpp_asgi.dispatch import payload_modules
+from ocpp_asgi.validation import load_schema, schema_keys
+
+
+def to_snake_key(key: str) -> str:
+    """Convert single camelCase key exactly as ocpp's camel_to_snake_case does."""
+    return next(iter(camel_to_snake_case({key: None})))
+
+
+def to_camel_key(key: str) -> str:
+    """Convert single snake_case key exactly as ocpp's snake_to_camel_case does."""
+    return next(iter(snake_to_camel_case({key: None})))
+
+
+def _schema_properties(schema: Any) -> Iterable[str]:
+    if isinstance(schema, dict):
+        for key, value in schema.items():
+            if key == "properties" and isinstance(value, dict):
+                yield from value.keys()
+            yield from _schema_properties(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            yield from _schema_properties(value)
+
+
+def _payload_fields(ocpp_version: str) -> Iterable[str]:
+    for module in payload_modules[ocpp_version]:
+        for value in vars(module).values():
+            if isinstance(value, type) and is_dataclass(value):
+                yield from (field.name for field in fields(value))
+
+
+class CaseTable:
+    """Precomputed bidirectional mapping between camelCase and snake_case keys.
+
+    Payload translation is a dict lookup per key. Keys not in the table
+    (e.g. vendor specific DataTransfer content) fall back to regex conversion.
+    """
+
+    def __init__(self, camel_keys: Iterable[str] = (), snake_keys: Iterable[str] = ()):
+        self.to_snake_keys: Dict[str, str] = {}
+        self.to_camel_keys: Dict[str, str] = {}
+        for key in camel_keys:
+            self.to_snake_keys[key] = to_snake_key(key)
+        for key in snake_keys:
+            self.to_camel_keys[key] = to_camel_key(key)
+        # Keys produced by conversion in one direction are expected back in
+        # the other direction.
+        for key in list(self.to_snake_keys.values()):
+            self.to_camel_keys.setdefault(key, to_camel_key(key))
+        for key in list(self.to_camel_keys.values()):
+            self.to_snake_keys.setdefault(key, to_snake_key(key))
+
+    def to_snake(self, data: Any) -> Any:
+        """Convert all keys of all dictionaries inside data to snake_case."""
+        if isinstance(data, dict):
+            keys = self.to_snake_keys
+            to_snake = self.to_snake
+            return {
+                (keys.get(key) or to_snake_key(key)): to_snake(value)
+                for key, value in data.items()
+            }
+        if isinstance(data, list):
+            return [self.to_snake(value) for value in data]
+        return data
+
+    def to_camel(self, data: Any) -> Any:
+        """Convert all keys of all dictionaries inside data to camelCase."""
+        if isinstance(data, dict):
+            keys = self.to_camel_keys
+            to_camel = self.to_camel
+            return {
+                (keys.get(key) or to_camel_key(key)): to_camel(value)
+                for key, value in data.items()
+            }
+        if isinstance(data, list):
+            return [self.to_camel(value) for value in data]
+        return data
+
+
+@functools.lru_cache(maxsize=None)
+def case_table(ocpp_version: Optional[str] = None) -> CaseTable:
+    """Return CaseTable built from schemas and payload classes of ocpp_version.
+
+    Table is built once per version. When ocpp_version is None the table covers
+    all supported versions.
+    """
+    if ocpp_version is None:
+        versions = list(payload_modules.keys())
+    else:
+        versions = [ocpp_version]
+    camel_keys = set()
+    snake_keys = set()
+    for version in versions:
+        for key in schema_keys(version):
+            camel_keys.update(_schema_properties(load_schema(version, *key)))
+        snake_keys.update(_payload_fields(version))
+    return CaseTable(camel_keys=sorted(camel_keys), snake_keys=sorted(snake_keys))
@@ -0,0 +1,224 @@
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+from ocpp_asgi.logging import log
+
+Dispatch = Callable[[str, str], None]
+
+
+class ChannelBackend:
+    """Transport of a Channel.
+
+    Backend pushes every published value to dispatch of all started channels.
+    It also keeps track of keys someone is waiting for.
+    """
+
+    async def start(self, dispatch: Dispatch):
+        """Start delivering published values to dispatch(key, value)."""
+        raise NotImplementedError
+
+    async def stop(self, dispatch: Dispatch):
+        raise NotImplementedError
+
+    async def publish(self, key: str, value: str):
+        raise NotImplementedError
+
+    async def mark_waiting(self, key: str, timeout: float):
+        raise NotImplementedError
+
+    async def unmark_waiting(self, key: str):
+        raise NotImplementedError
+
+    async def is_waiting(self, key: str) -> bool:
+        raise NotImplementedError
+
+
+class InMemoryChannelBackend(ChannelBackend):
+    """Channel backend for channels within a single process."""
+
+    def __init__(self):
+        self._dispatchers: List[Dispatch] = []
+        # key -> number of waiters
+        self._waiting: Dict[str, int] = {}
+
+    async def start(self, dispatch: Dispatch):
+        self._dispatchers.append(dispatch)
+
+    async def stop(self, dispatch: Dispatch):
+        self._dispatchers.remove(dispatch)
+
+    async def publish(self, key: str, value: str):
+        for dispatch in list(self._dispatchers):
+            dispatch(key, value)
+
+    async def mark_waiting(self, key: str, timeout: float):
+        self._waiting[key] = self._waiting.get(key, 0) + 1
+
+    async def unmark_waiting(self, key: str):
+        count = self._waiting.pop(key, 0) - 1
+        if count > 0:
+            self._waiting[key] = count
+
+    async def is_waiting(self, key: str) -> bool:
+        return key in self._waiting
+
+
+class RedisChannelBackend(ChannelBackend):
+    """Channel backend for channels in many processes built on Redis.
+
+    Values are pushed with Redis PUBLISH. Each process keeps a single pattern
+    subscription covering all keys of the channel and a single reader task, so
+    there's no polling and no connection per message. Waiting markers are keys
+    with expiry.
+    """
+
+    def __init__(self, redis: Any, *, prefix: str = "ocpp-asgi:"):
+        """Initialize RedisChannelBackend instance.
+
+        Args:
+            redis: redis.asyncio.Redis compatible client.
+            prefix (str): Prefix of Redis channel and key names.
+        """
+        self.redis = redis
+        self.prefix = prefix
+        self._dispatchers: List[Dispatch] = []
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self, dispatch: Dispatch):
+        self._dispatchers.append(dispatch)
+        if self._pubsub is None:
+            self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            # Subscription is confirmed before returning so that no value
+            # published after start can be missed.
+            await self._pubsub.psubscribe(f"{self.prefix}channel:*")
+            self._reader = asyncio.ensure_future(self._read())
+
+    async def stop(self, dispatch: Dispatch):
+        self._dispatchers.remove(dispatch)
+        if not self._dispatchers and self._pubsub is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            await self._pubsub.punsubscribe()
+            # aclose replaces close in redis 5
+            await getattr(self._pubsub, "aclose", self._pubsub.close)()
+            self._pubsub = self._reader = None
+
+    async def publish(self, key: str, value: str):
+        await self.redis.publish(f"{self.prefix}channel:{key}", value)
+
+    async def mark_waiting(self, key: str, timeout: float):
+        await self.redis.incr(f"{self.prefix}waiting:{key}")
+        await self.redis.expire(f"{self.prefix}waiting:{key}", max(1, round(timeout)))
+
+    async def unmark_waiting(self, key: str):
+        if await self.redis.decr(f"{self.prefix}waiting:{key}") <= 0:
+            await self.redis.delete(f"{self.prefix}waiting:{key}")
+
+    async def is_waiting(self, key: str) -> bool:
+        return await self.redis.exists(f"{self.prefix}waiting:{key}") > 0
+
+    async def _read(self):
+        start = len(f"{self.prefix}channel:")
+        while True:
+            try:
+                # Blocks until a message is pushed
+                message = await self._pubsub.get_message(timeout=None)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Failure when reading channel subscription")
+                await asyncio.sleep(1)
+                continue
+            if message is None or message["type"] != "pmessage":
+                continue
+            channel, data = message["channel"], message["data"]
+            key = (channel.decode() if isinstance(channel, bytes) else channel)[start:]
+            value = data.decode() if isinstance(data, bytes) else data
+            for dispatch in list(self._dispatchers):
+                dispatch(key, value)
+
+
+class Channel:
+    """Key addressed channel between e.g. Central System and client API.
+
+    Replaces polling with push: a value published to a key is delivered
+    immediately to futures waiting for that key and to subscribers of the key.
+    A channel has a single long-lived subscription to its backend and
+    demultiplexes values by key locally.
+    """
+
+    def __init__(self, backend: ChannelBackend):
+        self.backend = backend
+        self._waiters: Dict[str, Set[asyncio.Future]] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._started = False
+        # Created in the running event loop, see _start_lock
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def start(self):
+        """Start receiving values. Invoked lazily on first wait or subscribe."""
+        async with self._start_lock():
+            if not self._started:
+                await self.backend.start(self._dispatch)
+                self._started = True
+
+    async def close(self):
+        async with self._start_lock():
+            if self._started:
+                await self.backend.stop(self._dispatch)
+                self._started = False
+
+    async def publish(self, key: str, value: str):
+        await self.backend.publish(key, value)
+
+    async def wait(self, key: str, timeout: float = 15) -> str:
+        """Wait for the next value published to key.
+
+        Raises asyncio.TimeoutError if no value is published within timeout.
+        """
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, set()).add(future)
+        await self.backend.mark_waiting(key, timeout)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del self._waiters[key]
+            await self.backend.unmark_waiting(key)
+
+    async def is_waiting(self, key: str) -> bool:
+        """Return True if someone, in any process, is waiting for key."""
+        return await self.backend.is_waiting(key)
+
+    async def subscribe(self, key: str) -> AsyncIterator[str]:
+        """Yield every value published to key."""
+        await self.start()
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(key, set()).add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            subscribers = self._subscribers[key]
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[key]
+
+    def _start_lock(self) -> asyncio.Lock:
+        # Channel is often created before the event loop of the server and on
+        # Python < 3.10 a lock binds to the loop current at its creation
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _dispatch(self, key: str, value: str):
+        for future in self._waiters.pop(key, ()):
+            if not future.done():
+                future.set_result(value)
+        for queue in self._subscribers.get(key, ()):
+            queue.put_nowait(value)
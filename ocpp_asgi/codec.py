@@ -0,0 +1,75 @@
+import decimal
+import json
+from typing import Any, Optional, Union
+
+
+def _default(obj: Any) -> Any:
+    # Encode decimal.Decimal using 1 decimal point as ocpp.messages does
+    if isinstance(obj, decimal.Decimal):
+        return float("%.1f" % obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+class JSONCodec:
+    """JSON codec for OCPP-J frames using standard library json module.
+
+    Subclass and override loads and dumps to use another JSON library.
+    """
+
+    name = "json"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Decode str or bytes. Raises ValueError if data is not valid JSON."""
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        """Encode obj without whitespace after separators."""
+        return json.dumps(obj, separators=(",", ":"), default=_default)
+
+
+class OrjsonCodec(JSONCodec):
+    """JSON codec using orjson. Requires orjson to be installed."""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._loads = orjson.loads
+        self._dumps = orjson.dumps
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return self._dumps(obj, default=_default).decode("utf-8")
+
+
+json_codec = JSONCodec()
+
+codecs = {
+    JSONCodec.name: JSONCodec,
+    OrjsonCodec.name: OrjsonCodec,
+}
+
+
+def get_codec(codec: Optional[Union[str, JSONCodec]] = None) -> JSONCodec:
+    """Return JSONCodec instance.
+
+    Args:
+        codec: JSONCodec instance, name of the codec ("json", "orjson") or "auto"
+            for the fastest installed codec. Defaults to standard library json.
+    """
+    if codec is None or codec == JSONCodec.name:
+        return json_codec
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec == "auto":
+        try:
+            return OrjsonCodec()
+        except ImportError:
+            return json_codec
+    try:
+        return codecs[codec]()
+    except KeyError:
+        raise ValueError(f"Unsupported JSON {codec=}")
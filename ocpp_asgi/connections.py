@@ -0,0 +1,80 @@
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from ocpp_asgi.router import RouterContext
+
+
+class ConnectionRegistry:
+    """Live websocket connections keyed by charging_station_id.
+
+    Registry is maintained by ASGIApplication on connect and disconnect. When a
+    Charging Station reconnects before its previous connection is closed, the
+    newest connection wins and closing the stale one doesn't remove it.
+
+    Mutations happen on the event loop. Lookups and snapshots are safe from
+    other threads too.
+    """
+
+    def __init__(self):
+        self._connections: Dict[str, RouterContext] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    def __contains__(self, charging_station_id: str) -> bool:
+        return charging_station_id in self._connections
+
+    def __iter__(self) -> Iterator[RouterContext]:
+        return iter(self.snapshot())
+
+    def add(self, context: RouterContext) -> Optional[RouterContext]:
+        """Register connection.
+
+        @return RouterContext: Replaced connection of the same Charging Station.
+        """
+        with self._lock:
+            previous = self._connections.get(context.charging_station_id)
+            if previous is not None:
+                self._counts[previous.subprotocol] -= 1
+            self._connections[context.charging_station_id] = context
+            self._counts[context.subprotocol] = (
+                self._counts.get(context.subprotocol, 0) + 1
+            )
+        return previous
+
+    def remove(self, context: RouterContext) -> bool:
+        """Unregister connection unless it has already been replaced.
+
+        @return bool: True if connection was removed.
+        """
+        with self._lock:
+            if self._connections.get(context.charging_station_id) is not context:
+                return False
+            del self._connections[context.charging_station_id]
+            self._counts[context.subprotocol] -= 1
+        return True
+
+    def get(self, charging_station_id: str) -> Optional[RouterContext]:
+        """Return connection of the Charging Station or None if not connected."""
+        return self._connections.get(charging_station_id)
+
+    def count(self, subprotocol: Optional[str] = None) -> int:
+        """Return number of connections, optionally only of given subprotocol."""
+        if subprotocol is None:
+            return len(self._connections)
+        return self._counts.get(getattr(subprotocol, "value", subprotocol), 0)
+
+    def snapshot(self, subprotocol: Optional[str] = None) -> List[RouterContext]:
+        """Return a copy of connections, optionally only of given subprotocol.
+
+        Snapshot is consistent and isn't affected by later connects or
+        disconnects. It's safe to iterate while awaiting e.g. in fan-out.
+        """
+        with self._lock:
+            contexts = list(self._connections.values())
+        if subprotocol is None:
+            return contexts
+        subprotocol = getattr(subprotocol, "value", subprotocol)
+        return [context for context in contexts if context.subprotocol == subprotocol]
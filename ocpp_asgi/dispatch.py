@@ -0,0 +1,93 @@
+import functools
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ocpp.exceptions import NotImplementedError
+from ocpp.messages import MessageType
+from ocpp.v16 import call as v16_call
+from ocpp.v16 import call_result as v16_call_result
+from ocpp.v20 import call as v20_call
+from ocpp.v20 import call_result as v20_call_result
+from ocpp.v201 import call as v201_call
+from ocpp.v201 import call_result as v201_call_result
+
+from ocpp_asgi.cache import ResponseCache
+from ocpp_asgi.validation import ValidatorCache
+
+# call and call_result modules per ocpp version
+payload_modules = {
+    "1.6": (v16_call, v16_call_result),
+    "2.0": (v20_call, v20_call_result),
+    "2.0.1": (v201_call, v201_call_result),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def payload_classes(ocpp_version: str) -> Dict[str, Tuple[type, Optional[type]]]:
+    """Return (request class, response class) by action for ocpp_version."""
+    try:
+        call, call_result = payload_modules[ocpp_version]
+    except KeyError:
+        raise ValueError(f"Unsupported {ocpp_version=}")
+    classes = {}
+    for name, value in vars(call).items():
+        if name.endswith("Payload") and isinstance(value, type):
+            classes[name[: -len("Payload")]] = (value, getattr(call_result, name, None))
+    return classes
+
+
+def _missing_validator(action: str) -> Callable[[Any], None]:
+    def validate(message: Any):
+        raise NotImplementedError(
+            details={"cause": f"Failed to validate action: {action}"}
+        )
+
+    return validate
+
+
+@dataclass(frozen=True)
+class ActionEntry:
+    """Everything needed for handling an action resolved upfront."""
+
+    action: str
+    on_action: Optional[Callable]
+    after_action: Optional[Callable]
+    request_class: Optional[type]
+    response_class: Optional[type]
+    validate_request: Callable[[Any], None]
+    validate_response: Callable[[Any], None]
+    skip_schema_validation: bool = False
+    cache: Optional[ResponseCache] = None
+
+
+def create_dispatch_table(
+    *, ocpp_version: str, route_map: dict, validators: ValidatorCache
+) -> Dict[str, ActionEntry]:
+    """Create ActionEntry for every action of ocpp_version and routed actions."""
+    classes = payload_classes(ocpp_version)
+    # Action enums are normalized to plain strings i.e. action names
+    routes = {getattr(action, "value", action): h for action, h in route_map.items()}
+    table = {}
+    for action in set(classes.keys()) | set(routes.keys()):
+        handlers = routes.get(action, {})
+        request_class, response_class = classes.get(action, (None, None))
+        validate = {}
+        for message_type_id in [MessageType.Call, MessageType.CallResult]:
+            try:
+                validate[message_type_id] = validators.message_validator(
+                    ocpp_version, action, message_type_id
+                )
+            except NotImplementedError:
+                validate[message_type_id] = _missing_validator(action)
+        table[action] = ActionEntry(
+            action=action,
+            on_action=handlers.get("_on_action"),
+            after_action=handlers.get("_after_action"),
+            request_class=request_class,
+            response_class=response_class,
+            validate_request=validate[MessageType.Call],
+            validate_response=validate[MessageType.CallResult],
+            skip_schema_validation=handlers.get("_skip_schema_validation", False),
+            cache=handlers.get("_cache"),
+        )
+    return table
@@ -0,0 +1,229 @@
+import asyncio
+import inspect
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from ocpp_asgi.logging import log
+
+Job = Callable[[], Union[Awaitable[Any], Any]]
+
+
+class OverflowPolicy(str, Enum):
+    """What to do when executor queue is full."""
+
+    # Wait until there is room in the queue. This applies backpressure to
+    # the connection which received the message.
+    block = "block"
+    # Discard the oldest queued job to make room for the new one.
+    drop_oldest = "drop_oldest"
+    # Run the job immediately in the caller.
+    inline = "inline"
+
+
+@dataclass
+class ExecutorMetrics:
+    """Counters and latency of AfterHandlerExecutor."""
+
+    queue_depth: int = 0
+    running: int = 0
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    dropped: int = 0
+    inlined: int = 0
+    # Time from submitting a job until it has finished, in seconds
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    @property
+    def latency_avg(self) -> float:
+        finished = self.completed + self.failed
+        return self.latency_total / finished if finished else 0.0
+
+
+class AfterHandlerExecutor:
+    """Bounded worker pool for executing "after"-handlers.
+
+    Jobs are queued and executed by at most concurrency workers. Exceptions
+    raised by jobs are logged and counted instead of being lost.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = 100,
+        max_queue: int = 10_000,
+        policy: OverflowPolicy = OverflowPolicy.block,
+    ):
+        """Initialize AfterHandlerExecutor instance.
+
+        Args:
+            concurrency (int): Maximum number of jobs executed at a time.
+            max_queue (int): Maximum number of jobs waiting for execution.
+            policy (OverflowPolicy): What to do when the queue is full.
+        """
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.policy = OverflowPolicy(policy)
+        self.metrics = ExecutorMetrics()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def submit(self, job: Job):
+        """Queue job for execution according to overflow policy."""
+        if self._queue is None:
+            self._start()
+        self.metrics.submitted += 1
+        item = (time.perf_counter(), job)
+        if self._queue.full():
+            if self.policy == OverflowPolicy.inline:
+                self.metrics.inlined += 1
+                await self._run(item)
+                return
+            elif self.policy == OverflowPolicy.drop_oldest:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self.metrics.dropped += 1
+        await self._queue.put(item)
+        self.metrics.queue_depth = self._queue.qsize()
+
+    async def drain(self, timeout: Optional[float] = None):
+        """Wait until queued jobs are executed and stop workers.
+
+        Jobs still running after timeout seconds are cancelled.
+        """
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            log.warning(
+                "After-handlers not drained within timeout=%s: %s",
+                timeout,
+                self.metrics,
+            )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self.metrics.queue_depth = 0
+
+    def _start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [
+            asyncio.ensure_future(self._worker()) for _ in range(self.concurrency)
+        ]
+
+    async def _worker(self):
+        queue = self._queue
+        while True:
+            item = await queue.get()
+            self.metrics.queue_depth = queue.qsize()
+            try:
+                await self._run(item)
+            finally:
+                queue.task_done()
+
+    async def _run(self, item: Tuple[float, Job]):
+        submitted, job = item
+        self.metrics.running += 1
+        try:
+            result = job()
+            if inspect.isawaitable(result):
+                await result
+            self.metrics.completed += 1
+        except Exception:
+            self.metrics.failed += 1
+            log.exception("Error while executing after-handler")
+        finally:
+            self.metrics.running -= 1
+            latency = time.perf_counter() - submitted
+            self.metrics.latency_total += latency
+            self.metrics.latency_max = max(self.metrics.latency_max, latency)
+
+
+class DispatchPolicy(str, Enum):
+    """How Calls received from a websocket connection are dispatched."""
+
+    # Handle Call before receiving the next frame of the connection.
+    inline = "inline"
+    # Handle Calls one at a time in order of arrival without blocking receiving.
+    fifo = "fifo"
+    # Handle Calls of the same action in order of arrival and Calls of
+    # different actions concurrently.
+    per_action = "per_action"
+
+
+class ConnectionDispatcher:
+    """Executes Calls received from a single websocket connection.
+
+    Calls are handled in the background so that receiving from the connection,
+    and thereby CallResults and CallErrors to pending calls, isn't blocked by a
+    slow handler. Ordering follows DispatchPolicy. At most max_in_flight Calls
+    are queued or running. When the limit is reached submit waits, which stops
+    receiving from the connection. Idle connections have no worker tasks.
+    """
+
+    __slots__ = ("policy", "_in_flight", "_queues", "_workers")
+
+    def __init__(self, policy: DispatchPolicy, max_in_flight: int = 8):
+        """Initialize ConnectionDispatcher instance.
+
+        Args:
+            policy (DispatchPolicy): fifo or per_action.
+            max_in_flight (int): Maximum number of Calls queued or running.
+        """
+        self.policy = DispatchPolicy(policy)
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        # Jobs per ordering key, the first one is running
+        self._queues: Dict[str, Deque[Job]] = {}
+        self._workers: Set[asyncio.Task] = set()
+
+    async def submit(self, action: str, job: Job):
+        """Queue job handling Call of action."""
+        await self._in_flight.acquire()
+        key = action if self.policy == DispatchPolicy.per_action else ""
+        queue = self._queues.get(key)
+        if queue is not None:
+            queue.append(job)
+            return
+        queue = self._queues[key] = deque((job,))
+        worker = asyncio.ensure_future(self._work(key, queue))
+        self._workers.add(worker)
+        worker.add_done_callback(self._workers.discard)
+
+    async def close(self):
+        """Wait until queued Calls have been handled."""
+        while self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+
+    async def _work(self, key: str, queue: Deque[Job]):
+        try:
+            while queue:
+                try:
+                    result = queue[0]()
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception:
+                    log.exception("Error while handling call")
+                finally:
+                    queue.popleft()
+                    self._in_flight.release()
+        finally:
+            if self._queues.get(key) is queue:
+                del self._queues[key]
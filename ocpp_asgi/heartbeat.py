@@ -0,0 +1,54 @@
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from ocpp.messages import MessageType
+
+from ocpp_asgi.codec import JSONCodec, json_codec
+from ocpp_asgi.logging import log
+
+_CALL_RESULT = int(MessageType.CallResult)
+
+
+class HeartbeatResponder:
+    """Responds to Heartbeat Calls of every subprotocol without router dispatch.
+
+    Heartbeat payload and response are the same in ocpp1.6, ocpp2.0 and
+    ocpp2.0.1, so the response is preformatted once per second with the current
+    time and only the unique id of the Call is spliced in. Validation, handlers
+    and "after"-handlers of Heartbeat are not invoked. See ASGIApplication.
+    """
+
+    __slots__ = ("on_heartbeat", "_second", "_tail")
+
+    def __init__(self, *, on_heartbeat: Optional[Callable[[str], None]] = None):
+        """Initialize HeartbeatResponder instance.
+
+        Args:
+            on_heartbeat (Callable): Invoked with charging_station_id after every
+                Heartbeat response e.g. for last-seen tracking. Must not block.
+        """
+        self.on_heartbeat = on_heartbeat
+        self._second = -1
+        # Serialized CallResult without unique id
+        self._tail = ""
+
+    def response(self, unique_id: str, codec: JSONCodec = json_codec) -> str:
+        """Return CallResult frame responding to Heartbeat Call with unique_id."""
+        second = int(time.time())
+        if second != self._second:
+            current_time = datetime.fromtimestamp(second, timezone.utc)
+            self._tail = (
+                f',{{"currentTime":"{current_time.strftime("%Y-%m-%dT%H:%M:%SZ")}"}}]'
+            )
+            self._second = second
+        return f"[{_CALL_RESULT},{codec.dumps(unique_id)}{self._tail}"
+
+    def seen(self, charging_station_id: str):
+        """Invoke on_heartbeat hook, failures are logged."""
+        if self.on_heartbeat is None:
+            return
+        try:
+            self.on_heartbeat(charging_station_id)
+        except Exception as e:
+            log.error("Failure in on_heartbeat of %r: %r", charging_station_id, e)
@@ -0,0 +1,273 @@
+import bisect
+import contextlib
+import time
+from enum import Enum
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class Stage(str, Enum):
+    """Processing stage of an OCPP message which is timed."""
+
+    parse = "parse"
+    validation = "validation"
+    case_conversion = "case_conversion"
+    handler = "handler"
+    serialization = "serialization"
+    send = "send"
+    # From sending a Call until its CallResult or CallError is received
+    call_round_trip = "call_round_trip"
+    # Time a Call waits in outbound queue of the Charging Station
+    queue_wait = "queue_wait"
+
+
+class Counter(str, Enum):
+    """Event which is counted."""
+
+    # Call received from a Charging Station
+    call_received = "call_received"
+    # Call sent to a Charging Station
+    call_sent = "call_sent"
+    # Failure of any kind, labeled with the exception type
+    error = "error"
+    # Call responded from ResponseCache
+    cache_hit = "cache_hit"
+    # Call of an action with ResponseCache handled by its handler
+    cache_miss = "cache_miss"
+    # Duplicate Call responded from ReplayWindow
+    replay_hit = "replay_hit"
+    # Call not seen before by ReplayWindow
+    replay_miss = "replay_miss"
+
+
+class Instrumentation:
+    """Base class for instrumentation hooks.
+
+    Hooks are invoked synchronously on the message processing path so they
+    should only record values and never raise or block.
+    """
+
+    def on_timing(
+        self, stage: Stage, duration: float, *, subprotocol: str, action: str
+    ):
+        """Invoked with duration of a stage in seconds."""
+        pass
+
+    def on_count(
+        self,
+        counter: Counter,
+        *,
+        subprotocol: str,
+        action: str,
+        error: Optional[str] = None,
+    ):
+        """Invoked when a counted event happens."""
+        pass
+
+
+class StageTimer:
+    """Context manager timing a stage. Exception raised within is counted."""
+
+    __slots__ = ("hooks", "stage", "subprotocol", "action", "start")
+
+    def __init__(self, hooks: Instrumentation, stage: Stage, subprotocol, action):
+        self.hooks = hooks
+        self.stage = stage
+        self.subprotocol = subprotocol
+        self.action = action
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.hooks.on_timing(
+            self.stage,
+            time.perf_counter() - self.start,
+            subprotocol=self.subprotocol,
+            action=self.action,
+        )
+        if isinstance(exc, Exception):
+            self.hooks.on_count(
+                Counter.error,
+                subprotocol=self.subprotocol,
+                action=self.action,
+                error=type(exc).__name__,
+            )
+        return False
+
+
+# Shared no-op timer used when there are no hooks
+null_timer = contextlib.nullcontext()
+
+
+class Instruments(Instrumentation):
+    """Dispatches timings and counts to all registered hooks."""
+
+    def __init__(self, hooks: Iterable[Instrumentation] = ()):
+        self.hooks: List[Instrumentation] = list(hooks)
+
+    def add(self, hook: Instrumentation):
+        if hook not in self.hooks:
+            self.hooks.append(hook)
+
+    def timer(self, stage: Stage, *, subprotocol: str, action: str) -> StageTimer:
+        # Skip dispatching in the common case of a single hook
+        hooks = self.hooks[0] if len(self.hooks) == 1 else self
+        return StageTimer(hooks, stage, subprotocol, action)
+
+    def on_timing(
+        self, stage: Stage, duration: float, *, subprotocol: str, action: str
+    ):
+        for hook in self.hooks:
+            hook.on_timing(stage, duration, subprotocol=subprotocol, action=action)
+
+    def on_count(
+        self,
+        counter: Counter,
+        *,
+        subprotocol: str,
+        action: str,
+        error: Optional[str] = None,
+    ):
+        for hook in self.hooks:
+            hook.on_count(counter, subprotocol=subprotocol, action=action, error=error)
+
+
+# Upper bounds of histogram buckets in seconds
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class Histogram:
+    """Duration histogram with fixed buckets."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        # Last slot counts observations above the largest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+class MetricsRegistry(Instrumentation):
+    """In-process registry of stage timings and counters.
+
+    Render the registry in Prometheus text exposition format with render. When
+    given to ASGIApplication the registry is served at its metrics path.
+    """
+
+    def __init__(
+        self,
+        *,
+        namespace: str = "ocpp_asgi",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.namespace = namespace
+        self.buckets = tuple(sorted(buckets))
+        # (stage, subprotocol, action) -> Histogram
+        self.timings: Dict[Tuple[str, str, str], Histogram] = {}
+        # (counter, subprotocol, action, error) -> count
+        self.counters: Dict[Tuple[str, str, str, str], int] = {}
+        # name -> (help, function returning current value)
+        self.gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+    def add_gauge(self, name: str, help: str, collect: Callable[[], float]):
+        """Register gauge whose value is collected when rendering."""
+        self.gauges[name] = (help, collect)
+
+    def on_timing(
+        self, stage: Stage, duration: float, *, subprotocol: str, action: str
+    ):
+        # Stage is a str so it's used as is without costly Enum.value lookup
+        key = (stage, subprotocol, action)
+        histogram = self.timings.get(key)
+        if histogram is None:
+            histogram = self.timings[key] = Histogram(self.buckets)
+        histogram.observe(duration)
+
+    def on_count(
+        self,
+        counter: Counter,
+        *,
+        subprotocol: str,
+        action: str,
+        error: Optional[str] = None,
+    ):
+        key = (counter, subprotocol, action, error or "")
+        self.counters[key] = self.counters.get(key, 0) + 1
+
+    def render(self) -> str:
+        """Return metrics in Prometheus text exposition format."""
+        name = f"{self.namespace}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent in a message processing stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for (stage, subprotocol, action), histogram in sorted(self.timings.items()):
+            labels = _labels(stage=stage, subprotocol=subprotocol, action=action)
+            cumulative = 0
+            for bucket, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bucket}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        for counter, metric, help in [
+            (Counter.call_received, "calls_received", "Calls received."),
+            (Counter.call_sent, "calls_sent", "Calls sent to Charging Stations."),
+            (Counter.error, "errors", "Errors by exception type."),
+            (Counter.cache_hit, "cache_hits", "Calls responded from cache."),
+            (Counter.cache_miss, "cache_misses", "Cacheable calls not in cache."),
+            (Counter.replay_hit, "replay_hits", "Duplicate calls replayed."),
+            (Counter.replay_miss, "replay_misses", "Calls not seen before."),
+        ]:
+            name = f"{self.namespace}_{metric}_total"
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} counter")
+            for (key, subprotocol, action, error), count in sorted(
+                self.counters.items()
+            ):
+                if key != counter:
+                    continue
+                labels = {"subprotocol": subprotocol, "action": action}
+                if counter == Counter.error:
+                    labels["error"] = error
+                lines.append(f"{name}{{{_labels(**labels)}}} {count}")
+        for metric, (help, collect) in sorted(self.gauges.items()):
+            name = f"{self.namespace}_{metric}"
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {collect()}")
+        return "\n".join(lines) + "\n"
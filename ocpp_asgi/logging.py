@@ -1,7 +1,70 @@
+import itertools
 import logging
 import os
+from typing import Any, Dict
 
 FORMAT = "[%(funcName)s - %(lineno)s] %(message)s"
 log = logging.getLogger("ocpp-asgi")
 logging.basicConfig(format=FORMAT)
 log.setLevel(os.getenv("LOGLEVEL", "INFO"))
+
+
+class StructuredMessage:
+    """Log message formatted lazily i.e. only when the record is emitted.
+
+    Renders as 'event key=value ...'. Fields are also available for structured
+    log handlers via record.fields.
+    """
+
+    __slots__ = ("event", "fields")
+
+    def __init__(self, event: str, fields: Dict[str, Any]):
+        self.event = event
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return " ".join(
+            [self.event] + [f"{key}={value!r}" for key, value in self.fields.items()]
+        )
+
+
+def debug_enabled() -> bool:
+    """Return True if debug level records of ocpp-asgi logger are emitted."""
+    return log.isEnabledFor(logging.DEBUG)
+
+
+def trace(event: str, /, **fields):
+    """Log debug level structured record. No formatting when debug is disabled."""
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(
+            StructuredMessage(event, fields), extra={"fields": fields}, stacklevel=2
+        )
+
+
+# Per-message traces are sampled: 1 of every _sample_interval is logged
+_sample_interval = 1
+_sample_counter = itertools.count()
+
+
+def set_trace_sampling(rate: float):
+    """Set the fraction (0.0 - 1.0) of per-message traces which are logged."""
+    global _sample_interval
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError(f"Invalid sampling {rate=}")
+    _sample_interval = round(1 / rate) if rate > 0.0 else 0
+
+
+def trace_message(event: str, /, **fields):
+    """Log sampled debug level structured record of a single OCPP message.
+
+    Use on per-message hot path. No formatting when debug is disabled.
+    """
+    if log.isEnabledFor(logging.DEBUG):
+        if _sample_interval == 0 or next(_sample_counter) % _sample_interval:
+            return
+        log.debug(
+            StructuredMessage(event, fields), extra={"fields": fields}, stacklevel=2
+        )
+
+
+set_trace_sampling(float(os.getenv("LOGSAMPLE", "1.0")))
@@ -0,0 +1,54 @@
+from typing import List, Union
+
+from ocpp.exceptions import (
+    FormatViolationError,
+    PropertyConstraintViolationError,
+    ProtocolError,
+)
+from ocpp.messages import Call, CallError, CallResult
+
+from ocpp_asgi.codec import JSONCodec, json_codec
+
+Message = Union[Call, CallResult, CallError]
+
+_message_classes = {cls.message_type_id: cls for cls in [Call, CallResult, CallError]}
+
+
+def parse_message(
+    data: Union[str, bytes, List], codec: JSONCodec = json_codec
+) -> Message:
+    """Decode OCPP-J frame into Call, CallResult or CallError.
+
+    Frame is decoded only once and the resulting message object is passed as is
+    through the application and router. Already decoded frame (list) is accepted
+    as well e.g. when OCPP-J frame is embedded as JSON array in HTTP event.
+    Bytes are decoded as is without converting them to str first.
+
+    Raises OCPPError if frame is not a valid OCPP-J message.
+    """
+    if not isinstance(data, list):
+        try:
+            data = codec.loads(data)
+        except (ValueError, TypeError):
+            raise FormatViolationError(details={"cause": "Message is not valid JSON"})
+        if not isinstance(data, list):
+            raise ProtocolError(
+                details={
+                    "cause": (
+                        "OCPP message hasn't the correct format. It "
+                        f"should be a list, but got '{type(data)}' instead"
+                    )
+                }
+            )
+    if len(data) == 0:
+        raise ProtocolError(details={"cause": "Message does not contain MessageTypeId"})
+    try:
+        cls = _message_classes[data[0]]
+    except (KeyError, TypeError):
+        raise PropertyConstraintViolationError(
+            details={"cause": f"MessageTypeId '{data[0]}' isn't valid"}
+        )
+    try:
+        return cls(*data[1:])
+    except TypeError:
+        raise ProtocolError(details={"cause": "Message is missing elements."})
@@ -0,0 +1,165 @@
+import asyncio
+import heapq
+from enum import IntEnum
+from typing import Dict, List, Optional
+
+
+class Priority(IntEnum):
+    """Priority class of an outbound call, lower value is sent first."""
+
+    high = 0
+    normal = 1
+    low = 2
+
+
+# Default priority by action, other actions are Priority.normal
+action_priorities: Dict[str, Priority] = {
+    # Stopping a transaction or the station is time critical
+    "RemoteStopTransaction": Priority.high,
+    "RequestStopTransaction": Priority.high,
+    "UnlockConnector": Priority.high,
+    "Reset": Priority.high,
+    # Maintenance operations can wait
+    "GetDiagnostics": Priority.low,
+    "GetLog": Priority.low,
+    "UpdateFirmware": Priority.low,
+    "SignedUpdateFirmware": Priority.low,
+    "GetLocalListVersion": Priority.low,
+    "SendLocalList": Priority.low,
+    "GetConfiguration": Priority.low,
+    "GetBaseReport": Priority.low,
+    "GetReport": Priority.low,
+}
+
+
+def priority_of(action: str) -> Priority:
+    """Return default priority of outbound call of action."""
+    return action_priorities.get(action, Priority.normal)
+
+
+class CallExpiredError(asyncio.TimeoutError):
+    """Call expired in the outbound queue and was never sent."""
+
+
+class OutboundQueue:
+    """Outbound calls of a single Charging Station.
+
+    OCPP allows only one outstanding call per Charging Station. Calls submitted
+    while another call is waiting for its response are queued by priority and
+    in order of submission within a priority. The next call is sent as soon as
+    the previous call completes. A queued call with a timeout expires with
+    CallExpiredError without ever being sent.
+
+    A call is sent after try_acquire returns True or acquire returns, and
+    release must be invoked when the call has completed. Once the connection is
+    gone the queue is closed and queued and later calls fail.
+    """
+
+    __slots__ = ("_heap", "_busy", "_queued", "_sequence", "_closed")
+
+    def __init__(self):
+        # [priority, sequence, future granting the turn, active]
+        self._heap: List[list] = []
+        self._busy = False
+        self._queued = 0
+        self._sequence = 0
+        # Raised by acquire and try_acquire once closed
+        self._closed: Optional[ConnectionError] = None
+
+    def __len__(self) -> int:
+        """Number of calls waiting for their turn."""
+        return self._queued
+
+    @property
+    def busy(self) -> bool:
+        """True while a call is waiting for its response."""
+        return self._busy
+
+    def try_acquire(self) -> bool:
+        """Take the turn without waiting if no call is outstanding or queued."""
+        if self._closed is not None:
+            raise self._closed
+        if self._busy or self._queued > 0:
+            return False
+        self._busy = True
+        return True
+
+    async def acquire(
+        self, priority: Priority = Priority.normal, timeout: Optional[float] = None
+    ):
+        """Wait for the turn of a call.
+
+        Args:
+            priority (Priority): Priority class of the call.
+            timeout (float): How long the call may wait in the queue before
+                expiring with CallExpiredError, in seconds. None waits
+                indefinitely.
+
+        Raises ConnectionError if the queue is closed.
+        """
+        if self.try_acquire():
+            return
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._sequence += 1
+        entry = [priority, self._sequence, future, True]
+        heapq.heappush(self._heap, entry)
+        self._queued += 1
+        handle = None
+        if timeout is not None:
+            handle = loop.call_later(timeout, self._expire, entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # Turn was granted but the caller is gone, pass it on
+                self.release()
+            else:
+                self._discard(entry)
+            raise
+        finally:
+            if handle is not None:
+                handle.cancel()
+
+    def _expire(self, entry: list):
+        future: asyncio.Future = entry[2]
+        if not future.done():
+            self._discard(entry)
+            future.set_exception(CallExpiredError("Call expired before it was sent"))
+
+    def _discard(self, entry: list):
+        if entry[3]:
+            entry[3] = False
+            self._queued -= 1
+
+    def release(self):
+        """Pass the turn to the next queued call. Invoked when a call completes."""
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if not entry[3]:
+                continue
+            self._discard(entry)
+            future: asyncio.Future = entry[2]
+            if not future.done():
+                future.set_result(None)
+                return
+        self._busy = False
+
+    def close(self, exc: Optional[ConnectionError] = None):
+        """Fail queued calls and every later call, invoked on disconnect.
+
+        Args:
+            exc (ConnectionError): Exception raised to the calls. Defaults to
+                ConnectionError.
+        """
+        if self._closed is not None:
+            return
+        self._closed = exc if exc is not None else ConnectionError("Connection closed")
+        heap, self._heap = self._heap, []
+        for entry in heap:
+            if not entry[3]:
+                continue
+            self._discard(entry)
+            future: asyncio.Future = entry[2]
+            if not future.done():
+                future.set_exception(self._closed)
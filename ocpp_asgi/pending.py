@@ -0,0 +1,204 @@
+import asyncio
+import math
+from typing import Callable, Dict, Optional, Set
+
+from ocpp_asgi.logging import log
+from ocpp_asgi.messages import Message
+
+
+class Timer:
+    """Handle of a callback scheduled in TimerWheel."""
+
+    __slots__ = ("tick", "callback")
+
+    def __init__(self, tick: int, callback: Callable[[], None]):
+        self.tick = tick
+        self.callback = callback
+
+
+class TimerWheel:
+    """Hashed timer wheel for large number of timeouts.
+
+    Timers are bucketed into slots by their deadline tick. A single event loop
+    timer advances the wheel once per resolution and only while there are
+    scheduled timers. Timers fire within one resolution after their delay.
+    """
+
+    def __init__(self, *, resolution: float = 0.1, slots: int = 512):
+        """Initialize TimerWheel instance.
+
+        Args:
+            resolution (float): Length of a tick in seconds.
+            slots (int): Number of slots in the wheel.
+        """
+        self.resolution = resolution
+        self._slots = [set() for _ in range(slots)]
+        self._count = 0
+        self._tick = 0
+        self._start = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> Timer:
+        """Schedule callback to be called after delay seconds."""
+        if self._handle is None:
+            self._start_ticking()
+        ticks = max(1, math.ceil(delay / self.resolution))
+        timer = Timer(self._current_tick() + ticks, callback)
+        self._slots[timer.tick % len(self._slots)].add(timer)
+        self._count += 1
+        return timer
+
+    def cancel(self, timer: Timer):
+        slot: Set[Timer] = self._slots[timer.tick % len(self._slots)]
+        if timer in slot:
+            slot.remove(timer)
+            self._count -= 1
+
+    def _current_tick(self) -> int:
+        return int((self._loop.time() - self._start) / self.resolution)
+
+    def _start_ticking(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._start = loop.time()
+        self._tick = self._current_tick()
+        self._schedule_advance()
+
+    def _schedule_advance(self):
+        when = self._start + (self._tick + 1) * self.resolution
+        self._handle = self._loop.call_at(when, self._advance)
+
+    def _advance(self):
+        now = self._current_tick()
+        if now - self._tick >= len(self._slots):
+            slots = self._slots
+        else:
+            slots = [
+                self._slots[tick % len(self._slots)]
+                for tick in range(self._tick + 1, now + 1)
+            ]
+        self._tick = now
+        for slot in slots:
+            expired = [timer for timer in slot if timer.tick <= now]
+            for timer in expired:
+                slot.remove(timer)
+                self._count -= 1
+                try:
+                    timer.callback()
+                except Exception as e:
+                    log.error("Failure in timer callback: %r", e)
+        if self._count > 0:
+            self._schedule_advance()
+        else:
+            self._handle = None
+
+
+class PendingCalls:
+    """Registry of outbound calls waiting for CallResult or CallError.
+
+    Calls are keyed by (charging_station_id, unique_id) and backed by futures.
+    Registry is sharded by charging station so that all pending calls of a
+    connection can be cancelled in bulk when it disconnects.
+    """
+
+    def __init__(self, *, timer_wheel: Optional[TimerWheel] = None):
+        self._timer_wheel = timer_wheel if timer_wheel is not None else TimerWheel()
+        self._calls: Dict[str, Dict[str, asyncio.Future]] = {}
+        self._timers: Dict[asyncio.Future, Timer] = {}
+
+    def __len__(self) -> int:
+        return sum(len(calls) for calls in self._calls.values())
+
+    def register(
+        self, charging_station_id: str, unique_id: str, timeout: Optional[float]
+    ) -> asyncio.Future:
+        """Register a call and return future for its response.
+
+        Future raises asyncio.TimeoutError if no response is resolved within
+        timeout seconds (None for no timeout).
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._calls.setdefault(charging_station_id, {})[unique_id] = future
+        if timeout is not None:
+            self._timers[future] = self._timer_wheel.schedule(
+                timeout,
+                lambda: self._finish(
+                    charging_station_id, unique_id, exception=asyncio.TimeoutError()
+                ),
+            )
+        return future
+
+    def resolve(self, charging_station_id: str, message: Message) -> bool:
+        """Deliver CallResult or CallError to the waiting call.
+
+        @return bool: False if there is no such pending call e.g. it has timed out.
+        """
+        return self._finish(charging_station_id, message.unique_id, result=message)
+
+    def fail(
+        self, charging_station_id: str, unique_id: str, exception: Exception
+    ) -> bool:
+        """Fail the waiting call with exception e.g. when it couldn't be delivered.
+
+        @return bool: False if there is no such pending call.
+        """
+        return self._finish(charging_station_id, unique_id, exception=exception)
+
+    def discard(self, charging_station_id: str, unique_id: str):
+        """Forget pending call without resolving it."""
+        future = self._pop(charging_station_id, unique_id)
+        if future is not None and not future.done():
+            future.cancel()
+
+    def cancel_connection(
+        self, charging_station_id: str, exception: Optional[Exception] = None
+    ) -> int:
+        """Fail all pending calls of the charging station e.g. on disconnect.
+
+        @return int: Number of cancelled calls.
+        """
+        calls = self._calls.pop(charging_station_id, {})
+        for future in calls.values():
+            self._cancel_timer(future)
+            if not future.done():
+                future.set_exception(
+                    exception or ConnectionError(f"{charging_station_id=} disconnected")
+                )
+        return len(calls)
+
+    def _finish(
+        self,
+        charging_station_id: str,
+        unique_id: str,
+        result: Optional[Message] = None,
+        exception: Optional[Exception] = None,
+    ) -> bool:
+        future = self._pop(charging_station_id, unique_id)
+        if future is None or future.done():
+            return False
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+        return True
+
+    def _pop(self, charging_station_id: str, unique_id: str) -> asyncio.Future:
+        calls = self._calls.get(charging_station_id)
+        if calls is None:
+            return None
+        future = calls.pop(unique_id, None)
+        if not calls:
+            del self._calls[charging_station_id]
+        if future is not None:
+            self._cancel_timer(future)
+        return future
+
+    def _cancel_timer(self, future: asyncio.Future):
+        timer = self._timers.pop(future, None)
+        if timer is not None:
+            self._timer_wheel.cancel(timer)
@@ -0,0 +1,301 @@
+import asyncio
+from typing import Any, Dict, Iterable, Optional, Union
+
+from ocpp.exceptions import OCPPError
+
+from ocpp_asgi.asgi import (
+    ASGILifeSpanEvent,
+    ASGILifeSpanShutDown,
+    ASGILifeSpanStartup,
+    ASGIScope,
+    ASGIWebSocketEvent,
+    Receive,
+    Scope,
+    Send,
+)
+from ocpp_asgi.channel import Channel
+from ocpp_asgi.codec import JSONCodec, get_codec
+from ocpp_asgi.connections import ConnectionRegistry
+from ocpp_asgi.logging import log, trace_message
+from ocpp_asgi.router import Subprotocol
+from ocpp_asgi.transport import HTTPTransport
+from ocpp_asgi.utils import create_call_error
+
+
+class ProxyConnection:
+    """Websocket connection of a Charging Station to WebSocketProxy."""
+
+    __slots__ = (
+        "charging_station_id",
+        "subprotocol",
+        "send",
+        "outbound",
+        "in_flight",
+        "write_lock",
+    )
+
+    def __init__(
+        self, charging_station_id: str, subprotocol: str, send: Send, in_flight: int
+    ):
+        self.charging_station_id = charging_station_id
+        self.subprotocol = subprotocol
+        self.send = send
+        # Responses of forwarded frames as futures, in order of the frames
+        self.outbound: asyncio.Queue = asyncio.Queue()
+        self.in_flight = asyncio.Semaphore(in_flight)
+        # Responses and server-initiated messages are sent one frame at a time
+        self.write_lock = asyncio.Lock()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(charging_station_id="
+            f"{self.charging_station_id!r}, subprotocol={self.subprotocol!r})"
+        )
+
+
+class WebSocketProxy:
+    """ASGI application proxying websocket connections to an HTTP Central System.
+
+    Every OCPP-J frame received from a Charging Station is posted as an http
+    event to the HTTP Central System, see ASGIApplication.http_parse_event, and
+    the response frame is sent back to the Charging Station. Responses are sent
+    in the order the frames were received. Connections to the Central System are
+    pooled by HTTPTransport and frames of many connections are coalesced into
+    batched http events when the transport has batch_size greater than 1.
+
+    The number of frames being forwarded is bounded in total and per connection.
+    When a bound is reached, receiving from the websocket waits, which pushes
+    back to the Charging Station through the ASGI server.
+
+    Server-initiated messages are received through a single channel
+    subscription as JSON envelopes {"charging_station_id": .., "message": ..}
+    and sent to the Charging Station right away if it's connected to this proxy,
+    without waiting for responses of frames being forwarded.
+    """
+
+    def __init__(
+        self,
+        *,
+        url: str,
+        transport: Optional[HTTPTransport] = None,
+        channel: Optional[Channel] = None,
+        channel_key: str = "connections",
+        max_in_flight: int = 1000,
+        max_in_flight_per_connection: int = 1,
+        subprotocols: Iterable[str] = (
+            Subprotocol.ocpp201.value,
+            Subprotocol.ocpp20.value,
+            Subprotocol.ocpp16.value,
+        ),
+        codec: Optional[Union[str, JSONCodec]] = None,
+    ):
+        """Initialize WebSocketProxy instance.
+
+        Args:
+            url (str): HTTP Central System endpoint.
+            transport (HTTPTransport): Pooled HTTP client. Defaults to one with
+                max_in_flight connections.
+            channel (Channel): Channel of server-initiated messages.
+            channel_key (str): Key of server-initiated messages in the channel.
+            max_in_flight (int): Maximum number of frames being forwarded.
+            max_in_flight_per_connection (int): Maximum number of frames of a
+                connection being forwarded. With 1 the Central System receives
+                frames of a connection in order. Larger values pipeline frames,
+                responses are still sent in order.
+            subprotocols (Iterable): Supported subprotocols in order of
+                preference.
+            codec (JSONCodec): JSON codec for http events, see get_codec.
+        """
+        self.url = url
+        self.transport = (
+            transport if transport is not None else HTTPTransport(limit=max_in_flight)
+        )
+        self.channel = channel
+        self.channel_key = channel_key
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_per_connection = max_in_flight_per_connection
+        self.subprotocols = [getattr(s, "value", s) for s in subprotocols]
+        self.codec: JSONCodec = get_codec(codec)
+        self.connections = ConnectionRegistry()
+        # Created in the event loop of the server, see _in_flight_limit
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._subscription: Optional[asyncio.Task] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == ASGIScope.websocket:
+            await self.websocket_handler(scope, receive, send)
+        elif scope["type"] == ASGIScope.lifespan:
+            await self.lifespan_handler(scope, receive, send)
+        else:
+            raise ValueError(f'Unsupported ASGI scope type: {scope["type"]}')
+
+    async def start(self):
+        """Start transport and channel subscription. Invoked on lifespan startup."""
+        self._in_flight_limit()
+        await self.transport.start()
+        if self.channel is not None and self._subscription is None:
+            self._subscription = asyncio.ensure_future(self._subscribe())
+
+    async def stop(self):
+        """Stop channel subscription and transport. Invoked on lifespan shutdown."""
+        if self._subscription is not None:
+            self._subscription.cancel()
+            await asyncio.gather(self._subscription, return_exceptions=True)
+            self._subscription = None
+        await self.transport.stop()
+
+    async def lifespan_handler(self, scope: Scope, receive: Receive, send: Send):
+        while True:
+            event = await receive()
+            if event["type"] == ASGILifeSpanEvent.startup.value:
+                try:
+                    await self.start()
+                    await send({"type": ASGILifeSpanStartup.complete.value})
+                except Exception:
+                    await send({"type": ASGILifeSpanStartup.failed.value})
+            elif event["type"] == ASGILifeSpanEvent.shutdown.value:
+                try:
+                    await self.stop()
+                    await send({"type": ASGILifeSpanShutDown.complete.value})
+                except Exception:
+                    await send({"type": ASGILifeSpanShutDown.failed.value})
+                return
+
+    async def websocket_handler(self, scope: Scope, receive: Receive, send: Send):
+        connection: Optional[ProxyConnection] = None
+        writer: Optional[asyncio.Task] = None
+        try:
+            while True:
+                event = await receive()
+                trace_message("event", event=event)
+                if event["type"] == ASGIWebSocketEvent.receive:
+                    text = event.get("text")
+                    if text is None:
+                        text = event["bytes"].decode("utf-8")
+                    # Wait for free capacity before receiving more frames
+                    await connection.in_flight.acquire()
+                    await self._in_flight.acquire()
+                    connection.outbound.put_nowait(
+                        asyncio.ensure_future(self._forward(connection, text))
+                    )
+                elif event["type"] == ASGIWebSocketEvent.connect:
+                    self._in_flight_limit()
+                    connection = self._create_connection(scope, send)
+                    if connection is None or not await self.on_connect(connection):
+                        await send({"type": ASGIWebSocketEvent.close.value})
+                        break
+                    self.connections.add(connection)
+                    writer = asyncio.ensure_future(self._write(connection))
+                    await send(
+                        {
+                            "type": ASGIWebSocketEvent.accept.value,
+                            "subprotocol": connection.subprotocol,
+                        }
+                    )
+                elif event["type"] == ASGIWebSocketEvent.disconnect:
+                    if connection is not None:
+                        self.connections.remove(connection)
+                        await self.on_disconnect(connection, code=event["code"])
+                    break
+        finally:
+            if connection is not None:
+                self.connections.remove(connection)
+            if writer is not None:
+                writer.cancel()
+                await asyncio.gather(writer, return_exceptions=True)
+
+    # Handlers to override in subclass
+
+    async def on_connect(self, connection: ProxyConnection) -> bool:
+        """Invoked when websocket connection is being established.
+
+        @return bool: True if connection is allowed, False if rejected.
+        """
+        return True
+
+    async def on_disconnect(self, connection: ProxyConnection, *, code: int):
+        """Invoked when websocket connection is disconnected."""
+        pass
+
+    def build_http_event(self, connection: ProxyConnection, frame: str) -> Any:
+        """Build http event carrying frame of connection to Central System.
+
+        Counterpart of ASGIApplication.http_parse_event of the Central System.
+        """
+        return {
+            "requestContext": {
+                "connection_id": connection.charging_station_id,
+                "subprotocols": [connection.subprotocol],
+            },
+            "body": frame,
+        }
+
+    # Private
+
+    def _in_flight_limit(self) -> asyncio.Semaphore:
+        # On Python < 3.10 a semaphore binds to the event loop current at its
+        # creation, which may not be the loop of the server
+        if self._in_flight is None:
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        return self._in_flight
+
+    def _create_connection(self, scope: Scope, send: Send) -> Optional[ProxyConnection]:
+        offered = scope.get("subprotocols", [])
+        for subprotocol in self.subprotocols:
+            if subprotocol in offered:
+                return ProxyConnection(
+                    scope["path"].strip("/"),
+                    subprotocol,
+                    send,
+                    self.max_in_flight_per_connection,
+                )
+        return None
+
+    async def _forward(self, connection: ProxyConnection, frame: str) -> Optional[str]:
+        """Post frame to Central System and return response frame if any."""
+        try:
+            document = self.codec.dumps(self.build_http_event(connection, frame))
+            if self.transport.batch_size > 1:
+                return await self.transport.post_batched(self.url, document)
+            return await self.transport.post(self.url, document) or None
+        except Exception as e:
+            log.error(
+                "Failure when forwarding frame of %r: %r",
+                connection.charging_station_id,
+                e,
+            )
+            # Call must be responded even if Central System couldn't be reached
+            try:
+                return create_call_error(frame)
+            except (ValueError, OCPPError):
+                return None
+        finally:
+            self._in_flight.release()
+            connection.in_flight.release()
+
+    async def _write(self, connection: ProxyConnection):
+        while True:
+            text = await (await connection.outbound.get())
+            if text is not None:
+                await self._send(connection, text)
+
+    async def _send(self, connection: ProxyConnection, text: str):
+        try:
+            async with connection.write_lock:
+                await connection.send(
+                    {"type": ASGIWebSocketEvent.send.value, "text": text}
+                )
+        except Exception as e:
+            log.error(
+                "Failure when sending to %r: %r", connection.charging_station_id, e
+            )
+
+    async def _subscribe(self):
+        async for value in self.channel.subscribe(self.channel_key):
+            try:
+                envelope: Dict[str, str] = self.codec.loads(value)
+                connection = self.connections.get(envelope["charging_station_id"])
+                if connection is not None:
+                    await self._send(connection, envelope["message"])
+            except Exception as e:
+                log.error("Unable to deliver server-initiated message %r: %r", value, e)
@@ -3,16 +3,50 @@ from __future__ import annotations
 import asyncio
 import functools
 import inspect
+import time
 import uuid
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Awaitable, Callable, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from ocpp.charge_point import camel_to_snake_case, remove_nones, snake_to_camel_case
 from ocpp.exceptions import NotImplementedError, OCPPError
-from ocpp.messages import Call, MessageType, unpack, validate_payload
-
-from ocpp_asgi.logging import log
+from ocpp.messages import Call, MessageType
+
+from ocpp_asgi.cache import ReplayWindow, ResponseCache, call_fingerprint
+from ocpp_asgi.casing import case_table
+from ocpp_asgi.codec import JSONCodec, get_codec
+from ocpp_asgi.dispatch import ActionEntry, create_dispatch_table
+from ocpp_asgi.executor import AfterHandlerExecutor
+from ocpp_asgi.instrumentation import (
+    Counter,
+    Instrumentation,
+    Instruments,
+    Stage,
+    null_timer,
+)
+from ocpp_asgi.logging import log, trace_message
+from ocpp_asgi.messages import Message, parse_message
+from ocpp_asgi.outbound import CallExpiredError, OutboundQueue, Priority, priority_of
+from ocpp_asgi.pending import PendingCalls
+from ocpp_asgi.serialization import (
+    encode_call,
+    encode_call_error,
+    encode_call_result,
+    payload_to_wire,
+)
+from ocpp_asgi.validation import ValidatorCache, validator_cache
+
+_CALL_RESULT = int(MessageType.CallResult)
 
 
 class Subprotocol(str, Enum):
@@ -23,45 +57,124 @@ class Subprotocol(str, Enum):
 
 @dataclass
 class OCPPAdapter:
-    """OCPPAdapter encapsulates OCPP version specific call and call_result methods."""
+    """OCPPAdapter encapsulates OCPP version specific call and call_result methods.
+
+    A single instance per subprotocol is shared by all connections.
+    """
+
+    __slots__ = ("ocpp_version", "call", "call_result")
 
     ocpp_version: str
     call: Awaitable[Any]
     call_result: Awaitable[Any]
 
 
-@dataclass
 class RouterContext:
-    """RouterContext instance is passed to router."""
+    """RouterContext instance is passed to router.
+
+    In WebSocket mode a single RouterContext lives for the whole connection and
+    only body is updated per received message. In HTTP mode a RouterContext is
+    created per request.
+
+    Context is kept compact as there is one per connection: only path and headers
+    are extracted from ASGI scope, subprotocol and ocpp_adapter are shared by all
+    connections and outbound call queue is created on first use.
+    """
+
+    __slots__ = (
+        "path",
+        "headers",
+        "body",
+        "subprotocol",
+        "ocpp_adapter",
+        "send",
+        "charging_station_id",
+        "handler_context",
+        "_outbound",
+    )
 
-    scope: dict  # Store ASGI scope dictionary as is
-    body: dict  # Store ASGI content mainly to avoid parsing http event twice
-    subprotocol: Subprotocol
-    ocpp_adapter: OCPPAdapter
-    send: Callable[[str, bool, RouterContext], Awaitable[None]]
-    charging_station_id: str
-    queue: Any
-    call_lock: Any
+    def __init__(
+        self,
+        *,
+        scope: dict,
+        body: Optional[Union[str, bytes]],
+        subprotocol: Subprotocol,
+        ocpp_adapter: Optional[OCPPAdapter],
+        send: Callable[[str, bool, RouterContext], Awaitable[None]],
+        charging_station_id: str,
+        outbound: Optional[OutboundQueue] = None,
+        handler_context: Optional[HandlerContext] = None,
+    ):
+        self.path: str = scope.get("path", "")
+        # ASGI headers as is i.e. iterable of [name, value] byte string pairs
+        self.headers: Iterable = scope.get("headers", ())
+        # Body of the message currently being processed
+        self.body = body
+        self.subprotocol = subprotocol
+        self.ocpp_adapter = ocpp_adapter
+        self.send = send
+        self.charging_station_id = charging_station_id
+        # HandlerContext is created lazily by router on first call and reused
+        self.handler_context = handler_context
+        self._outbound = outbound
+
+    @property
+    def scope(self) -> dict:
+        """Subset of ASGI scope retained by the context."""
+        return {"path": self.path, "headers": self.headers}
+
+    @property
+    def outbound(self) -> OutboundQueue:
+        """Queue allowing only one outbound call at a time to Charging Station."""
+        if self._outbound is None:
+            self._outbound = OutboundQueue()
+        return self._outbound
+
+    def __repr__(self) -> str:
+        return (
+            f"RouterContext(charging_station_id={self.charging_station_id!r}, "
+            f"subprotocol={self.subprotocol!r}, path={self.path!r})"
+        )
 
 
 @dataclass
 class HandlerContext:
     """HandlerContext instance is passed to handler."""
 
+    __slots__ = ("charging_station_id", "_router_context", "_router")
+
     charging_station_id: str
     # References to RouterContext and Router added here so that
     # we can send messages to specific Charging Station, which initiated messaging.
     _router_context: RouterContext
     _router: Router
 
-    async def send(self, message: dataclass) -> Any:
-        """Send message to Charging Station within action handler."""
-        # Use a lock to prevent make sure that only 1 message can be send at a
-        # a time.
-        async with self._router_context.call_lock:
-            return await self._router.call(
-                message=message, context=self._router_context
-            )
+    async def send(
+        self,
+        message: dataclass,
+        *,
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Send message to Charging Station within action handler.
+
+        Only one message is sent at a time, see Router.enqueue_call.
+        """
+        return await self._router.enqueue_call(
+            message=message,
+            context=self._router_context,
+            priority=priority,
+            timeout=timeout,
+        )
+
+
+@dataclass
+class FanOutResult:
+    """Outcome of a fan-out call for a single Charging Station."""
+
+    charging_station_id: str
+    response: Any = None
+    error: Optional[Exception] = None
 
 
 def subprotocol_to_ocpp_version(subprotocol: str) -> str:
@@ -80,6 +193,10 @@ class Router:
         subprotocol: Subprotocol,
         response_timeout: Optional[int] = 30,
         create_task: bool = True,
+        validators: Optional[ValidatorCache] = None,
+        codec: Optional[Union[str, JSONCodec]] = None,
+        after_handlers: Optional[AfterHandlerExecutor] = None,
+        replay_window: Optional[ReplayWindow] = None,
     ):
         """Initialize Router instance.
 
@@ -87,10 +204,25 @@ class Router:
             subprotocol (Subprotocol): Defines the ocpp protocol version for this router
             response_timeout (int): When no response on a request is received
                 within this interval, a asyncio.TimeoutError is raised.
-            create_task (bool): Create asyncio.Task for executing
-                "after"-handler. Does not affect "on-handler".
+            create_task (bool): Execute "after"-handler in after_handlers worker
+                pool instead of awaiting it. Does not affect "on-handler".
+            validators (ValidatorCache): Compiled schema validators. By default
+                validators are shared by all routers.
+            codec (JSONCodec): JSON codec or its name, see get_codec. By default
+                router uses the codec of ASGIApplication it's included in.
+            after_handlers (AfterHandlerExecutor): Bounded worker pool for
+                executing "after"-handlers. Defaults to pool with default limits.
+            replay_window (ReplayWindow): Record responses of recent Calls per
+                Charging Station and replay them to Calls retransmitted with the
+                same unique id instead of handling them again.
         """
         self.subprotocol = subprotocol
+        self.ocpp_version = subprotocol_to_ocpp_version(subprotocol)
+        self.validators = validators or validator_cache
+        self.case_table = case_table(self.ocpp_version)
+        self.codec = get_codec(codec)
+        # Router without explicit codec inherits codec from ASGIApplication
+        self.inherit_codec = codec is None
 
         # The maximum time in seconds it may take for a CP to respond to a
         # CALL. An asyncio.TimeoutError will be raised if this limit has been
@@ -109,24 +241,96 @@ class Router:
         #     },
         # }
         self._route_map = {}
+        # Frozen ActionEntry per action built from _route_map. Rebuilt lazily
+        # whenever handlers are added.
+        self._dispatch_table: Optional[Dict[str, ActionEntry]] = None
 
         # Function used to generate unique ids for CALLs. By default
         # uuid.uuid4() is used, but it can be changed. This is meant primarily
         # for testing purposes to have predictable unique ids.
         self._unique_id_generator = uuid.uuid4
 
-        # Use asyncio.create_task for "after"-handler.
+        # Execute "after"-handler in worker pool.
         self._create_task = create_task
-        self._response_queue = asyncio.Queue()  # TODO: Rework for serverless scenario
+        self.after_handlers = (
+            after_handlers if after_handlers is not None else AfterHandlerExecutor()
+        )
 
-        # Dictionary for storing subscribers for, which are waiting for CallResult or
-        # CallErrors.
+        # Registry of calls, which are waiting for CallResult or CallErrors.
         # TODO: This approach doesn't work in serverless cloud scenario as response will
         # not be delivered to same handler instance (i.e. Lambda) which originated the
         # request. A different high performance PubSub is needed.
-        self.subscriptions = {}
+        self.pending_calls = PendingCalls()
+        self.replay_window = replay_window
+
+        # Instrumentation hooks. Stages are not timed at all when there are none.
+        self.instrumentation: Optional[Instruments] = None
+        self._subprotocol_label = getattr(subprotocol, "value", subprotocol)
+
+    @property
+    def response_timeout(self) -> Optional[float]:
+        """Time in seconds a call waits for its response, None for no limit."""
+        return self._response_timeout
+
+    def add_instrumentation(self, hook: Instrumentation):
+        """Register hook receiving stage timings and counts, see Instrumentation."""
+        if self.instrumentation is None:
+            self.instrumentation = Instruments()
+        self.instrumentation.add(hook)
+
+    def build_dispatch_table(self):
+        """Resolve handlers, payload classes and validators for every action.
+
+        Invoked by ASGIApplication.include_router. Compiles all schema validators
+        for router's ocpp version.
+        """
+        self.validators.preload(self.ocpp_version)
+        self._dispatch_table = create_dispatch_table(
+            ocpp_version=self.ocpp_version,
+            route_map=self._route_map,
+            validators=self.validators,
+        )
+
+    def lookup(self, action: str) -> Optional[ActionEntry]:
+        """Return ActionEntry for action or None if action is unknown."""
+        if self._dispatch_table is None:
+            self.build_dispatch_table()
+        return self._dispatch_table.get(action)
+
+    def _timer(self, stage: Stage, action: str):
+        if self.instrumentation is None:
+            return null_timer
+        return self.instrumentation.timer(
+            stage, subprotocol=self._subprotocol_label, action=action
+        )
+
+    def _count(self, counter: Counter, action: str, error: Optional[Exception] = None):
+        if self.instrumentation is not None:
+            self.instrumentation.on_count(
+                counter,
+                subprotocol=self._subprotocol_label,
+                action=action,
+                error=type(error).__name__ if error is not None else None,
+            )
+
+    def on(
+        self,
+        action,
+        *,
+        skip_schema_validation=False,
+        cache: Optional[ResponseCache] = None,
+    ):
+        """Register handler of Calls of action.
+
+        Args:
+            action: Action of the Call.
+            skip_schema_validation (bool): Don't validate request and response.
+            cache (ResponseCache): Cache serialized responses by (action,
+                normalized payload). A cached response is sent with the unique id
+                of the Call without validation, handler or serialization. Only
+                use for handlers returning the same response for the same payload.
+        """
 
-    def on(self, action, *, skip_schema_validation=False):
         def decorator(func):
             @functools.wraps(func)
             def inner(*args, **kwargs):
@@ -137,6 +341,8 @@ class Router:
                 self._route_map[action] = {}
             self._route_map[action][option] = func
             self._route_map[action]["_skip_schema_validation"] = skip_schema_validation
+            self._route_map[action]["_cache"] = cache
+            self._dispatch_table = None
             return inner
 
         return decorator
@@ -153,38 +359,42 @@ class Router:
             if action not in self._route_map:
                 self._route_map[action] = {}
             self._route_map[action][option] = func
+            self._dispatch_table = None
             return inner
 
         return decorator
 
-    async def route_message(self, *, message: str, context: RouterContext):
+    async def route_message(self, *, message: Message or str, context: RouterContext):
         """
         Route a message received from a Charging Station.
 
+        Message is expected to be already parsed with parse_message but also
+        a serialized OCPP-J frame is accepted.
+
         If the message is a of type Call the corresponding hooks are executed.
         If the message is of type CallResult or CallError the message is passed
-        to the call() function via the response_queue.
+        to the call() function via pending calls registry.
         """
-        try:
-            msg = unpack(message)
-        except OCPPError as e:
-            log.exception(
-                "Unable to parse message: '%s', it doesn't seem "
-                "to be valid OCPP: %s",
-                message,
-                e,
-            )
-            return
-
-        if msg.message_type_id == MessageType.Call:
-            await self._handle_call(msg, context=context)
-
-        elif msg.message_type_id in [
+        if isinstance(message, (str, bytes)):
+            try:
+                message = parse_message(message, self.codec)
+            except OCPPError as e:
+                log.exception(
+                    "Unable to parse message: '%s', it doesn't seem "
+                    "to be valid OCPP: %s",
+                    message,
+                    e,
+                )
+                return
+
+        if message.message_type_id == MessageType.Call:
+            await self._handle_call(message, context=context)
+
+        elif message.message_type_id in [
             MessageType.CallResult,
             MessageType.CallError,
         ]:
-            if msg.unique_id in self.subscriptions:
-                self.subscriptions[msg.unique_id].put_nowait(msg)
+            self.pending_calls.resolve(context.charging_station_id, message)
 
     async def _handle_call(self, msg, *, context: RouterContext = None):
         """
@@ -197,15 +407,54 @@ class Router:
         Next the '_after_action' hook is executed.
 
         """
-        ocpp_version = subprotocol_to_ocpp_version(self.subprotocol)
-
-        try:
-            handlers = self._route_map[msg.action]
-        except KeyError:
-            raise NotImplementedError(f"No handler for '{msg.action}' " "registered.")
+        self._count(Counter.call_received, msg.action)
+        fingerprint = None
+        if self.replay_window is not None:
+            fingerprint = call_fingerprint(msg.action, msg.payload)
+            response = self.replay_window.get(
+                context.charging_station_id, msg.unique_id, fingerprint
+            )
+            if response is not None:
+                self._count(Counter.replay_hit, msg.action)
+                await self._send(
+                    message=response,
+                    is_response=True,
+                    context=context,
+                    action=msg.action,
+                )
+                return
+            self._count(Counter.replay_miss, msg.action)
+
+        entry = self.lookup(msg.action)
+        if entry is None or entry.on_action is None or entry.request_class is None:
+            error = NotImplementedError(f"No handler for '{msg.action}' registered.")
+            self._count(Counter.error, msg.action, error)
+            response = encode_call_error(msg, error, self.codec)
+            await self._respond(msg, response, context, fingerprint)
+            return
 
-        if not handlers.get("_skip_schema_validation", False):
-            validate_payload(msg, ocpp_version)
+        cache_key = None
+        if entry.cache is not None:
+            cache_key = (msg.action, entry.cache.key(msg.payload))
+            cached = entry.cache.get(cache_key)
+            if cached is not None:
+                self._count(Counter.cache_hit, msg.action)
+                # Only the unique id differs from the cached frame
+                frame = f"[{_CALL_RESULT},{self.codec.dumps(msg.unique_id)}{cached}"
+                await self._respond(msg, frame, context, fingerprint)
+                if entry.after_action is not None:
+                    payload = entry.request_class(
+                        **self.case_table.to_snake(msg.payload)
+                    )
+                    await self._after_action(
+                        entry, payload, self._handler_context(context)
+                    )
+                return
+            self._count(Counter.cache_miss, msg.action)
+
+        if not entry.skip_schema_validation:
+            with self._timer(Stage.validation, msg.action):
+                entry.validate_request(msg)
 
         # OCPP uses camelCase for the keys in the payload. It's more pythonic
         # to use snake_case for keyword arguments. Therefore the keys must be
@@ -213,100 +462,336 @@ class Router:
         #
         # * chargePointVendor becomes charge_point_vendor
         # * firmwareVersion becomes firmwareVersion
-        snake_case_payload = camel_to_snake_case(msg.payload)
+        with self._timer(Stage.case_conversion, msg.action):
+            snake_case_payload = self.case_table.to_snake(msg.payload)
 
-        try:
-            handler = handlers["_on_action"]
-        except KeyError:
-            raise NotImplementedError(f"No handler for '{msg.action}' " "registered.")
-
-        handler_context = HandlerContext(
-            charging_station_id=context.charging_station_id,
-            _router_context=context,
-            _router=self,
-        )
+        handler_context = self._handler_context(context)
         # Convert message to correct Call instance
-        class_ = getattr(context.ocpp_adapter.call, f"{msg.action}Payload")
-        payload = class_(**snake_case_payload)
+        payload = entry.request_class(**snake_case_payload)
         try:
-            response = handler(payload=payload, context=handler_context)
-            if inspect.isawaitable(response):
-                response = await response
+            with self._timer(Stage.handler, msg.action):
+                response = entry.on_action(payload=payload, context=handler_context)
+                if inspect.isawaitable(response):
+                    response = await response
         except Exception as e:
             log.exception("Error while handling request '%s'", msg)
-            response = msg.create_call_error(e).to_json()
-            await self._send(message=response, is_response=True, context=context)
-
-        temp_response_payload = asdict(response)
-
-        # Remove nones ensures that we strip out optional arguments
-        # which were not set and have a default value of None
-        response_payload = remove_nones(temp_response_payload)
+            response = encode_call_error(msg, e, self.codec)
+            await self._respond(msg, response, context, fingerprint)
+            return
 
-        # The response payload must be 'translated' from snake_case to
-        # camelCase. So:
+        # Response dataclass is serialized in one pass: optional arguments which
+        # were not set are stripped out and keys are 'translated' from snake_case
+        # to camelCase. So:
         #
         # * charge_point_vendor becomes chargePointVendor
         # * firmware_version becomes firmwareVersion
-        camel_case_payload = snake_to_camel_case(response_payload)
+        with self._timer(Stage.serialization, msg.action):
+            response = msg.create_call_result(payload_to_wire(response))
+            frame = encode_call_result(response.unique_id, response.payload, self.codec)
 
-        response = msg.create_call_result(camel_case_payload)
+        if not entry.skip_schema_validation:
+            with self._timer(Stage.validation, msg.action):
+                entry.validate_response(response)
 
-        if not handlers.get("_skip_schema_validation", False):
-            validate_payload(response, ocpp_version)
+        if cache_key is not None:
+            prefix = f"[{_CALL_RESULT},{self.codec.dumps(msg.unique_id)}"
+            if frame.startswith(prefix):
+                start = len(prefix)
+                entry.cache.put(cache_key, frame[start:])
 
-        await self._send(message=response.to_json(), is_response=True, context=context)
+        await self._respond(msg, frame, context, fingerprint)
 
-        try:
-            handler = handlers["_after_action"]
-            response = handler(payload=payload, context=handler_context)
+        # '_after_action' hooks are not required.
+        if entry.after_action is not None:
+            await self._after_action(entry, payload, handler_context)
+
+    async def _respond(
+        self,
+        msg: Call,
+        frame: str,
+        context: RouterContext,
+        fingerprint: Optional[Tuple[str, int]],
+    ):
+        if fingerprint is not None:
+            self.replay_window.put(
+                context.charging_station_id, msg.unique_id, fingerprint, frame
+            )
+        await self._send(
+            message=frame, is_response=True, context=context, action=msg.action
+        )
+
+    def _handler_context(self, context: RouterContext) -> HandlerContext:
+        handler_context = context.handler_context
+        if handler_context is None:
+            handler_context = HandlerContext(
+                charging_station_id=context.charging_station_id,
+                _router_context=context,
+                _router=self,
+            )
+            context.handler_context = handler_context
+        return handler_context
+
+    async def _after_action(
+        self, entry: ActionEntry, payload: Any, handler_context: HandlerContext
+    ):
+        if self._create_task:
+            # Execute in worker pool to avoid blocking when making a call
+            # inside the after handler
+            await self.after_handlers.submit(
+                functools.partial(
+                    entry.after_action, payload=payload, context=handler_context
+                )
+            )
+        else:
+            response = entry.after_action(payload=payload, context=handler_context)
             if inspect.isawaitable(response):
-                if self._create_task:
-                    # Create task to avoid blocking when making a call
-                    # inside the after handler
-                    asyncio.ensure_future(response)
-                else:
-                    await response
-        except KeyError:
-            # '_on_after' hooks are not required. Therefore ignore exception
-            # when no '_on_after' hook is installed.
-            pass
+                await response
 
     async def call(self, *, message: Any, context: RouterContext):
-        ocpp_version = subprotocol_to_ocpp_version(self.subprotocol)
+        entry, call = self._create_call(message)
+        with self._timer(Stage.serialization, call.action):
+            frame = encode_call(call.unique_id, call.action, call.payload, self.codec)
+        return await self._send_call(
+            entry=entry, unique_id=call.unique_id, message=frame, context=context
+        )
 
-        camel_case_payload = snake_to_camel_case(asdict(message))
+    async def enqueue_call(
+        self,
+        *,
+        message: Any,
+        context: RouterContext,
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Send message through outbound queue of the Charging Station.
+
+        Message is sent when the previous outbound call to the Charging Station
+        has completed, calls of higher priority first. Priority defaults to
+        priority_of the action. Raises CallExpiredError if message isn't sent
+        within timeout seconds.
+        """
+        entry, call = self._create_call(message)
+        with self._timer(Stage.serialization, call.action):
+            frame = encode_call(call.unique_id, call.action, call.payload, self.codec)
+        if priority is None:
+            priority = priority_of(call.action)
+        return await self._submit_call(
+            entry=entry,
+            unique_id=call.unique_id,
+            message=frame,
+            context=context,
+            priority=priority,
+            timeout=timeout,
+        )
 
-        call = Call(
-            unique_id=str(self._unique_id_generator()),
-            action=message.__class__.__name__[:-7],
-            payload=remove_nones(camel_case_payload),
+    async def forward_call(
+        self,
+        *,
+        frame: str,
+        context: RouterContext,
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None,
+    ) -> Message:
+        """Send serialized Call through outbound queue of the Charging Station.
+
+        Counterpart of enqueue_call for Calls created on another worker, see
+        MessageBus. The CallResult or CallError is returned as is, it is
+        validated and converted by the worker which created the Call.
+        """
+        call = parse_message(frame, self.codec)
+        entry = self.lookup(call.action)
+        if entry is None:
+            raise NotImplementedError(
+                f"Unknown action '{call.action}' for ocpp {self.ocpp_version}."
+            )
+        if priority is None:
+            priority = priority_of(call.action)
+        return await self._submit_call(
+            entry=entry,
+            unique_id=call.unique_id,
+            message=frame,
+            context=context,
+            priority=priority,
+            timeout=timeout,
+            convert=False,
         )
 
-        validate_payload(call, ocpp_version)
+    async def fan_out(
+        self,
+        *,
+        message: Any,
+        contexts: Iterable[RouterContext],
+        concurrency: int = 100,
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[FanOutResult]:
+        """Send the same message to many Charging Stations.
+
+        Message is serialized and validated only once and only the unique id is
+        swapped per Charging Station. At most concurrency calls are outstanding
+        at a time. Calls go through outbound queues of the Charging Stations,
+        see enqueue_call. Results are yielded in order of completion.
+        """
+        entry, call = self._create_call(message)
+        if priority is None:
+            priority = priority_of(call.action)
+        # Serialized '"<Action>",{<Payload>}]' shared by all calls
+        tail = self.codec.dumps([call.action, call.payload])[1:]
+        contexts = iter(contexts)
+        results = asyncio.Queue()
+
+        async def worker():
+            for context in contexts:
+                unique_id = str(self._unique_id_generator())
+                frame = f"[{MessageType.Call},{self.codec.dumps(unique_id)},{tail}"
+                result = FanOutResult(charging_station_id=context.charging_station_id)
+                try:
+                    result.response = await self._submit_call(
+                        entry=entry,
+                        unique_id=unique_id,
+                        message=frame,
+                        context=context,
+                        priority=priority,
+                        timeout=timeout,
+                    )
+                except Exception as e:
+                    result.error = e
+                results.put_nowait(result)
+            results.put_nowait(None)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        try:
+            running = len(workers)
+            while running > 0:
+                result = await results.get()
+                if result is None:
+                    running -= 1
+                else:
+                    yield result
+        finally:
+            for task in workers:
+                task.cancel()
+
+    def _create_call(self, message: Any) -> Tuple[ActionEntry, Call]:
+        action = message.__class__.__name__[:-7]
+        entry = self.lookup(action)
+        if (
+            entry is None
+            or entry.response_class is None
+            or not isinstance(message, entry.request_class)
+        ):
+            raise NotImplementedError(
+                f"Unknown action '{action}' for ocpp {self.ocpp_version}."
+            )
+
+        with self._timer(Stage.serialization, action):
+            call = Call(
+                unique_id=str(self._unique_id_generator()),
+                action=action,
+                payload=payload_to_wire(message),
+            )
+
+        with self._timer(Stage.validation, action):
+            entry.validate_request(call)
+        return entry, call
 
-        await self._send(message=call.to_json(), is_response=False, context=context)
-        self.subscriptions[call.unique_id] = context.queue
+    async def _submit_call(
+        self,
+        *,
+        entry: ActionEntry,
+        unique_id: str,
+        message: str,
+        context: RouterContext,
+        priority: Priority,
+        timeout: Optional[float],
+        convert: bool = True,
+    ) -> Any:
+        outbound = context.outbound
+        instrumentation = self.instrumentation
+        queued = time.perf_counter() if instrumentation is not None else 0.0
+        if not outbound.try_acquire():
+            try:
+                await outbound.acquire(priority, timeout)
+            except CallExpiredError as e:
+                self._count(Counter.error, entry.action, e)
+                raise
         try:
-            response = await asyncio.wait_for(
-                context.queue.get(), self._response_timeout
+            if instrumentation is not None:
+                instrumentation.on_timing(
+                    Stage.queue_wait,
+                    time.perf_counter() - queued,
+                    subprotocol=self._subprotocol_label,
+                    action=entry.action,
+                )
+            return await self._send_call(
+                entry=entry,
+                unique_id=unique_id,
+                message=message,
+                context=context,
+                convert=convert,
             )
-        except asyncio.TimeoutError:
-            del self.subscriptions[call.unique_id]
-            raise
+        finally:
+            outbound.release()
 
+    async def _send_call(
+        self,
+        *,
+        entry: ActionEntry,
+        unique_id: str,
+        message: str,
+        context: RouterContext,
+        convert: bool = True,
+    ) -> Any:
+        """Send Call and return its converted response.
+
+        With convert False the CallResult or CallError is returned as is.
+        """
+        # Register before sending so that a fast response can't get lost
+        response_future = self.pending_calls.register(
+            context.charging_station_id, unique_id, self._response_timeout
+        )
+        self._count(Counter.call_sent, entry.action)
+        try:
+            with self._timer(Stage.call_round_trip, entry.action):
+                await self._send(
+                    message=message,
+                    is_response=False,
+                    context=context,
+                    action=entry.action,
+                )
+                response = await response_future
+        finally:
+            # No-op unless sending failed or waiting was cancelled
+            self.pending_calls.discard(context.charging_station_id, unique_id)
+
+        if not convert:
+            return response
         if response.message_type_id == MessageType.CallError:
             log.warning("Received a CALLError: %s'", response)
-            raise response.to_exception()
+            error = response.to_exception()
+            self._count(Counter.error, entry.action, error)
+            raise error
         else:
-            response.action = call.action
-            validate_payload(response, ocpp_version)
+            response.action = entry.action
+            with self._timer(Stage.validation, entry.action):
+                entry.validate_response(response)
 
-        snake_case_payload = camel_to_snake_case(response.payload)
-        call_result = context.ocpp_adapter.call_result
-        cls = getattr(call_result, message.__class__.__name__)
-        return cls(**snake_case_payload)
+        with self._timer(Stage.case_conversion, entry.action):
+            snake_case_payload = self.case_table.to_snake(response.payload)
+        return entry.response_class(**snake_case_payload)
 
-    async def _send(self, *, message: str, is_response: bool, context: RouterContext):
-        log.debug(f"{context.charging_station_id=} {message=}")
-        await context.send(message=message, is_response=is_response, context=context)
+    async def _send(
+        self,
+        *,
+        message: str,
+        is_response: bool,
+        context: RouterContext,
+        action: str = "",
+    ):
+        trace_message(
+            "send", charging_station_id=context.charging_station_id, message=message
+        )
+        with self._timer(Stage.send, action):
+            await context.send(
+                message=message, is_response=is_response, context=context
+            )
@@ -0,0 +1,85 @@
+import functools
+from dataclasses import fields, is_dataclass
+from typing import Any, Callable, Dict
+
+from ocpp.messages import Call, MessageType
+
+from ocpp_asgi.casing import case_table, to_camel_key
+from ocpp_asgi.codec import JSONCodec, json_codec
+
+
+def encode_call(
+    unique_id: str, action: str, payload: dict, codec: JSONCodec = json_codec
+) -> str:
+    return codec.dumps([MessageType.Call, unique_id, action, payload])
+
+
+def encode_call_result(
+    unique_id: str, payload: dict, codec: JSONCodec = json_codec
+) -> str:
+    return codec.dumps([MessageType.CallResult, unique_id, payload])
+
+
+def encode_call_error(
+    call: Call, exception: Exception, codec: JSONCodec = json_codec
+) -> str:
+    """Encode CallError frame responding to call with given exception."""
+    call_error = call.create_call_error(exception)
+    return codec.dumps(
+        [
+            MessageType.CallError,
+            call_error.unique_id,
+            call_error.error_code,
+            call_error.error_description,
+            call_error.error_details,
+        ]
+    )
+
+
+def _to_wire(value: Any) -> Any:
+    """Convert nested value: skip Nones and convert dictionary keys to camelCase."""
+    if isinstance(value, dict):
+        keys = case_table().to_camel_keys
+        return {
+            (keys.get(k) or to_camel_key(k)): _to_wire(v)
+            for k, v in value.items()
+            if v is not None
+        }
+    if isinstance(value, (list, tuple)):
+        return [_to_wire(v) for v in value if v is not None]
+    if is_dataclass(value) and not isinstance(value, type):
+        return serializer(type(value))(value)
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def serializer(cls: type) -> Callable[[Any], Dict[str, Any]]:
+    """Return serializer for payload dataclass.
+
+    Serializer is built once per dataclass. It converts instance into a payload
+    dictionary in one pass: None fields are skipped and keys are camelCase.
+    Result equals to snake_to_camel_case(remove_nones(asdict(instance))).
+    """
+    keys = case_table().to_camel_keys
+    names = tuple(
+        (field.name, keys.get(field.name) or to_camel_key(field.name))
+        for field in fields(cls)
+    )
+    scalars = (str, int, float, bool)
+
+    def serialize(obj: Any) -> Dict[str, Any]:
+        payload = {}
+        for name, key in names:
+            value = getattr(obj, name)
+            if value is None:
+                continue
+            # Most of the values are scalars (including str based enums)
+            payload[key] = value if isinstance(value, scalars) else _to_wire(value)
+        return payload
+
+    return serialize
+
+
+def payload_to_wire(payload: Any) -> Dict[str, Any]:
+    """Convert payload dataclass instance to camelCase payload dictionary."""
+    return serializer(type(payload))(payload)
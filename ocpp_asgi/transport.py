@@ -0,0 +1,168 @@
+import asyncio
+from typing import Dict, List, Mapping, Optional, Set, Tuple, Union
+
+from ocpp_asgi.codec import JSONCodec, get_codec
+from ocpp_asgi.logging import log
+
+# Batch of JSON documents waiting to be posted to the same URL:
+# [(document, future resolved when the batch has been posted), ...]
+Batch = List[Tuple[str, asyncio.Future]]
+
+
+class HTTPTransport:
+    """Pooled HTTP client for the HTTP back-channel of a serverless deployment.
+
+    A single aiohttp ClientSession is kept for the lifetime of the transport so
+    that TCP connections (and TLS sessions) are reused between messages instead
+    of being opened for every OCPP-J frame. Requires aiohttp to be installed.
+
+    When ASGIApplication is given a transport it's started on lifespan startup
+    and stopped on lifespan shutdown. Otherwise the transport is started on
+    first use and must be stopped by its owner.
+
+    Documents posted with post_batched are coalesced per URL into a single POST
+    whose body is a JSON array of the documents. Response body of such POST is
+    a JSON array with a response string (or null) per document, as returned by
+    ASGIApplication.http_batch_handler.
+    """
+
+    def __init__(
+        self,
+        *,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 30,
+        timeout: float = 10,
+        batch_size: int = 1,
+        batch_delay: float = 0.005,
+        headers: Optional[Mapping[str, str]] = None,
+        codec: Optional[Union[str, JSONCodec]] = None,
+    ):
+        """Initialize HTTPTransport instance.
+
+        Args:
+            limit (int): Maximum number of simultaneous connections, 0 for no
+                limit. Requests exceeding the limit wait for a free connection.
+            limit_per_host (int): Maximum number of simultaneous connections to
+                the same host, 0 for no limit.
+            keepalive_timeout (float): How long an idle connection is kept open
+                for reuse, in seconds.
+            timeout (float): Total timeout of a single request, in seconds.
+            batch_size (int): Maximum number of documents posted together by
+                post_batched. With 1 every document is posted immediately.
+            batch_delay (float): How long post_batched waits for more documents
+                before posting an incomplete batch, in seconds.
+            headers (Mapping): Headers added to every request.
+            codec (JSONCodec): JSON codec for batched responses, see get_codec.
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.headers = {"Content-Type": "application/json"}
+        if headers is not None:
+            self.headers.update(headers)
+        self.codec: JSONCodec = get_codec(codec)
+        self.session = None
+        self._batches: Dict[str, Batch] = {}
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._in_flight: Set[asyncio.Task] = set()
+
+    async def start(self):
+        """Open connection pool. Invoked on lifespan startup or on first use."""
+        if self.session is not None:
+            return
+        import aiohttp
+
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            ),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers=self.headers,
+        )
+
+    async def stop(self):
+        """Post pending batches and close connection pool.
+
+        Invoked on lifespan shutdown.
+        """
+        for url in list(self._batches):
+            self._flush(url)
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def post(self, url: str, data: str) -> str:
+        """POST data to url and return response body.
+
+        Raises ConnectionError if response status isn't 2xx.
+        """
+        if self.session is None:
+            await self.start()
+        async with self.session.post(url, data=data) as response:
+            if response.status >= 300:
+                raise ConnectionError(f"HTTP {response.status} from {url}")
+            return await response.text()
+
+    async def post_batched(self, url: str, document: str) -> Optional[str]:
+        """POST JSON document to url as part of a JSON array of documents.
+
+        Returns response to document when the batch containing it has been
+        posted. Raises ConnectionError if posting the batch failed.
+        """
+        future = asyncio.get_running_loop().create_future()
+        batch = self._batches.get(url)
+        if batch is None:
+            batch = self._batches[url] = []
+        batch.append((document, future))
+        if len(batch) >= self.batch_size:
+            self._flush(url)
+        elif len(batch) == 1:
+            self._flush_handles[url] = asyncio.get_running_loop().call_later(
+                self.batch_delay, self._flush, url
+            )
+        return await future
+
+    def _flush(self, url: str):
+        batch = self._batches.pop(url, None)
+        handle = self._flush_handles.pop(url, None)
+        if handle is not None:
+            handle.cancel()
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._post_batch(url, batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _post_batch(self, url: str, batch: Batch):
+        # Documents are already serialized so the array is assembled as text
+        data = "[" + ",".join(document for document, _ in batch) + "]"
+        error: Optional[Exception] = None
+        responses: List[Optional[str]] = [None] * len(batch)
+        try:
+            text = await self.post(url, data)
+        except Exception as e:
+            log.error("Failure when posting batch of %d to %r: %r", len(batch), url, e)
+            error = e if isinstance(e, ConnectionError) else ConnectionError(str(e))
+        else:
+            try:
+                decoded = self.codec.loads(text) if text else None
+            except ValueError:
+                log.error("Unable to parse batched response: %r", text)
+                decoded = None
+            if isinstance(decoded, list) and len(decoded) == len(batch):
+                responses = decoded
+        for (_, future), response in zip(batch, responses):
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(response)
+            else:
+                future.set_exception(error)
@@ -1,17 +1,13 @@
-from dataclasses import asdict
 from typing import Any
 from uuid import uuid4
 
-from ocpp.charge_point import camel_to_snake_case, remove_nones, snake_to_camel_case
-from ocpp.messages import Call, CallError, CallResult, unpack, validate_payload
-from ocpp.v16 import call as v16call
-from ocpp.v16 import call_result as v16call_result
-from ocpp.v20 import call as v20call
-from ocpp.v20 import call_result as v20call_result
-from ocpp.v201 import call as v201call
-from ocpp.v201 import call_result as v201call_result
+from ocpp.messages import Call, CallError, CallResult
 
-from ocpp_asgi.app import OCPPVersion
+from ocpp_asgi.casing import case_table
+from ocpp_asgi.dispatch import payload_classes
+from ocpp_asgi.messages import parse_message
+from ocpp_asgi.serialization import encode_call, encode_call_result, payload_to_wire
+from ocpp_asgi.validation import validator_cache
 
 
 def create_call_error(message: str) -> str:
@@ -20,7 +16,7 @@ def create_call_error(message: str) -> str:
     Raises ValueError if message is not type Call. CallResult and CallError
     don't require response.
     """
-    call: Call = unpack(message)
+    call: Call = parse_message(message)
     if isinstance(call, Call):
         call_error: CallError = call.create_call_error(None)
         return call_error.to_json()
@@ -31,19 +27,19 @@ def create_call_error(message: str) -> str:
 def payload_to_operation(
     *, payload: Any, is_call_result: bool = False
 ) -> CallResult or Call:
-    camel_case_payload = snake_to_camel_case(asdict(payload))
+    wire_payload = payload_to_wire(payload)
     if is_call_result:
         operation = CallResult(
             unique_id=str(uuid4()),
             action=payload.__class__.__name__[:-7],
-            payload=remove_nones(camel_case_payload),
+            payload=wire_payload,
         )
         return operation
     else:
         operation = Call(
             unique_id=str(uuid4()),
             action=payload.__class__.__name__[:-7],
-            payload=remove_nones(camel_case_payload),
+            payload=wire_payload,
         )
         return operation
 
@@ -54,37 +50,20 @@ def operation_to_message(operation: CallResult or Call) -> str:
 
 
 def payload_to_message(*, payload: Any, is_call_result: bool = False) -> str:
-    operation = payload_to_operation(payload=payload, is_call_result=is_call_result)
-    msg = operation.to_json()
-    return msg
+    wire_payload = payload_to_wire(payload)
+    if is_call_result:
+        return encode_call_result(str(uuid4()), wire_payload)
+    return encode_call(str(uuid4()), payload.__class__.__name__[:-7], wire_payload)
 
 
 def message_to_payload(
     *, ocpp_version: str, message: str, action: str, is_call_result: bool = True
 ) -> Any:
-    response = unpack(message)
+    response = parse_message(message)
     response.action = action
-    validate_payload(response, ocpp_version)
-    snake_case_payload = camel_to_snake_case(response.payload)
-    if ocpp_version == OCPPVersion.v1_6.value:
-        cls = (
-            getattr(v16call_result, f"{action}Payload")
-            if is_call_result
-            else getattr(v16call, f"{action}Payload")
-        )
-    elif ocpp_version == OCPPVersion.v2_0.value:
-        cls = (
-            getattr(v20call_result, f"{action}Payload")
-            if is_call_result
-            else getattr(v20call, f"{action}Payload")
-        )
-    elif ocpp_version == OCPPVersion.v2_0_1.value:
-        cls = (
-            getattr(v201call_result, f"{action}Payload")
-            if is_call_result
-            else getattr(v201call, f"{action}Payload")
-        )
-    else:
-        raise ValueError(f"Unsupport {ocpp_version}=")
+    validator_cache.validate(response, ocpp_version)
+    snake_case_payload = case_table(ocpp_version).to_snake(response.payload)
+    request_class, response_class = payload_classes(ocpp_version)[action]
+    cls = response_class if is_call_result else request_class
     payload = cls(**snake_case_payload)
     return payload
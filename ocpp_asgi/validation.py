@@ -0,0 +1,236 @@
+import decimal
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import ocpp.messages
+from jsonschema import Draft4Validator
+from jsonschema.exceptions import ValidationError as SchemaValidationError
+from ocpp.exceptions import (
+    FormatViolationError,
+    NotImplementedError,
+    ProtocolError,
+    TypeConstraintViolationError,
+    ValidationError,
+)
+from ocpp.messages import Call, CallResult, MessageType
+
+# Validator is a compiled schema: a callable which raises OCPPError if payload
+# doesn't conform to the schema.
+Validator = Callable[[Any], None]
+# Backend compiles JSON schema into Validator.
+ValidationBackend = Callable[[dict], Validator]
+
+_schemas_dir = os.path.dirname(os.path.realpath(ocpp.messages.__file__))
+
+# 3 OCPP 1.6 schemas have fields of type floats with a precision of 1 decimal.
+# Both the schema and the payload must be parsed using decimal.Decimal for floats.
+# See ocpp.messages.validate_payload for details.
+_decimal_schemas = {
+    ("1.6", "SetChargingProfile", MessageType.Call),
+    ("1.6", "RemoteStartTransaction", MessageType.Call),
+    ("1.6", "GetCompositeSchedule", MessageType.CallResult),
+}
+
+
+def _schema_error(validator: str, message: str, payload: Any) -> Exception:
+    """Map failed JSON schema keyword to corresponding OCPPError."""
+    if validator in ["type", "maxLength"]:
+        return TypeConstraintViolationError(details={"cause": message})
+    elif validator == "additionalProperties":
+        return FormatViolationError(details={"cause": message})
+    elif validator == "required":
+        return ProtocolError(details={"cause": message})
+    return FormatViolationError(
+        details={"cause": f"Payload '{payload} is not valid: {message}"}
+    )
+
+
+def _contains_decimal(data: Any) -> bool:
+    if isinstance(data, decimal.Decimal):
+        return True
+    if isinstance(data, dict):
+        return any(_contains_decimal(value) for value in data.values())
+    if isinstance(data, list):
+        return any(_contains_decimal(value) for value in data)
+    return False
+
+
+def _to_decimal(data: Any) -> Any:
+    if isinstance(data, float):
+        return decimal.Decimal(repr(data))
+    if isinstance(data, dict):
+        return {key: _to_decimal(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_to_decimal(value) for value in data]
+    return data
+
+
+def jsonschema_backend(schema: dict) -> Validator:
+    """Compile schema with jsonschema (default backend)."""
+    validator = Draft4Validator(schema)
+
+    def validate(payload: Any):
+        try:
+            validator.validate(payload)
+        except SchemaValidationError as e:
+            raise _schema_error(e.validator, e.message, payload)
+
+    return validate
+
+
+def fastjsonschema_backend(schema: dict) -> Validator:
+    """Compile schema into Python code with fastjsonschema.
+
+    Requires fastjsonschema to be installed.
+    """
+    import fastjsonschema
+
+    if _contains_decimal(schema):
+        # Generated code evaluates "multipleOf" using floats, which fails with
+        # decimal.Decimal payloads. Use jsonschema for the few such schemas.
+        return jsonschema_backend(schema)
+    # Formats such as "date-time" are not enforced, same as jsonschema_backend
+    validator = fastjsonschema.compile(schema, use_formats=False)
+
+    def validate(payload: Any):
+        try:
+            validator(payload)
+        except fastjsonschema.JsonSchemaValueException as e:
+            raise _schema_error(e.rule, e.message, payload)
+
+    return validate
+
+
+def _schema_name(ocpp_version: str, action: str, message_type_id: int) -> str:
+    schema_name = action
+    if message_type_id == MessageType.CallResult:
+        schema_name += "Response"
+    elif ocpp_version in ["2.0", "2.0.1"]:
+        schema_name += "Request"
+    if ocpp_version == "2.0":
+        schema_name += "_v1p0"
+    return schema_name
+
+
+def _schema_path(ocpp_version: str, schema_name: str) -> str:
+    schemas_dir = "v" + ocpp_version.replace(".", "")
+    return os.path.join(_schemas_dir, schemas_dir, "schemas", f"{schema_name}.json")
+
+
+def schema_keys(ocpp_version: str) -> Iterable[Tuple[str, int]]:
+    """Return (action, message type) for every schema shipped for ocpp_version."""
+    schemas_dir = os.path.dirname(_schema_path(ocpp_version, ""))
+    for filename in sorted(os.listdir(schemas_dir)):
+        name = filename[: -len(".json")]
+        if ocpp_version == "2.0":
+            name = name[: -len("_v1p0")]
+        if name.endswith("Response"):
+            yield name[: -len("Response")], MessageType.CallResult
+        elif ocpp_version in ["2.0", "2.0.1"]:
+            yield name[: -len("Request")], MessageType.Call
+        else:
+            yield name, MessageType.Call
+
+
+def load_schema(ocpp_version: str, action: str, message_type_id: int) -> dict:
+    """Read JSON schema for action from ocpp package.
+
+    Raises NotImplementedError if there is no schema for action.
+    """
+    if ocpp_version not in ["1.6", "2.0", "2.0.1"]:
+        raise ValueError(f"Unsupported {ocpp_version=}")
+    parse_float = (
+        decimal.Decimal
+        if (ocpp_version, action, message_type_id) in _decimal_schemas
+        else float
+    )
+    path = _schema_path(
+        ocpp_version, _schema_name(ocpp_version, action, message_type_id)
+    )
+    try:
+        # The JSON schemas for OCPP 2.0 start with a byte order mark (BOM)
+        with open(path, "r", encoding="utf-8-sig") as f:
+            return json.loads(f.read(), parse_float=parse_float)
+    except (OSError, json.JSONDecodeError):
+        raise NotImplementedError(
+            details={"cause": f"Failed to validate action: {action}"}
+        )
+
+
+class ValidatorCache:
+    """Cache of compiled schema validators.
+
+    Validators are keyed by (ocpp_version, action, message type) and compiled
+    only once, either when preloaded or on first use.
+    """
+
+    def __init__(self, backend: Optional[ValidationBackend] = None):
+        """Initialize ValidatorCache instance.
+
+        Args:
+            backend (ValidationBackend): Compiles JSON schema into validator.
+                Defaults to jsonschema_backend.
+        """
+        self.backend = backend or jsonschema_backend
+        self._validators: Dict[Tuple[str, str, int], Validator] = {}
+
+    def preload(self, ocpp_version: str):
+        """Compile all schemas of ocpp_version."""
+        for action, message_type_id in schema_keys(ocpp_version):
+            self.get(ocpp_version, action, message_type_id)
+
+    def get(self, ocpp_version: str, action: str, message_type_id: int) -> Validator:
+        key = (ocpp_version, action, message_type_id)
+        try:
+            return self._validators[key]
+        except KeyError:
+            pass
+        validator = self.backend(load_schema(*key))
+        self._validators[key] = validator
+        return validator
+
+    def message_validator(
+        self, ocpp_version: str, action: str, message_type_id: int
+    ) -> Callable[[Call or CallResult], None]:
+        """Return callable validating payload of a message of given kind.
+
+        Raises NotImplementedError if there is no schema for action.
+        """
+        key = (ocpp_version, action, message_type_id)
+        validator = self.get(*key)
+        if key in _decimal_schemas:
+
+            def validate(message: Call or CallResult):
+                message.payload = _to_decimal(message.payload)
+                validator(message.payload)
+
+        else:
+
+            def validate(message: Call or CallResult):
+                validator(message.payload)
+
+        return validate
+
+    def validate(self, message: Call or CallResult, ocpp_version: str):
+        """Validate the payload of the message using compiled JSON schemas.
+
+        Drop-in replacement for ocpp.messages.validate_payload.
+        """
+        if type(message) not in [Call, CallResult]:
+            raise ValidationError(
+                "Payload can't be validated because message "
+                f"type. It's '{type(message)}', but it should "
+                "be either 'Call'  or 'CallResult'."
+            )
+        key = (ocpp_version, message.action, message.message_type_id)
+        validator = self._validators.get(key)
+        if validator is None:
+            validator = self.get(*key)
+        if key in _decimal_schemas:
+            message.payload = _to_decimal(message.payload)
+        validator(message.payload)
+
+
+# Validators shared by all routers unless router is given its own ValidatorCache
+validator_cache = ValidatorCache()
@@ -0,0 +1,449 @@
+import asyncio
+import json
+
+import pytest
+from ocpp.messages import CallResult
+from ocpp.v16 import call, call_result
+from ocpp.v16.enums import Action, RegistrationStatus
+
+from ocpp_asgi.app import ASGIApplication, HTTPEventContext, RouterContext
+from ocpp_asgi.executor import DispatchPolicy
+from ocpp_asgi.instrumentation import MetricsRegistry
+from ocpp_asgi.router import HandlerContext, Router, Subprotocol
+from ocpp_asgi.utils import payload_to_message
+
+
+class WebSocketConnection:
+    """In-memory ASGI WebSocket connection driving ASGIApplication directly."""
+
+    def __init__(self, app: ASGIApplication, path: str = "/123"):
+        self.scope = {
+            "type": "websocket",
+            "path": path,
+            "subprotocols": ["ocpp1.6"],
+            "headers": [],
+        }
+        self.app = app
+        self.inbound = asyncio.Queue()
+        self.outbound = asyncio.Queue()
+        self.task = None
+
+    async def __aenter__(self):
+        self.task = asyncio.create_task(
+            self.app(self.scope, self.inbound.get, self.outbound.put)
+        )
+        await self.inbound.put({"type": "websocket.connect"})
+        return self
+
+    async def __aexit__(self, *args):
+        await self.inbound.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(self.task, 1)
+
+    async def send(self, text: str):
+        await self.inbound.put({"type": "websocket.receive", "text": text})
+
+    async def receive(self) -> dict:
+        return await asyncio.wait_for(self.outbound.get(), 1)
+
+
+class CentralSystem(ASGIApplication):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.contexts = []
+        self.disconnected = []
+
+    async def on_connect(self, context: RouterContext) -> bool:
+        self.contexts.append(context)
+        return True
+
+    async def on_disconnect(
+        self, *, charging_station_id: str, subprotocol: Subprotocol, code: int
+    ):
+        self.disconnected.append(charging_station_id)
+
+
+@pytest.fixture
+def router() -> Router:
+    router = Router(subprotocol=Subprotocol.ocpp16)
+    router.handler_contexts = []
+
+    @router.on(Action.BootNotification)
+    async def on_boot_notification(
+        *, payload: call.BootNotificationPayload, context: HandlerContext
+    ):
+        router.handler_contexts.append(context)
+        return call_result.BootNotificationPayload(
+            current_time="2022-01-01T00:00:00",
+            interval=10,
+            status=RegistrationStatus.accepted,
+        )
+
+    return router
+
+
+@pytest.fixture
+def app(router) -> CentralSystem:
+    app = CentralSystem()
+    app.include_router(router)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_websocket_session_is_reused(app, router):
+    message = payload_to_message(
+        payload=call.BootNotificationPayload(
+            charge_point_model="model", charge_point_vendor="vendor"
+        )
+    )
+    async with WebSocketConnection(app) as ws:
+        accept = await ws.receive()
+        assert accept == {"type": "websocket.accept", "subprotocol": "ocpp1.6"}
+        for _ in range(3):
+            await ws.send(message)
+            response = await ws.receive()
+            assert response["text"].startswith("[3,")
+
+    assert len(app.contexts) == 1
+    assert app.disconnected == ["123"]
+    assert len(router.handler_contexts) == 3
+    assert all(c is router.handler_contexts[0] for c in router.handler_contexts)
+    assert router.handler_contexts[0]._router_context is app.contexts[0]
+
+
+@pytest.mark.asyncio
+async def test_websocket_rejects_unsupported_subprotocol(app):
+    connection = WebSocketConnection(app)
+    connection.scope["subprotocols"] = ["ocpp1.5"]
+    async with connection as ws:
+        response = await ws.receive()
+        assert response == {"type": "websocket.close"}
+    assert app.contexts == []
+
+
+@pytest.mark.asyncio
+async def test_websocket_offers_parsed_call_result(app):
+    consumed = []
+
+    async def consume_event(*, connection_id, message):
+        consumed.append(message)
+        return None
+
+    app.consume_event = consume_event
+    async with WebSocketConnection(app) as ws:
+        await ws.receive()
+        await ws.send(' [ 3, "abc", {"currentTime": "2022-01-01T00:00:00Z"}]')
+        await ws.send("not json")
+        await ws.send('[3,"def",{}]')
+
+    assert [type(m) for m in consumed] == [CallResult, CallResult]
+    assert [m.unique_id for m in consumed] == ["abc", "def"]
+
+
+@pytest.mark.asyncio
+async def test_websocket_unknown_action(app):
+    async with WebSocketConnection(app) as ws:
+        await ws.receive()
+        await ws.send('[2,"1","Authorize",{"idTag":"1"}]')
+        response = await ws.receive()
+        assert response["text"].startswith('[4,"1","NotImplemented"')
+
+
+@pytest.mark.asyncio
+async def test_websocket_bytes_frame(router):
+    pytest.importorskip("orjson")
+    app = CentralSystem(codec="orjson")
+    app.include_router(router)
+    assert router.codec is app.codec
+    message = payload_to_message(
+        payload=call.BootNotificationPayload(
+            charge_point_model="model", charge_point_vendor="vendor"
+        )
+    )
+    async with WebSocketConnection(app) as ws:
+        await ws.receive()
+        await ws.inbound.put({"type": "websocket.receive", "bytes": message.encode()})
+        response = await ws.receive()
+        assert response["text"].startswith("[3,")
+
+
+@pytest.mark.asyncio
+async def test_websocket_call_round_trip(app, router):
+    responses = []
+
+    @router.after(Action.BootNotification)
+    async def after_boot_notification(*, payload, context: HandlerContext):
+        responses.append(await context.send(call.GetLocalListVersionPayload()))
+        try:
+            await context.send(call.GetLocalListVersionPayload())
+        except ConnectionError as e:
+            responses.append(e)
+
+    app.include_router(router)
+    message = payload_to_message(
+        payload=call.BootNotificationPayload(
+            charge_point_model="model", charge_point_vendor="vendor"
+        )
+    )
+    async with WebSocketConnection(app) as ws:
+        await ws.receive()
+        await ws.send(message)
+        await ws.receive()  # BootNotification response
+        request = await ws.receive()
+        unique_id = json.loads(request["text"])[1]
+        await ws.send(json.dumps([3, unique_id, {"listVersion": 1}]))
+        await ws.receive()  # Second request is left unanswered
+    await asyncio.sleep(0)
+
+    assert responses[0] == call_result.GetLocalListVersionPayload(list_version=1)
+    assert isinstance(responses[1], ConnectionError)
+    assert len(router.pending_calls) == 0
+
+
+@pytest.mark.asyncio
+async def test_lifespan_drains_after_handlers(app, router):
+    finished = []
+
+    @router.after(Action.BootNotification)
+    async def after_boot_notification(*, payload, context: HandlerContext):
+        await asyncio.sleep(0.01)
+        finished.append(context.charging_station_id)
+
+    app.include_router(router)
+    message = payload_to_message(
+        payload=call.BootNotificationPayload(
+            charge_point_model="model", charge_point_vendor="vendor"
+        )
+    )
+    async with WebSocketConnection(app) as ws:
+        await ws.receive()
+        await ws.send(message)
+        await ws.receive()
+
+    events = asyncio.Queue()
+    sent = []
+    for event in ["lifespan.startup", "lifespan.shutdown"]:
+        events.put_nowait({"type": event})
+
+    async def send(event):
+        sent.append(event["type"])
+
+    await app({"type": "lifespan"}, events.get, send)
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert finished == ["123"]
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(router):
+    metrics = MetricsRegistry()
+    app = CentralSystem(metrics=metrics)
+    app.include_router(router)
+    message = payload_to_message(
+        payload=call.BootNotificationPayload(
+            charge_point_model="model", charge_point_vendor="vendor"
+        )
+    )
+    async with WebSocketConnection(app) as ws:
+        await ws.receive()
+        await ws.send(message)
+        await ws.receive()
+        await ws.send('[2,"1","Authorize",{"idTag":"1"}]')
+        await ws.receive()
+
+    stages = {stage for stage, _, _ in metrics.timings}
+    assert stages == {
+        "parse",
+        "validation",
+        "case_conversion",
+        "handler",
+        "serialization",
+        "send",
+    }
+    events = asyncio.Queue()
+    events.put_nowait({"type": "http.request", "body": b""})
+    sent = []
+
+    async def send(event):
+        sent.append(event)
+
+    scope = {"type": "http", "method": "GET", "path": "/metrics"}
+    await app(scope, events.get, send)
+    assert sent[0]["status"] == 200
+    body = sent[1]["body"].decode()
+    assert (
+        'ocpp_asgi_calls_received_total{subprotocol="ocpp1.6",'
+        'action="BootNotification"} 1'
+    ) in body
+    assert (
+        'ocpp_asgi_errors_total{subprotocol="ocpp1.6",action="Authorize",'
+        'error="NotImplementedError"} 1'
+    ) in body
+
+
+@pytest.mark.asyncio
+async def test_connection_registry(app, router):
+    async with WebSocketConnection(app) as ws:
+        await ws.receive()
+        assert app.connections.get("123") is app.contexts[0]
+        assert app.connections.count(Subprotocol.ocpp16) == 1
+
+        task = asyncio.create_task(
+            app.call(charging_station_id="123", message=call.ClearCachePayload())
+        )
+        request = json.loads((await ws.receive())["text"])
+        assert request[2] == "ClearCache"
+        await ws.send(json.dumps([3, request[1], {"status": "Accepted"}]))
+        assert await task == call_result.ClearCachePayload(status="Accepted")
+
+    assert len(app.connections) == 0
+    with pytest.raises(ConnectionError):
+        await app.call(charging_station_id="123", message=call.ClearCachePayload())
+
+
+@pytest.mark.asyncio
+async def test_stale_connection_disconnect_keeps_reconnected(app):
+    async with WebSocketConnection(app) as stale:
+        await stale.receive()
+        async with WebSocketConnection(app) as current:
+            await current.receive()
+            await stale.__aexit__()
+            assert app.connections.get("123") is app.contexts[1]
+        assert app.connections.get("123") is None
+
+
+class CentralSystemHTTP(ASGIApplication):
+    def http_parse_event(self, http_event: dict) -> HTTPEventContext:
+        return HTTPEventContext(
+            charging_station_id=http_event["connection_id"],
+            subprotocols=http_event["subprotocols"],
+            body=http_event["body"],
+        )
+
+
+async def http_request(app: ASGIApplication, *chunks: bytes) -> list:
+    events = asyncio.Queue()
+    for i, chunk in enumerate(chunks):
+        events.put_nowait(
+            {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        )
+    events.put_nowait({"type": "http.disconnect"})
+    sent = []
+
+    async def send(event):
+        sent.append(event)
+
+    await app({"type": "http", "method": "POST", "path": "/"}, events.get, send)
+    return sent
+
+
+def http_event(charging_station_id: str, body: str) -> dict:
+    return {
+        "connection_id": charging_station_id,
+        "subprotocols": ["ocpp1.6"],
+        "body": body,
+    }
+
+
+@pytest.mark.asyncio
+async def test_http_chunked_body(router):
+    app = CentralSystemHTTP()
+    app.include_router(router)
+    message = payload_to_message(
+        payload=call.BootNotificationPayload(
+            charge_point_model="model", charge_point_vendor="vendor"
+        )
+    )
+    body = json.dumps(http_event("123", message)).encode()
+    sent = await http_request(app, body[:10], body[10:20], body[20:])
+    assert sent[0]["status"] == 200
+    response = json.loads(sent[1]["body"])
+    assert response[0] == 3 and response[2]["status"] == "Accepted"
+
+
+@pytest.mark.asyncio
+async def test_http_batch(router):
+    app = CentralSystemHTTP()
+    app.include_router(router)
+    boot_notification = payload_to_message(
+        payload=call.BootNotificationPayload(
+            charge_point_model="model", charge_point_vendor="vendor"
+        )
+    )
+    body = json.dumps(
+        [
+            http_event("1", boot_notification),
+            http_event("2", '[3,"1",{}]'),
+            http_event("2", "invalid"),
+            http_event("1", boot_notification),
+        ]
+    ).encode()
+    sent = await http_request(app, body)
+    assert len(sent) == 2
+    assert sent[0]["status"] == 200
+    responses = json.loads(sent[1]["body"])
+    assert len(responses) == 4
+    assert responses[1] is None and responses[2] is None
+    for response in [responses[0], responses[3]]:
+        response = json.loads(response)
+        assert response[0] == 3 and response[2]["status"] == "Accepted"
+    assert [context.charging_station_id for context in router.handler_contexts] == [
+        "1",
+        "1",
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "policy, heartbeat_waits",
+    [(DispatchPolicy.fifo, True), (DispatchPolicy.per_action, False)],
+)
+async def test_websocket_dispatch_policy(router, policy, heartbeat_waits):
+    release = asyncio.Event()
+
+    @router.on(Action.StartTransaction)
+    async def on_start_transaction(*, payload, context: HandlerContext):
+        await release.wait()
+        return call_result.StartTransactionPayload(
+            transaction_id=1, id_tag_info={"status": "Accepted"}
+        )
+
+    @router.on(Action.Heartbeat)
+    async def on_heartbeat(*, payload, context: HandlerContext):
+        return call_result.HeartbeatPayload(current_time="2022-01-01T00:00:00")
+
+    app = CentralSystem(dispatch_policy=policy)
+    app.include_router(router)
+    async with WebSocketConnection(app) as ws:
+        await ws.receive()
+        await ws.send(
+            '[2,"1","StartTransaction",{"connectorId":1,"idTag":"1",'
+            '"meterStart":0,"timestamp":"2022-01-01T00:00:00Z"}]'
+        )
+        # CallResult of a pending call is delivered while handler is running
+        task = asyncio.create_task(
+            app.call(charging_station_id="123", message=call.ClearCachePayload())
+        )
+        request = json.loads((await ws.receive())["text"])
+        await ws.send(json.dumps([3, request[1], {"status": "Accepted"}]))
+        assert await task == call_result.ClearCachePayload(status="Accepted")
+
+        await ws.send('[2,"2","Heartbeat",{}]')
+        if heartbeat_waits:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(ws.outbound.get(), 0.05)
+        else:
+            assert json.loads((await ws.receive())["text"])[1] == "2"
+        release.set()
+        assert json.loads((await ws.receive())["text"])[1] == "1"
+        if heartbeat_waits:
+            assert json.loads((await ws.receive())["text"])[1] == "2"
+
+
+@pytest.mark.asyncio
+async def test_http_adaptation_is_not_implemented_by_default():
+    app = ASGIApplication()
+    with pytest.raises(NotImplementedError) as e:
+        app.http_parse_event({})
+    assert type(e.value) is NotImplementedError
+    with pytest.raises(NotImplementedError) as e:
+        await app.http_from_server_to_client("[]", None)
+    assert type(e.value) is NotImplementedError
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import multiprocessing
+
+import pytest
+import pytest_asyncio
+from ocpp.v16 import call, call_result
+
+from ocpp_asgi.bus import MessageBus, Owner, QueueBusBackend
+from ocpp_asgi.outbound import CallExpiredError, Priority
+from ocpp_asgi.router import Router, Subprotocol
+from tests.test_app import CentralSystem, WebSocketConnection
+
+
+@pytest_asyncio.fixture
+async def workers(request):
+    # Indirect parameters per worker: response_timeout and forward_timeout
+    params = getattr(request, "param", {})
+    backend = QueueBusBackend.in_process(["w1", "w2"])
+    apps = []
+    for worker_id in ["w1", "w2"]:
+        options = params.get(worker_id, {})
+        app = CentralSystem(
+            bus=MessageBus(
+                backend,
+                worker_id=worker_id,
+                forward_timeout=options.get("forward_timeout", 60),
+            )
+        )
+        # Every worker process has routers of its own
+        app.include_router(
+            Router(
+                subprotocol=Subprotocol.ocpp16,
+                response_timeout=options.get("response_timeout", 30),
+            )
+        )
+        await app.bus.start(app)
+        apps.append(app)
+    yield apps
+    for app in apps:
+        await app.bus.stop()
+
+
+@pytest.mark.asyncio
+async def test_call_is_forwarded_to_owner(workers):
+    w1, w2 = workers
+    async with WebSocketConnection(w1) as ws:
+        await ws.receive()
+        assert await w1.bus.backend.owner("123") == Owner("w1", "ocpp1.6")
+
+        task = asyncio.create_task(
+            w2.call(charging_station_id="123", message=call.ClearCachePayload())
+        )
+        request = json.loads((await ws.receive())["text"])
+        assert request[2] == "ClearCache"
+        await ws.send(json.dumps([3, request[1], {"status": "Accepted"}]))
+        assert await task == call_result.ClearCachePayload(status="Accepted")
+
+        task = asyncio.create_task(
+            w2.call(charging_station_id="123", message=call.ClearCachePayload())
+        )
+        request = json.loads((await ws.receive())["text"])
+        await ws.send(json.dumps([4, request[1], "InternalError", "Failure", {}]))
+        with pytest.raises(Exception) as e:
+            await task
+        assert type(e.value).__name__ == "InternalError"
+
+    assert await w1.bus.backend.owner("123") is None
+    with pytest.raises(ConnectionError):
+        await w2.call(charging_station_id="123", message=call.ClearCachePayload())
+
+
+@pytest.mark.asyncio
+async def test_forwarded_call_waits_for_outstanding_call(workers):
+    w1, w2 = workers
+    async with WebSocketConnection(w1) as ws:
+        await ws.receive()
+        local = asyncio.create_task(
+            w1.call(charging_station_id="123", message=call.ClearCachePayload())
+        )
+        request = json.loads((await ws.receive())["text"])
+        forwarded = asyncio.create_task(
+            w2.call(
+                charging_station_id="123",
+                message=call.ResetPayload(type="Soft"),
+            )
+        )
+        await asyncio.sleep(0.05)
+        assert ws.outbound.empty()
+
+        await ws.send(json.dumps([3, request[1], {"status": "Accepted"}]))
+        await local
+        request = json.loads((await ws.receive())["text"])
+        assert request[2] == "Reset"
+        await ws.send(json.dumps([3, request[1], {"status": "Accepted"}]))
+        assert await forwarded == call_result.ResetPayload(status="Accepted")
+
+
+@pytest.mark.asyncio
+async def test_forwarded_call_priority_and_timeout(workers):
+    w1, w2 = workers
+    async with WebSocketConnection(w1) as ws:
+        await ws.receive()
+        local = asyncio.create_task(
+            w1.call(charging_station_id="123", message=call.ClearCachePayload())
+        )
+        request = json.loads((await ws.receive())["text"])
+        normal = asyncio.create_task(
+            w1.call(
+                charging_station_id="123",
+                message=call.ChangeAvailabilityPayload(
+                    connector_id=0, type="Inoperative"
+                ),
+            )
+        )
+        expired = asyncio.create_task(
+            w2.call(
+                charging_station_id="123",
+                message=call.ClearCachePayload(),
+                timeout=0.01,
+            )
+        )
+        high = asyncio.create_task(
+            w2.call(
+                charging_station_id="123",
+                message=call.ClearCachePayload(),
+                priority=Priority.high,
+            )
+        )
+        with pytest.raises(CallExpiredError):
+            await expired
+
+        for action in ["ClearCache", "ChangeAvailability"]:
+            await ws.send(json.dumps([3, request[1], {"status": "Accepted"}]))
+            request = json.loads((await ws.receive())["text"])
+            assert request[2] == action
+        await ws.send(json.dumps([3, request[1], {"status": "Accepted"}]))
+        await asyncio.gather(local, high, normal)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("workers", [{"w2": {"response_timeout": 0.2}}], indirect=True)
+async def test_forwarded_call_is_dropped_after_caller_gave_up(workers):
+    w1, w2 = workers
+    async with WebSocketConnection(w1) as ws:
+        await ws.receive()
+        local = asyncio.create_task(
+            w1.call(charging_station_id="123", message=call.ClearCachePayload())
+        )
+        request = json.loads((await ws.receive())["text"])
+        with pytest.raises(asyncio.TimeoutError):
+            await w2.call(
+                charging_station_id="123", message=call.ResetPayload(type="Hard")
+            )
+        await ws.send(json.dumps([3, request[1], {"status": "Accepted"}]))
+        await local
+        await asyncio.sleep(0.05)
+        assert ws.outbound.empty()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("workers", [{"w1": {"forward_timeout": 0.05}}], indirect=True)
+async def test_owner_timeout_is_raised_as_timeout(workers):
+    w1, w2 = workers
+    async with WebSocketConnection(w1) as ws:
+        await ws.receive()
+        with pytest.raises(asyncio.TimeoutError) as e:
+            await w2.call(charging_station_id="123", message=call.ClearCachePayload())
+        assert "TimeoutError" in str(e.value)
+        assert json.loads((await ws.receive())["text"])[2] == "ClearCache"
+
+
+@pytest.mark.asyncio
+async def test_stale_owner_fails_call(workers):
+    w1, w2 = workers
+    await w1.bus.backend.claim("123", Owner("w1", "ocpp1.6"))
+    with pytest.raises(ConnectionError):
+        await w2.call(charging_station_id="123", message=call.ClearCachePayload())
+
+
+@pytest.mark.asyncio
+async def test_reconnect_to_another_worker_keeps_ownership(workers):
+    w1, w2 = workers
+    async with WebSocketConnection(w1) as stale:
+        await stale.receive()
+        async with WebSocketConnection(w2) as current:
+            await current.receive()
+            await stale.__aexit__()
+            assert await w1.bus.backend.owner("123") == Owner("w2", "ocpp1.6")
+
+
+@pytest.mark.asyncio
+async def test_multiprocessing_backend():
+    with multiprocessing.Manager() as manager:
+        backend = QueueBusBackend.multiprocessing(["w1"], manager)
+        await backend.claim("123", Owner("w1", "ocpp1.6"))
+        assert not await backend.release("123", "w2")
+        assert await backend.owner("123") == Owner("w1", "ocpp1.6")
+        await backend.publish("w1", {"type": "result"})
+        assert await backend.receive("w1") == {"type": "result"}
+        await backend.close("w1")
+        assert await backend.receive("w1") is None
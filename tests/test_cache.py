@@ -0,0 +1,183 @@
+import json
+import time
+
+import pytest
+from ocpp.v16 import call_result
+
+from ocpp_asgi.cache import (
+    ReplayWindow,
+    ResponseCache,
+    call_fingerprint,
+    normalize_payload,
+)
+from ocpp_asgi.instrumentation import MetricsRegistry
+from ocpp_asgi.router import Router, RouterContext, Subprotocol
+
+
+def test_normalize_payload_ignores_key_order():
+    assert normalize_payload({"a": 1, "b": [2]}) == normalize_payload(
+        {"b": [2], "a": 1}
+    )
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    now = 100.0
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    cache = ResponseCache(ttl=10, maxsize=2)
+    cache.put(("A", 1), "a")
+    cache.put(("A", 2), "b")
+    assert cache.get(("A", 1)) == "a"
+    cache.put(("A", 3), "c")
+    # ("A", 2) was least recently used
+    assert cache.get(("A", 2)) is None
+    assert len(cache) == 2
+
+    now = 110.0
+    assert cache.get(("A", 1)) is None
+    assert len(cache) == 1
+
+
+def create_context(router: Router, sent: list) -> RouterContext:
+    async def send(*, message: str, is_response: bool, context: RouterContext):
+        sent.append(message)
+
+    return RouterContext(
+        scope={},
+        body=None,
+        subprotocol=router.subprotocol,
+        ocpp_adapter=None,
+        send=send,
+        charging_station_id="123",
+    )
+
+
+@pytest.mark.asyncio
+async def test_cached_response():
+    router = Router(subprotocol=Subprotocol.ocpp16, create_task=False)
+    metrics = MetricsRegistry()
+    router.add_instrumentation(metrics)
+    cache = ResponseCache()
+    handled = []
+    after = []
+
+    @router.on("DataTransfer", cache=cache)
+    def on_data_transfer(*, payload, context):
+        handled.append(payload)
+        return call_result.DataTransferPayload(status="Accepted", data="x")
+
+    @router.after("DataTransfer")
+    def after_data_transfer(*, payload, context):
+        after.append(payload)
+
+    sent = []
+    context = create_context(router, sent)
+    for frame in [
+        '[2,"1","DataTransfer",{"vendorId":"v","messageId":"m"}]',
+        '[2,"2","DataTransfer",{"messageId":"m","vendorId":"v"}]',
+        '[2,"3","DataTransfer",{"vendorId":"other"}]',
+    ]:
+        await router.route_message(message=frame, context=context)
+
+    assert [json.loads(message) for message in sent] == [
+        [3, "1", {"status": "Accepted", "data": "x"}],
+        [3, "2", {"status": "Accepted", "data": "x"}],
+        [3, "3", {"status": "Accepted", "data": "x"}],
+    ]
+    assert len(handled) == 2
+    assert len(after) == 3 and after[1].vendor_id == "v"
+    assert len(cache) == 2
+    assert metrics.counters[("cache_hit", "ocpp1.6", "DataTransfer", "")] == 1
+    assert metrics.counters[("cache_miss", "ocpp1.6", "DataTransfer", "")] == 2
+
+
+def test_replay_window_is_bounded():
+    window = ReplayWindow(size=2, max_stations=2)
+    for unique_id in ["1", "2", "3"]:
+        window.put("a", unique_id, "A", unique_id)
+    window.put("b", "1", "A", "b1")
+    assert window.get("a", "1", "A") is None
+    assert window.get("a", "3", "A") == "3"
+    # "a" was active after "b"
+    window.put("a", "4", "A", "4")
+    window.put("c", "1", "A", "c1")
+    assert window.get("b", "1", "A") is None
+    assert len(window) == 2
+    assert (window.hits, window.misses) == (1, 2)
+
+
+def test_reused_unique_id_is_not_replayed():
+    window = ReplayWindow()
+    window.put("a", "1", call_fingerprint("Heartbeat", {}), "heartbeat")
+    fingerprint = call_fingerprint("Authorize", {"idTag": "tag"})
+    assert window.get("a", "1", fingerprint) is None
+    window.put("a", "1", fingerprint, "authorize")
+    assert window.get("a", "1", call_fingerprint("Authorize", {"idTag": "x"})) is None
+    assert window.get("a", "1", fingerprint) is None
+    assert (window.hits, window.misses) == (0, 3)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_call_is_replayed():
+    window = ReplayWindow()
+    router = Router(subprotocol=Subprotocol.ocpp16, replay_window=window)
+    metrics = MetricsRegistry()
+    router.add_instrumentation(metrics)
+    started = []
+
+    @router.on("StartTransaction")
+    def on_start_transaction(*, payload, context):
+        started.append(payload)
+        return call_result.StartTransactionPayload(
+            transaction_id=len(started), id_tag_info={"status": "Accepted"}
+        )
+
+    frame = (
+        '[2,"1","StartTransaction",{"connectorId":1,"idTag":"tag",'
+        '"meterStart":0,"timestamp":"2022-01-01T00:00:00Z"}]'
+    )
+    sent = []
+    await router.route_message(message=frame, context=create_context(router, sent))
+    # Retransmitted after reconnecting
+    await router.route_message(message=frame, context=create_context(router, sent))
+    await router.route_message(
+        message=frame.replace('"1"', '"2"', 1),
+        context=create_context(router, sent),
+    )
+
+    assert len(started) == 2
+    assert sent[0] == sent[1]
+    assert json.loads(sent[2])[:2] == [3, "2"]
+    assert json.loads(sent[2])[2]["transactionId"] == 2
+    assert (window.hits, window.misses) == (1, 2)
+    assert metrics.counters[("replay_hit", "ocpp1.6", "StartTransaction", "")] == 1
+    assert "ocpp_asgi_replay_misses_total" in metrics.render()
+
+
+@pytest.mark.asyncio
+async def test_call_reusing_unique_id_is_handled():
+    router = Router(subprotocol=Subprotocol.ocpp16, replay_window=ReplayWindow())
+    authorized = []
+
+    @router.on("Heartbeat")
+    def on_heartbeat(*, payload, context):
+        return call_result.HeartbeatPayload(current_time="2022-01-01T00:00:00Z")
+
+    @router.on("Authorize")
+    def on_authorize(*, payload, context):
+        authorized.append(payload)
+        return call_result.AuthorizePayload(id_tag_info={"status": "Accepted"})
+
+    sent = []
+    context = create_context(router, sent)
+    await router.route_message(message='[2,"1","Heartbeat",{}]', context=context)
+    # Unique id counter of the Charging Station was reset by a reboot
+    await router.route_message(
+        message='[2,"1","Authorize",{"idTag":"tag"}]', context=context
+    )
+    await router.route_message(
+        message='[2,"1","Authorize",{"idTag":"tag"}]', context=context
+    )
+
+    assert len(authorized) == 1
+    assert json.loads(sent[1]) == [3, "1", {"idTagInfo": {"status": "Accepted"}}]
+    assert sent[2] == sent[1]
@@ -0,0 +1,42 @@
+import pytest
+from ocpp.charge_point import camel_to_snake_case, snake_to_camel_case
+
+from ocpp_asgi.casing import CaseTable, case_table
+
+payload = {
+    "connectorId": 1,
+    "transactionId": 2,
+    "meterValue": [
+        {
+            "timestamp": "2022-01-01T00:00:00Z",
+            "sampledValue": [
+                {"value": "1", "measurand": "SoC", "unitOfMeasure": {"unit": "Wh"}},
+            ],
+        }
+    ],
+    "vendorSpecificKey": {"someValue": [1, 2]},
+}
+
+
+@pytest.mark.parametrize("ocpp_version", ["1.6", "2.0", "2.0.1", None])
+def test_case_table_matches_ocpp(ocpp_version):
+    table = case_table(ocpp_version)
+    snake_case_payload = table.to_snake(payload)
+    assert snake_case_payload == camel_to_snake_case(payload)
+    assert table.to_camel(snake_case_payload) == snake_to_camel_case(snake_case_payload)
+    for key, value in table.to_snake_keys.items():
+        assert value == next(iter(camel_to_snake_case({key: None})))
+    for key, value in table.to_camel_keys.items():
+        assert value == next(iter(snake_to_camel_case({key: None})))
+
+
+def test_case_table_is_built_once():
+    assert case_table("1.6") is case_table("1.6")
+    assert "chargePointVendor" in case_table("1.6").to_snake_keys
+    assert "charge_point_vendor" in case_table("1.6").to_camel_keys
+
+
+def test_case_table_fallback():
+    table = CaseTable()
+    assert table.to_snake({"someKey": 1}) == {"some_key": 1}
+    assert table.to_camel({"some_key": 1}) == {"someKey": 1}
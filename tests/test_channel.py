@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from ocpp_asgi.channel import Channel, InMemoryChannelBackend, RedisChannelBackend
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        return InMemoryChannelBackend()
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisChannelBackend(fakeredis.FakeAsyncRedis())
+
+
+@pytest.mark.asyncio
+async def test_wait_is_resolved_by_publish(backend):
+    # Central System and client API processes sharing the backend
+    central_system, client_api = Channel(backend), Channel(backend)
+    waiter = asyncio.create_task(client_api.wait("cs-1", timeout=1))
+    while not await central_system.is_waiting("cs-1"):
+        await asyncio.sleep(0)
+    assert not await central_system.is_waiting("cs-2")
+
+    await central_system.publish("cs-2", "other")
+    await central_system.publish("cs-1", "response")
+    assert await waiter == "response"
+    assert not await central_system.is_waiting("cs-1")
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client_api.wait("cs-1", timeout=0.01)
+    await central_system.close()
+    await client_api.close()
+
+
+@pytest.mark.asyncio
+async def test_subscribe(backend):
+    central_system, client_api = Channel(backend), Channel(backend)
+    received = []
+
+    async def receive():
+        async for value in central_system.subscribe("requests"):
+            received.append(value)
+            if len(received) == 2:
+                return
+
+    task = asyncio.create_task(receive())
+    await asyncio.sleep(0.01)
+    await client_api.publish("requests", "1")
+    await client_api.publish("responses", "x")
+    await client_api.publish("requests", "2")
+    await asyncio.wait_for(task, 1)
+
+    assert received == ["1", "2"]
+    assert central_system._subscribers == {}
+    await central_system.close()
+
+
+def test_channel_created_before_event_loop():
+    channel = Channel(InMemoryChannelBackend())
+
+    async def run():
+        waiter = asyncio.ensure_future(channel.wait("cs-1", timeout=1))
+        while not await channel.is_waiting("cs-1"):
+            await asyncio.sleep(0)
+        await channel.publish("cs-1", "response")
+        assert await waiter == "response"
+        await channel.close()
+
+    asyncio.run(run())
@@ -0,0 +1,39 @@
+import decimal
+
+import pytest
+
+from ocpp_asgi.codec import JSONCodec, OrjsonCodec, get_codec, json_codec
+from ocpp_asgi.messages import parse_message
+
+
+@pytest.fixture(params=["json", "orjson"])
+def codec(request) -> JSONCodec:
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    return get_codec(request.param)
+
+
+def test_get_codec():
+    assert get_codec() is json_codec
+    assert get_codec("json") is json_codec
+    assert get_codec(json_codec) is json_codec
+    assert isinstance(get_codec("auto"), JSONCodec)
+    with pytest.raises(ValueError):
+        get_codec("unknown")
+
+
+def test_codec_roundtrip(codec):
+    frame = [3, "1", {"limit": decimal.Decimal("21.44"), "status": "Accepted"}]
+    text = codec.dumps(frame)
+    assert text == '[3,"1",{"limit":21.4,"status":"Accepted"}]'
+    assert codec.loads(text) == [3, "1", {"limit": 21.4, "status": "Accepted"}]
+
+
+def test_parse_message_bytes(codec):
+    message = parse_message(b'[2,"1","Heartbeat",{}]', codec)
+    assert message.action == "Heartbeat"
+
+
+def test_orjson_codec():
+    pytest.importorskip("orjson")
+    assert isinstance(get_codec("orjson"), OrjsonCodec)
@@ -0,0 +1,66 @@
+import threading
+
+from ocpp_asgi.connections import ConnectionRegistry
+from ocpp_asgi.router import RouterContext, Subprotocol
+
+
+def create_context(charging_station_id: str, subprotocol: Subprotocol):
+    return RouterContext(
+        scope={},
+        body=None,
+        subprotocol=subprotocol.value,
+        ocpp_adapter=None,
+        send=None,
+        charging_station_id=charging_station_id,
+    )
+
+
+def test_lookup_and_counts():
+    registry = ConnectionRegistry()
+    a = create_context("a", Subprotocol.ocpp16)
+    b = create_context("b", Subprotocol.ocpp201)
+    c = create_context("c", Subprotocol.ocpp16)
+    for context in [a, b, c]:
+        assert registry.add(context) is None
+
+    assert registry.get("a") is a
+    assert registry.get("x") is None
+    assert "b" in registry
+    assert len(registry) == 3
+    assert registry.count(Subprotocol.ocpp16) == 2
+    assert registry.count("ocpp2.0.1") == 1
+    assert registry.snapshot(Subprotocol.ocpp16) == [a, c]
+    assert list(registry) == [a, b, c]
+
+    assert registry.remove(a)
+    assert not registry.remove(a)
+    assert registry.count(Subprotocol.ocpp16) == 1
+    assert registry.snapshot() == [b, c]
+
+
+def test_reconnect_replaces_stale_connection():
+    registry = ConnectionRegistry()
+    stale = create_context("a", Subprotocol.ocpp16)
+    current = create_context("a", Subprotocol.ocpp201)
+    registry.add(stale)
+
+    assert registry.add(current) is stale
+    assert not registry.remove(stale)
+    assert registry.get("a") is current
+    assert registry.count(Subprotocol.ocpp16) == 0
+    assert registry.count(Subprotocol.ocpp201) == 1
+
+
+def test_snapshot_from_another_thread():
+    registry = ConnectionRegistry()
+    for i in range(1000):
+        registry.add(create_context(str(i), Subprotocol.ocpp16))
+    snapshots = []
+    thread = threading.Thread(target=lambda: snapshots.append(registry.snapshot()))
+    thread.start()
+    for i in range(1000):
+        registry.remove(registry.get(str(i)))
+    thread.join()
+
+    assert len(snapshots[0]) <= 1000
+    assert len(registry) == 0
@@ -0,0 +1,41 @@
+import dataclasses
+
+import pytest
+from ocpp.v16 import call, call_result
+from ocpp.v16.enums import Action
+
+from ocpp_asgi.dispatch import payload_classes
+from ocpp_asgi.router import Router, Subprotocol
+
+
+def test_payload_classes():
+    classes = payload_classes("1.6")
+    assert classes["Heartbeat"] == (call.HeartbeatPayload, call_result.HeartbeatPayload)
+    with pytest.raises(ValueError):
+        payload_classes("1.5")
+
+
+def test_dispatch_table():
+    router = Router(subprotocol=Subprotocol.ocpp16)
+
+    @router.on(Action.Heartbeat, skip_schema_validation=True)
+    def on_heartbeat(*, payload, context):
+        pass
+
+    entry = router.lookup("Heartbeat")
+    assert entry.on_action is on_heartbeat.__wrapped__
+    assert entry.after_action is None
+    assert entry.request_class is call.HeartbeatPayload
+    assert entry.response_class is call_result.HeartbeatPayload
+    assert entry.skip_schema_validation is True
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        entry.on_action = None
+
+    @router.after(Action.Heartbeat)
+    def after_heartbeat(*, payload, context):
+        pass
+
+    assert router.lookup("Heartbeat").after_action is after_heartbeat.__wrapped__
+    assert router.lookup("Unknown") is None
+    # Actions without handlers are still resolved e.g. for outbound calls
+    assert router.lookup("Reset").on_action is None
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from ocpp_asgi.executor import (
+    AfterHandlerExecutor,
+    ConnectionDispatcher,
+    DispatchPolicy,
+    OverflowPolicy,
+)
+
+
+@pytest.mark.asyncio
+async def test_executor_concurrency_and_failures():
+    executor = AfterHandlerExecutor(concurrency=2)
+    running = []
+    peak = 0
+
+    async def job():
+        nonlocal peak
+        running.append(1)
+        peak = max(peak, len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+
+    def failing_job():
+        raise ValueError
+
+    for _ in range(5):
+        await executor.submit(job)
+    await executor.submit(failing_job)
+    await executor.drain()
+
+    assert peak == 2
+    assert executor.metrics.completed == 5
+    assert executor.metrics.failed == 1
+    assert executor.metrics.queue_depth == 0
+    assert executor.metrics.latency_max >= 0.01
+    assert executor.metrics.latency_avg > 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "policy, executed, dropped, inlined",
+    [
+        (OverflowPolicy.drop_oldest, [0, 3, 4], 2, 0),
+        (OverflowPolicy.inline, [3, 4, 0, 1, 2], 0, 2),
+    ],
+)
+async def test_executor_overflow(policy, executed, dropped, inlined):
+    executor = AfterHandlerExecutor(concurrency=1, max_queue=2, policy=policy)
+    order = []
+    release = asyncio.Event()
+
+    async def job(i):
+        if i == 0:
+            await release.wait()
+        order.append(i)
+
+    await executor.submit(lambda: job(0))
+    await asyncio.sleep(0)  # Worker is now blocked with job 0
+    for i in range(1, 5):
+        await executor.submit(lambda i=i: job(i))
+    release.set()
+    await executor.drain()
+
+    assert order == executed
+    assert executor.metrics.dropped == dropped
+    assert executor.metrics.inlined == inlined
+
+
+@pytest.mark.asyncio
+async def test_executor_block():
+    executor = AfterHandlerExecutor(concurrency=1, max_queue=1)
+    release = asyncio.Event()
+    await executor.submit(release.wait)
+    await asyncio.sleep(0)
+    await executor.submit(lambda: None)
+    blocked = asyncio.ensure_future(executor.submit(lambda: None))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    release.set()
+    await blocked
+    await executor.drain()
+    assert executor.metrics.completed == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "policy, order",
+    [
+        (DispatchPolicy.fifo, ["A1", "A2", "B1"]),
+        (DispatchPolicy.per_action, ["B1", "A1", "A2"]),
+    ],
+)
+async def test_connection_dispatcher_order(policy, order):
+    dispatcher = ConnectionDispatcher(policy, max_in_flight=3)
+    handled = []
+
+    def job(name: str, delay: float):
+        async def handle():
+            await asyncio.sleep(delay)
+            handled.append(name)
+
+        return handle
+
+    await dispatcher.submit("A", job("A1", 0.02))
+    await dispatcher.submit("A", job("A2", 0))
+    await dispatcher.submit("B", job("B1", 0))
+    await dispatcher.close()
+    assert handled == order
+    assert dispatcher._queues == {}
+
+
+@pytest.mark.asyncio
+async def test_connection_dispatcher_in_flight_limit():
+    dispatcher = ConnectionDispatcher(DispatchPolicy.per_action, max_in_flight=2)
+    release = asyncio.Event()
+
+    async def job():
+        await release.wait()
+
+    def failing_job():
+        raise ValueError
+
+    await dispatcher.submit("A", job)
+    await dispatcher.submit("B", failing_job)
+    await dispatcher.submit("C", job)
+    blocked = asyncio.ensure_future(dispatcher.submit("D", job))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    release.set()
+    await blocked
+    await dispatcher.close()
@@ -0,0 +1,61 @@
+import json
+import time
+
+import pytest
+
+from ocpp_asgi.heartbeat import HeartbeatResponder
+from ocpp_asgi.instrumentation import MetricsRegistry
+from ocpp_asgi.router import Router, Subprotocol
+from tests.test_app import (
+    CentralSystem,
+    CentralSystemHTTP,
+    WebSocketConnection,
+    http_event,
+    http_request,
+)
+
+
+def test_response_is_formatted_once_per_second(monkeypatch):
+    now = 1640995200.25
+    monkeypatch.setattr(time, "time", lambda: now)
+    responder = HeartbeatResponder()
+    assert responder.response("1") == '[3,"1",{"currentTime":"2022-01-01T00:00:00Z"}]'
+    tail = responder._tail
+    now = 1640995200.75
+    assert responder.response("2").endswith(tail)
+    assert responder._tail is tail
+    now = 1640995201.0
+    assert responder.response("3") == '[3,"3",{"currentTime":"2022-01-01T00:00:01Z"}]'
+
+
+def test_failing_hook_is_logged(caplog):
+    def on_heartbeat(charging_station_id: str):
+        raise RuntimeError("failure")
+
+    HeartbeatResponder(on_heartbeat=on_heartbeat).seen("123")
+    assert "Failure in on_heartbeat" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_is_responded_without_router():
+    seen = []
+    metrics = MetricsRegistry()
+    app = CentralSystem(
+        metrics=metrics, heartbeat=HeartbeatResponder(on_heartbeat=seen.append)
+    )
+    # Router has no Heartbeat handler
+    app.include_router(Router(subprotocol=Subprotocol.ocpp16))
+    async with WebSocketConnection(app) as ws:
+        await ws.receive()
+        await ws.send('[2,"1","Heartbeat",{}]')
+        response = json.loads((await ws.receive())["text"])
+        assert response[:2] == [3, "1"]
+        assert response[2]["currentTime"].endswith("Z")
+
+    sent = await http_request(
+        CentralSystemHTTP(heartbeat=app.heartbeat),
+        json.dumps(http_event("456", '[2,"2","Heartbeat",{}]')).encode(),
+    )
+    assert json.loads(sent[1]["body"])[:2] == [3, "2"]
+    assert seen == ["123", "456"]
+    assert metrics.counters[("call_received", "ocpp1.6", "Heartbeat", "")] == 1
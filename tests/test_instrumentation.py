@@ -0,0 +1,65 @@
+import pytest
+
+from ocpp_asgi.instrumentation import (
+    Counter,
+    Instrumentation,
+    Instruments,
+    MetricsRegistry,
+    Stage,
+)
+
+
+class Recorder(Instrumentation):
+    def __init__(self):
+        self.timings = []
+        self.counts = []
+
+    def on_timing(self, stage, duration, *, subprotocol, action):
+        self.timings.append((stage, subprotocol, action))
+
+    def on_count(self, counter, *, subprotocol, action, error=None):
+        self.counts.append((counter, subprotocol, action, error))
+
+
+def test_stage_timer_counts_exceptions():
+    recorder = Recorder()
+    instruments = Instruments([recorder])
+    with instruments.timer(Stage.handler, subprotocol="ocpp1.6", action="Heartbeat"):
+        pass
+    with pytest.raises(ValueError):
+        with instruments.timer(
+            Stage.validation, subprotocol="ocpp1.6", action="Heartbeat"
+        ):
+            raise ValueError
+
+    assert recorder.timings == [
+        (Stage.handler, "ocpp1.6", "Heartbeat"),
+        (Stage.validation, "ocpp1.6", "Heartbeat"),
+    ]
+    assert recorder.counts == [(Counter.error, "ocpp1.6", "Heartbeat", "ValueError")]
+
+
+def test_metrics_registry_render():
+    registry = MetricsRegistry(buckets=(0.1, 0.01))
+    registry.on_timing(Stage.parse, 0.005, subprotocol="ocpp1.6", action="")
+    registry.on_timing(Stage.parse, 0.05, subprotocol="ocpp1.6", action="")
+    registry.on_timing(Stage.parse, 1.0, subprotocol="ocpp1.6", action="")
+    registry.on_count(Counter.call_sent, subprotocol="ocpp1.6", action="Reset")
+    registry.on_count(Counter.call_sent, subprotocol="ocpp1.6", action="Reset")
+
+    lines = registry.render().splitlines()
+    labels = 'stage="parse",subprotocol="ocpp1.6",action=""'
+    assert f'ocpp_asgi_stage_duration_seconds_bucket{{{labels},le="0.01"}} 1' in lines
+    assert f'ocpp_asgi_stage_duration_seconds_bucket{{{labels},le="0.1"}} 2' in lines
+    assert f'ocpp_asgi_stage_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in lines
+    assert f"ocpp_asgi_stage_duration_seconds_count{{{labels}}} 3" in lines
+    assert 'ocpp_asgi_calls_sent_total{subprotocol="ocpp1.6",action="Reset"} 2' in lines
+    assert "# TYPE ocpp_asgi_errors_total counter" in lines
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.on_count(
+        Counter.error, subprotocol="ocpp1.6", action='"\n', error="ValueError"
+    )
+    assert 'action="\\"\\n"' in registry.render()
@@ -0,0 +1,69 @@
+import logging
+
+import pytest
+
+from ocpp_asgi import logging as ocpp_logging
+from ocpp_asgi.logging import (
+    StructuredMessage,
+    debug_enabled,
+    log,
+    set_trace_sampling,
+    trace,
+    trace_message,
+)
+
+
+class Unformattable:
+    def __repr__(self):
+        raise AssertionError("Formatted although debug logging is disabled")
+
+
+@pytest.fixture
+def debug_level():
+    level = log.level
+    log.setLevel(logging.DEBUG)
+    yield
+    log.setLevel(level)
+    set_trace_sampling(1.0)
+
+
+def test_structured_message_format():
+    message = StructuredMessage("send", {"charging_station_id": "cs", "event": 1})
+    assert str(message) == "send charging_station_id='cs' event=1"
+
+
+def test_trace_is_not_formatted_when_debug_disabled(caplog):
+    log.setLevel(logging.INFO)
+    assert not debug_enabled()
+    trace("scope", scope=Unformattable())
+    trace_message("event", event=Unformattable())
+    assert caplog.records == []
+
+
+def test_trace_record_has_fields(debug_level, caplog):
+    caplog.set_level(logging.DEBUG, logger=log.name)
+    assert debug_enabled()
+    trace("scope", scope={"type": "websocket"})
+    (record,) = caplog.records
+    assert record.getMessage() == "scope scope={'type': 'websocket'}"
+    assert record.fields == {"scope": {"type": "websocket"}}
+    assert record.funcName == "test_trace_record_has_fields"
+
+
+def test_trace_message_sampling(debug_level, caplog):
+    caplog.set_level(logging.DEBUG, logger=log.name)
+    set_trace_sampling(0.1)
+    for i in range(100):
+        trace_message("event", event=i)
+    assert len(caplog.records) == 10
+
+    caplog.clear()
+    set_trace_sampling(0.0)
+    trace_message("event", event=0)
+    assert caplog.records == []
+
+
+def test_invalid_sampling():
+    with pytest.raises(ValueError):
+        set_trace_sampling(2.0)
+    assert ocpp_logging._sample_interval == 1
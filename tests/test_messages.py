@@ -0,0 +1,44 @@
+import pytest
+from ocpp.exceptions import (
+    FormatViolationError,
+    PropertyConstraintViolationError,
+    ProtocolError,
+)
+from ocpp.messages import Call, CallError, CallResult
+
+from ocpp_asgi.messages import parse_message
+
+
+def test_parse_message_call():
+    message = parse_message('[2,"1","Heartbeat",{}]')
+    assert type(message) is Call
+    assert message.unique_id == "1"
+    assert message.action == "Heartbeat"
+    assert message.payload == {}
+
+
+def test_parse_message_whitespace():
+    message = parse_message(' [ 3 , "1", {"currentTime": "2022-01-01T00:00:00Z"}]')
+    assert type(message) is CallResult
+    assert message.payload == {"currentTime": "2022-01-01T00:00:00Z"}
+
+
+def test_parse_message_decoded():
+    message = parse_message([4, "1", "InternalError", "Failure", {}])
+    assert type(message) is CallError
+    assert message.error_code == "InternalError"
+
+
+@pytest.mark.parametrize(
+    "frame, exception",
+    [
+        ("[2,", FormatViolationError),
+        ('{"a": 1}', ProtocolError),
+        ("[]", ProtocolError),
+        ('[5,"1",{}]', PropertyConstraintViolationError),
+        ('[2,"1"]', ProtocolError),
+    ],
+)
+def test_parse_message_invalid(frame, exception):
+    with pytest.raises(exception):
+        parse_message(frame)
@@ -0,0 +1,158 @@
+import asyncio
+import json
+
+import pytest
+from ocpp.v16 import call, call_result
+
+from ocpp_asgi.instrumentation import MetricsRegistry
+from ocpp_asgi.outbound import CallExpiredError, OutboundQueue, Priority, priority_of
+from ocpp_asgi.router import Router, Subprotocol
+from tests.test_app import CentralSystem, WebSocketConnection
+
+
+async def run(queue: OutboundQueue, sent: list, name: str, **kwargs):
+    await queue.acquire(**kwargs)
+    sent.append(name)
+    await asyncio.sleep(0)
+    queue.release()
+
+
+@pytest.mark.asyncio
+async def test_queue_sends_by_priority_and_expires():
+    queue = OutboundQueue()
+    sent = []
+    assert queue.try_acquire()
+    tasks = [
+        asyncio.ensure_future(run(queue, sent, "low", priority=Priority.low)),
+        asyncio.ensure_future(run(queue, sent, "normal-1")),
+        asyncio.ensure_future(run(queue, sent, "expired", timeout=0.01)),
+        asyncio.ensure_future(run(queue, sent, "normal-2")),
+        asyncio.ensure_future(run(queue, sent, "high", priority=Priority.high)),
+        asyncio.ensure_future(run(queue, sent, "cancelled")),
+    ]
+    await asyncio.sleep(0.02)
+    tasks[-1].cancel()
+    assert len(queue) == 5
+    queue.release()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert sent == ["high", "normal-1", "normal-2", "low"]
+    assert isinstance(results[2], CallExpiredError)
+    assert isinstance(results[5], asyncio.CancelledError)
+    assert len(queue) == 0 and not queue.busy
+
+
+@pytest.mark.asyncio
+async def test_cancelled_turn_is_passed_on():
+    queue = OutboundQueue()
+    sent = []
+    assert queue.try_acquire()
+    waiting = asyncio.ensure_future(queue.acquire())
+    task = asyncio.ensure_future(run(queue, sent, "next"))
+    await asyncio.sleep(0)
+    # Turn is granted and the caller is cancelled before it could send
+    queue.release()
+    waiting.cancel()
+    await task
+    assert sent == ["next"]
+    assert not queue.busy
+
+
+@pytest.mark.asyncio
+async def test_closed_queue_fails_calls():
+    queue = OutboundQueue()
+    assert queue.try_acquire()
+    waiting = asyncio.ensure_future(queue.acquire(timeout=1))
+    await asyncio.sleep(0)
+    queue.close()
+    with pytest.raises(ConnectionError):
+        await waiting
+    assert len(queue) == 0
+    with pytest.raises(ConnectionError):
+        queue.try_acquire()
+    with pytest.raises(ConnectionError):
+        await queue.acquire()
+
+
+def test_priority_of():
+    assert priority_of("RemoteStopTransaction") == Priority.high
+    assert priority_of("GetDiagnostics") == Priority.low
+    assert priority_of("ClearCache") == Priority.normal
+
+
+@pytest.mark.asyncio
+async def test_next_call_is_sent_when_response_arrives():
+    metrics = MetricsRegistry()
+    app = CentralSystem(metrics=metrics)
+    app.include_router(Router(subprotocol=Subprotocol.ocpp16))
+    async with WebSocketConnection(app) as ws:
+        await ws.receive()
+        diagnostics = asyncio.create_task(
+            app.call(
+                charging_station_id="123",
+                message=call.GetDiagnosticsPayload(location="ftp://x"),
+            )
+        )
+        clear_cache = asyncio.create_task(
+            app.call(charging_station_id="123", message=call.ClearCachePayload())
+        )
+        expired = asyncio.create_task(
+            app.call(
+                charging_station_id="123",
+                message=call.ClearCachePayload(),
+                timeout=0.01,
+            )
+        )
+        stop = asyncio.create_task(
+            app.call(
+                charging_station_id="123",
+                message=call.RemoteStopTransactionPayload(transaction_id=1),
+            )
+        )
+        request = json.loads((await ws.receive())["text"])
+        assert request[2] == "GetDiagnostics"
+        await asyncio.sleep(0.02)
+        assert app.outbound_queue_depth() == 2
+        assert "ocpp_asgi_outbound_queued_calls 2" in metrics.render()
+        with pytest.raises(CallExpiredError):
+            await expired
+
+        await ws.send(json.dumps([3, request[1], {}]))
+        assert await diagnostics == call_result.GetDiagnosticsPayload()
+        for action, task, payload in [
+            ("RemoteStopTransaction", stop, {"status": "Accepted"}),
+            ("ClearCache", clear_cache, {"status": "Accepted"}),
+        ]:
+            request = json.loads((await ws.receive())["text"])
+            assert request[2] == action
+            await ws.send(json.dumps([3, request[1], payload]))
+            await task
+
+    assert ("queue_wait", "ocpp1.6", "ClearCache") in metrics.timings
+    assert metrics.counters[("error", "ocpp1.6", "ClearCache", "CallExpiredError")] == 1
+
+
+@pytest.mark.asyncio
+async def test_queued_calls_fail_on_disconnect():
+    app = CentralSystem()
+    app.include_router(Router(subprotocol=Subprotocol.ocpp16))
+    async with WebSocketConnection(app) as ws:
+        await ws.receive()
+        outstanding = asyncio.create_task(
+            app.call(charging_station_id="123", message=call.ClearCachePayload())
+        )
+        queued = [
+            asyncio.create_task(
+                app.call(charging_station_id="123", message=call.ClearCachePayload())
+            )
+            for _ in range(2)
+        ]
+        assert json.loads((await ws.receive())["text"])[2] == "ClearCache"
+        await asyncio.sleep(0)
+        assert app.outbound_queue_depth() == 2
+
+    results = await asyncio.wait_for(
+        asyncio.gather(outstanding, *queued, return_exceptions=True), 1
+    )
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert ws.outbound.empty()
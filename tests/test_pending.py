@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from ocpp.messages import CallResult
+
+from ocpp_asgi.pending import PendingCalls, TimerWheel
+
+
+@pytest.mark.asyncio
+async def test_timer_wheel():
+    wheel = TimerWheel(resolution=0.01, slots=4)
+    fired = []
+    wheel.schedule(0.01, lambda: fired.append(1))
+    wheel.schedule(0.08, lambda: fired.append(2))
+    cancelled = wheel.schedule(0.02, lambda: fired.append(3))
+    wheel.cancel(cancelled)
+    assert len(wheel) == 2
+    await asyncio.sleep(0.05)
+    assert fired == [1]
+    await asyncio.sleep(0.1)
+    assert fired == [1, 2]
+    assert len(wheel) == 0
+    assert wheel._handle is None
+
+
+@pytest.mark.asyncio
+async def test_pending_calls_resolve():
+    pending = PendingCalls()
+    future = pending.register("cs", "1", timeout=1)
+    assert len(pending) == 1
+    assert pending.resolve("other", CallResult("1", {})) is False
+    assert pending.resolve("cs", CallResult("1", {})) is True
+    assert (await future).unique_id == "1"
+    assert len(pending) == 0
+    # Late or duplicate responses are ignored
+    assert pending.resolve("cs", CallResult("1", {})) is False
+
+
+@pytest.mark.asyncio
+async def test_pending_calls_timeout():
+    pending = PendingCalls(timer_wheel=TimerWheel(resolution=0.01))
+    future = pending.register("cs", "1", timeout=0.01)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(future, 1)
+    assert len(pending) == 0
+    assert pending.resolve("cs", CallResult("1", {})) is False
+
+
+@pytest.mark.asyncio
+async def test_pending_calls_cancel_connection():
+    wheel = TimerWheel()
+    pending = PendingCalls(timer_wheel=wheel)
+    futures = [pending.register("cs", str(i), timeout=10) for i in range(3)]
+    other = pending.register("other", "1", timeout=10)
+    assert pending.cancel_connection("cs") == 3
+    for future in futures:
+        with pytest.raises(ConnectionError):
+            await future
+    assert len(pending) == 1
+    assert len(wheel) == 1
+    pending.discard("other", "1")
+    assert other.cancelled()
+    assert len(wheel) == 0
@@ -0,0 +1,172 @@
+import asyncio
+import json
+
+import pytest
+
+from ocpp_asgi.channel import Channel, InMemoryChannelBackend
+from ocpp_asgi.proxy import WebSocketProxy
+from tests.test_app import WebSocketConnection
+
+
+class StubTransport:
+    """In-memory stand-in of HTTPTransport responding with CallResults."""
+
+    def __init__(self, batch_size: int = 1):
+        self.batch_size = batch_size
+        self.events = []
+        self.delays = {}
+        self.fail = False
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def post(self, url: str, data: str) -> str:
+        event = json.loads(data)
+        self.events.append(event)
+        frame = json.loads(event["body"])
+        await asyncio.sleep(self.delays.get(frame[1], 0))
+        if self.fail:
+            raise ConnectionError("HTTP 500")
+        if frame[0] != 2:
+            return ""
+        return json.dumps([3, frame[1], {}])
+
+    async def post_batched(self, url: str, document: str):
+        return await self.post(url, document) or None
+
+
+@pytest.mark.asyncio
+async def test_responses_are_sent_in_order():
+    transport = StubTransport()
+    transport.delays["1"] = 0.05
+    proxy = WebSocketProxy(
+        url="http://cs", transport=transport, max_in_flight_per_connection=2
+    )
+    async with WebSocketConnection(proxy) as ws:
+        assert (await ws.receive())["subprotocol"] == "ocpp1.6"
+        await ws.send('[2,"1","Heartbeat",{}]')
+        await ws.send('[3,"100",{}]')
+        await ws.send('[2,"2","Heartbeat",{}]')
+        assert json.loads((await ws.receive())["text"])[1] == "1"
+        assert json.loads((await ws.receive())["text"])[1] == "2"
+        assert proxy.connections.get("123") is not None
+
+    assert len(proxy.connections) == 0
+    assert transport.events[0] == {
+        "requestContext": {"connection_id": "123", "subprotocols": ["ocpp1.6"]},
+        "body": '[2,"1","Heartbeat",{}]',
+    }
+
+
+@pytest.mark.asyncio
+async def test_in_flight_is_bounded():
+    transport = StubTransport()
+    transport.delays["1"] = 0.05
+    proxy = WebSocketProxy(url="http://cs", transport=transport, max_in_flight=1)
+    async with WebSocketConnection(proxy, path="/1") as ws1, WebSocketConnection(
+        proxy, path="/2"
+    ) as ws2:
+        await ws1.receive()
+        await ws2.receive()
+        await ws1.send('[2,"1","Heartbeat",{}]')
+        await ws2.send('[2,"2","Heartbeat",{}]')
+        await asyncio.sleep(0.01)
+        assert len(transport.events) == 1
+        assert json.loads((await ws1.receive())["text"])[1] == "1"
+        assert json.loads((await ws2.receive())["text"])[1] == "2"
+
+
+def test_proxy_created_before_event_loop():
+    # As with uvicorn.run, proxy is created before the loop of the server exists
+    transport = StubTransport()
+    transport.delays["1"] = 0.05
+    proxy = WebSocketProxy(url="http://cs", transport=transport, max_in_flight=1)
+    assert proxy._in_flight is None
+
+    async def run():
+        async with WebSocketConnection(proxy, path="/1") as ws1, WebSocketConnection(
+            proxy, path="/2"
+        ) as ws2:
+            await ws1.receive()
+            await ws2.receive()
+            await ws1.send('[2,"1","Heartbeat",{}]')
+            await ws2.send('[2,"2","Heartbeat",{}]')
+            assert json.loads((await ws1.receive())["text"])[1] == "1"
+            assert json.loads((await ws2.receive())["text"])[1] == "2"
+
+    asyncio.run(run())
+
+
+@pytest.mark.asyncio
+async def test_failure_responds_with_call_error():
+    transport = StubTransport()
+    transport.fail = True
+    proxy = WebSocketProxy(url="http://cs", transport=transport)
+    async with WebSocketConnection(proxy) as ws:
+        await ws.receive()
+        await ws.send('[3,"100",{}]')
+        await ws.send('[2,"1","Heartbeat",{}]')
+        response = json.loads((await ws.receive())["text"])
+        assert response[:3] == [4, "1", "InternalError"]
+
+
+@pytest.mark.asyncio
+async def test_server_initiated_message():
+    channel = Channel(InMemoryChannelBackend())
+    proxy = WebSocketProxy(url="http://cs", transport=StubTransport(), channel=channel)
+    await proxy.start()
+    async with WebSocketConnection(proxy) as ws:
+        await ws.receive()
+        await asyncio.sleep(0)
+        for charging_station_id in ["unknown", "123"]:
+            await channel.publish(
+                "connections",
+                json.dumps(
+                    {
+                        "charging_station_id": charging_station_id,
+                        "message": '[2,"1","Reset",{"type":"Soft"}]',
+                    }
+                ),
+            )
+        assert (await ws.receive())["text"] == '[2,"1","Reset",{"type":"Soft"}]'
+    await proxy.stop()
+    await channel.close()
+
+
+@pytest.mark.asyncio
+async def test_server_initiated_message_does_not_wait_for_forward():
+    channel = Channel(InMemoryChannelBackend())
+    transport = StubTransport()
+    transport.delays["1"] = 0.5
+    proxy = WebSocketProxy(url="http://cs", transport=transport, channel=channel)
+    await proxy.start()
+    async with WebSocketConnection(proxy) as ws:
+        await ws.receive()
+        await ws.send('[2,"1","Heartbeat",{}]')
+        await asyncio.sleep(0.01)
+        await channel.publish(
+            "connections",
+            json.dumps(
+                {
+                    "charging_station_id": "123",
+                    "message": '[2,"a","Reset",{"type":"Soft"}]',
+                }
+            ),
+        )
+        message = await asyncio.wait_for(ws.outbound.get(), 0.2)
+        assert message["text"] == '[2,"a","Reset",{"type":"Soft"}]'
+        assert json.loads((await ws.receive())["text"])[1] == "1"
+    await proxy.stop()
+    await channel.close()
+
+
+@pytest.mark.asyncio
+async def test_rejects_unsupported_subprotocol():
+    proxy = WebSocketProxy(
+        url="http://cs", transport=StubTransport(), subprotocols=["ocpp2.0.1"]
+    )
+    async with WebSocketConnection(proxy) as ws:
+        assert (await ws.receive())["type"] == "websocket.close"
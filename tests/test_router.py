@@ -1,6 +1,99 @@
-from ocpp_asgi.router import Subprotocol, subprotocol_to_ocpp_version
+import asyncio
+import json
+
+import pytest
+from ocpp.exceptions import InternalError, NotImplementedError
+from ocpp.messages import CallError, CallResult
+from ocpp.v16 import call, call_result
+
+from ocpp_asgi.router import (
+    Router,
+    RouterContext,
+    Subprotocol,
+    subprotocol_to_ocpp_version,
+)
 
 
 def test_subprotocol_to_ocpp_version():
     ocpp_version: str = subprotocol_to_ocpp_version(Subprotocol.ocpp16)
     assert ocpp_version == "1.6"
+
+
+def create_context(router: Router, charging_station_id: str, respond) -> RouterContext:
+    """Create RouterContext whose Charging Station responds with respond(call)."""
+
+    async def send(*, message: str, is_response: bool, context: RouterContext):
+        call = json.loads(message)
+        asyncio.get_running_loop().call_soon(
+            router.pending_calls.resolve, charging_station_id, respond(call)
+        )
+
+    return RouterContext(
+        scope={},
+        body=None,
+        subprotocol=router.subprotocol,
+        ocpp_adapter=None,
+        send=send,
+        charging_station_id=charging_station_id,
+    )
+
+
+@pytest.mark.asyncio
+async def test_fan_out():
+    router = Router(subprotocol=Subprotocol.ocpp16)
+    frames = []
+
+    def respond(call):
+        frames.append(call)
+        if call[1] == "error":
+            return CallError(call[1], "InternalError", "Failure", {})
+        return CallResult(call[1], {"status": "Accepted"})
+
+    router._unique_id_generator = iter(["1", "2", "error", "3"]).__next__
+    contexts = [create_context(router, str(i), respond) for i in range(3)]
+    message = call.ChangeConfigurationPayload(key="HeartbeatInterval", value="10")
+    results = [
+        result
+        async for result in router.fan_out(
+            message=message, contexts=contexts, concurrency=2
+        )
+    ]
+
+    assert sorted(r.charging_station_id for r in results) == ["0", "1", "2"]
+    responses = [r.response for r in results if r.error is None]
+    assert responses == [call_result.ChangeConfigurationPayload(status="Accepted")] * 2
+    assert [type(r.error) for r in results if r.error] == [InternalError]
+    assert [frame[1] for frame in frames] == ["2", "error", "3"]
+    assert all(frame[2:] == frames[0][2:] for frame in frames)
+    assert len(router.pending_calls) == 0
+
+
+@pytest.mark.asyncio
+async def test_fan_out_wrong_version():
+    router = Router(subprotocol=Subprotocol.ocpp201)
+    message = call.ChangeConfigurationPayload(key="HeartbeatInterval", value="10")
+    with pytest.raises(NotImplementedError):
+        async for _ in router.fan_out(message=message, contexts=[]):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_router_context_is_compact():
+    scope = {
+        "type": "websocket",
+        "path": "/cs",
+        "headers": [(b"authorization", b"Basic abc")],
+        "subprotocols": ["ocpp1.6"],
+    }
+    context = RouterContext(
+        scope=scope,
+        body=None,
+        subprotocol=Subprotocol.ocpp16.value,
+        ocpp_adapter=None,
+        send=None,
+        charging_station_id="cs",
+    )
+    assert not hasattr(context, "__dict__")
+    assert context.scope == {"path": "/cs", "headers": scope["headers"]}
+    assert context._outbound is None
+    assert context.outbound is context.outbound
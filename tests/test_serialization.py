@@ -0,0 +1,63 @@
+import decimal
+from dataclasses import asdict, dataclass, fields
+from typing import Optional
+
+import pytest
+from ocpp.charge_point import remove_nones, snake_to_camel_case
+from ocpp.messages import Call, CallResult
+from ocpp.v16 import call
+from ocpp.v16.datatypes import IdTagInfo
+from ocpp.v16.enums import AuthorizationStatus
+
+from ocpp_asgi.dispatch import payload_classes
+from ocpp_asgi.serialization import (
+    encode_call,
+    encode_call_result,
+    payload_to_wire,
+    serializer,
+)
+
+
+def sample(cls: type):
+    """Instantiate payload class with a value for every field."""
+    values = {}
+    for field in fields(cls):
+        if "Dict" in str(field.type):
+            values[field.name] = {"some_key": "value", "id_tag": None}
+        elif "List" in str(field.type):
+            values[field.name] = [{"start_period": 0}, None]
+        else:
+            values[field.name] = "value"
+    return cls(**values)
+
+
+@pytest.mark.parametrize("ocpp_version", ["1.6", "2.0", "2.0.1"])
+def test_payload_to_wire_matches_asdict(ocpp_version):
+    for request_class, response_class in payload_classes(ocpp_version).values():
+        for cls in [request_class, response_class]:
+            if cls is None:
+                continue
+            payload = sample(cls)
+            expected = snake_to_camel_case(remove_nones(asdict(payload)))
+            assert payload_to_wire(payload) == expected
+
+
+def test_payload_to_wire_nested_dataclass():
+    @dataclass
+    class Payload:
+        id_tag_info: IdTagInfo
+        expiry_date: Optional[str] = None
+
+    payload = Payload(id_tag_info=IdTagInfo(status=AuthorizationStatus.accepted))
+    assert payload_to_wire(payload) == {"idTagInfo": {"status": "Accepted"}}
+    assert serializer(Payload) is serializer(Payload)
+
+
+def test_encode_frames():
+    payload = {"limit": decimal.Decimal("21.44"), "idTag": "1"}
+    assert (
+        encode_call("1", "Authorize", payload)
+        == Call("1", "Authorize", payload).to_json()
+    )
+    assert encode_call_result("1", payload) == CallResult("1", payload).to_json()
+    assert payload_to_wire(call.HeartbeatPayload()) == {}
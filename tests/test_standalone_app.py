@@ -4,34 +4,28 @@ import pytest
 from asgi_tools.tests import ASGITestClient
 from dotenv import load_dotenv
 
-from examples.central_system.misc.channel import Pipe, PubSub
 from examples.central_system.routers.v16.provisioning_router import (
     router as v16_provisioning_router,
 )
 from examples.central_system.standalone.central_system import CentralSystem
+from ocpp_asgi.channel import Channel, InMemoryChannelBackend
 from ocpp_asgi.utils import message_to_payload, payload_to_message
 
 load_dotenv()
 
 
 @pytest.fixture
-def pubsub() -> PubSub:
-    return PubSub()
+def channel() -> Channel:
+    return Channel(InMemoryChannelBackend())
 
 
 @pytest.fixture
-def pipe() -> Pipe:
-    return Pipe()
-
-
-@pytest.fixture
-def standalone_app(pubsub, pipe):
-    central_system = CentralSystem(pubsub=pubsub, pipe=pipe)
+def standalone_app(channel):
+    central_system = CentralSystem(channel=channel)
     central_system.include_router(v16_provisioning_router)
     return central_system
 
 
-@pytest.mark.skip("Test runs successfully but hangs.")  # TODO: figure out
 @pytest.mark.asyncio
 async def test_standalone_app(standalone_app):
     client = ASGITestClient(standalone_app)
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+
+from ocpp_asgi.app import ASGIApplication
+from ocpp_asgi.transport import HTTPTransport
+
+web = pytest.importorskip("aiohttp.web")
+test_utils = pytest.importorskip("aiohttp.test_utils")
+
+
+@pytest_asyncio.fixture
+async def server():
+    requests = []
+
+    async def handler(request):
+        body = await request.text()
+        requests.append((request.path, body))
+        if request.path == "/fail":
+            return web.Response(status=500)
+        if request.path == "/batch":
+            return web.json_response([f"echo {item}" for item in json.loads(body)])
+        return web.Response(text=f"echo {body}")
+
+    app = web.Application()
+    app.router.add_post("/{path}", handler)
+    server = test_utils.TestServer(app)
+    await server.start_server()
+    server.requests = requests
+    yield server
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_post_reuses_connection(server):
+    transport = HTTPTransport(limit=1)
+    assert transport.session is None
+    assert await transport.post(str(server.make_url("/a")), "[2]") == "echo [2]"
+    connector = transport.session.connector
+    assert await transport.post(str(server.make_url("/a")), "[3]") == "echo [3]"
+    assert transport.session.connector is connector
+    with pytest.raises(ConnectionError):
+        await transport.post(str(server.make_url("/fail")), "[4]")
+    await transport.stop()
+    assert transport.session is None
+
+
+@pytest.mark.asyncio
+async def test_post_batched(server):
+    transport = HTTPTransport(batch_size=3, batch_delay=0.01)
+    url = str(server.make_url("/batch"))
+    responses = await asyncio.gather(
+        *[transport.post_batched(url, json.dumps(i)) for i in range(4)]
+    )
+    assert responses == ["echo 0", "echo 1", "echo 2", "echo 3"]
+    assert [json.loads(body) for _, body in server.requests] == [
+        [0, 1, 2],
+        [3],
+    ]
+
+    with pytest.raises(ConnectionError):
+        await transport.post_batched(str(server.make_url("/fail")), "{}")
+    await transport.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_posts_pending_batches(server):
+    transport = HTTPTransport(batch_size=10, batch_delay=60)
+    task = asyncio.ensure_future(
+        transport.post_batched(str(server.make_url("/batch")), "{}")
+    )
+    await asyncio.sleep(0)
+    await transport.stop()
+    await task
+    assert server.requests == [("/batch", "[{}]")]
+
+
+@pytest.mark.asyncio
+async def test_lifespan_starts_and_stops_transport():
+    app = ASGIApplication(http_transport=HTTPTransport())
+    events = asyncio.Queue()
+    sent = []
+    for event in ["lifespan.startup", "lifespan.shutdown"]:
+        events.put_nowait({"type": event})
+
+    async def send(event):
+        sent.append(event["type"])
+        if event["type"] == "lifespan.startup.complete":
+            assert app.http_transport.session is not None
+
+    await app({"type": "lifespan"}, events.get, send)
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert app.http_transport.session is None
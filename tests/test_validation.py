@@ -0,0 +1,113 @@
+import decimal
+
+import pytest
+from ocpp.exceptions import (
+    FormatViolationError,
+    NotImplementedError,
+    ProtocolError,
+    TypeConstraintViolationError,
+)
+from ocpp.messages import Call, CallResult, MessageType
+
+from ocpp_asgi.validation import (
+    ValidatorCache,
+    fastjsonschema_backend,
+    jsonschema_backend,
+    schema_keys,
+)
+
+
+@pytest.fixture(params=["jsonschema", "fastjsonschema"])
+def cache(request) -> ValidatorCache:
+    if request.param == "fastjsonschema":
+        pytest.importorskip("fastjsonschema")
+        return ValidatorCache(backend=fastjsonschema_backend)
+    return ValidatorCache(backend=jsonschema_backend)
+
+
+def test_schema_keys():
+    for ocpp_version in ["1.6", "2.0", "2.0.1"]:
+        keys = list(schema_keys(ocpp_version))
+        assert ("BootNotification", MessageType.Call) in keys
+        assert ("BootNotification", MessageType.CallResult) in keys
+
+
+def test_preload_compiles_once():
+    compiled = []
+
+    def backend(schema):
+        compiled.append(schema)
+        return lambda payload: None
+
+    cache = ValidatorCache(backend=backend)
+    cache.preload("1.6")
+    assert len(compiled) == len(list(schema_keys("1.6")))
+    cache.validate(Call("1", "Heartbeat", {}), "1.6")
+    assert len(compiled) == len(list(schema_keys("1.6")))
+
+
+@pytest.mark.parametrize(
+    "current_time", ["2022-01-01T00:00:00Z", "2022-01-01T00:00:00"]
+)
+def test_validate(cache, current_time):
+    payload = {"chargePointModel": "model", "chargePointVendor": "vendor"}
+    cache.validate(Call("1", "BootNotification", payload), "1.6")
+    cache.validate(CallResult("1", {"currentTime": current_time}, "Heartbeat"), "2.0.1")
+    cache.validate(
+        CallResult(
+            "1",
+            {"currentTime": current_time, "interval": 300, "status": "Accepted"},
+            "BootNotification",
+        ),
+        "1.6",
+    )
+
+
+@pytest.mark.parametrize(
+    "payload, exception",
+    [
+        ({"chargePointModel": "model"}, ProtocolError),
+        (
+            {"chargePointModel": 1, "chargePointVendor": "v"},
+            TypeConstraintViolationError,
+        ),
+        (
+            {"chargePointModel": "m", "chargePointVendor": "v", "x": 1},
+            FormatViolationError,
+        ),
+        (
+            {"chargePointModel": "m" * 21, "chargePointVendor": "v"},
+            TypeConstraintViolationError,
+        ),
+    ],
+)
+def test_validate_invalid(cache, payload, exception):
+    with pytest.raises(exception):
+        cache.validate(Call("1", "BootNotification", payload), "1.6")
+
+
+def test_validate_unknown_action(cache):
+    with pytest.raises(NotImplementedError):
+        cache.validate(Call("1", "Unknown", {}), "1.6")
+
+
+def test_validate_decimal(cache):
+    payload = {
+        "connectorId": 1,
+        "csChargingProfiles": {
+            "chargingProfileId": 1,
+            "stackLevel": 0,
+            "chargingProfilePurpose": "TxProfile",
+            "chargingProfileKind": "Absolute",
+            "chargingSchedule": {
+                "chargingRateUnit": "W",
+                "chargingSchedulePeriod": [{"startPeriod": 0, "limit": 21.4}],
+            },
+        },
+    }
+    call = Call("1", "SetChargingProfile", payload)
+    cache.validate(call, "1.6")
+    period = call.payload["csChargingProfiles"]["chargingSchedule"][
+        "chargingSchedulePeriod"
+    ][0]
+    assert period["limit"] == decimal.Decimal("21.4")